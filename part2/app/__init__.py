@@ -1,28 +1,11 @@
-from flask import Flask
-from flask_restx import Api
-from app.api.v1.users import api as users_ns
+"""HBnB: models, persistence, services and the v1 REST API.
 
-from app.api.v1.users import api as users_ns
-from app.api.v1.amenities import api as amenities_ns
-from app.api.v1.places import api as places_ns
-from app.api.v1.reviews import api as reviews_ns
+Importing the package is cheap: Flask, Flask-RESTX, the API namespaces
+and the facade are only loaded by the first create_app() call, so the
+models and repositories can be used without the web stack.
+"""
 
 
 def create_app():
-    app = Flask(__name__)
-
-    api = Api(
-        app,
-        version='1.0',
-        title='HBnB API',
-        description='HBnB Application API',
-        doc='/api/v1/'
-    )
-
-    # Register namespaces
-    api.add_namespace(users_ns, path='/api/v1/users')
-    api.add_namespace(amenities_ns, path='/api/v1/amenities')
-    api.add_namespace(places_ns, path='/api/v1/places')
-    api.add_namespace(reviews_ns, path='/api/v1/reviews')
-
-    return app
+    from app.factory import create_app
+    return create_app()
@@ -1,6 +1,19 @@
-from flask_restx import Namespace, Resource, fields
+from flask_restx import Namespace, fields
 from flask import request
-from app.services import facade
+from app.services import get_facade
+from app.api.v1.resource import BaseResource
+from app.api.v1.batch import MAX_BATCH_SIZE, batch_validator, run_batch
+from app.api.v1.conditional import (
+    client_has, collection_etag, entity_etag, not_modified
+)
+from app.api.v1.pagination import (
+    is_paginated, page_response, pagination_params, parse_page_args
+)
+from app.api.v1.streaming import (
+    stream_response, streaming_params, wants_stream
+)
+
+facade = get_facade()
 
 api = Namespace('amenities', description='Amenity operations')
 
@@ -11,7 +24,7 @@ amenity_model = api.model('Amenity', {
 
 
 @api.route('/')
-class AmenityList(Resource):
+class AmenityList(BaseResource):
     @api.expect(amenity_model, validate=True)
     @api.response(201, 'Amenity successfully created')
     @api.response(400, 'Invalid input data')
@@ -27,16 +40,41 @@ class AmenityList(Resource):
 
         return amenity.to_dict(), 201
 
+    @api.doc(params={**pagination_params, **streaming_params})
     @api.response(200, 'List of amenities retrieved successfully')
+    @api.response(400, 'Invalid pagination parameters')
+    @collection_etag('amenities')
     def get(self):
         """Retrieve a list of all amenities"""
-        # Placeholder for logic to return a list of all amenities
-        amenities = facade.get_all_amenities()
-        return [a.to_dict() for a in amenities], 200
+        if wants_stream():
+            return stream_response(facade.iter_amenities())
+        if not is_paginated():
+            amenities = facade.get_all_amenities()
+            return [a.to_dict() for a in amenities], 200
+        try:
+            limit, cursor = parse_page_args()
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return page_response(*facade.get_amenities_page(limit, cursor))
+
+
+amenity_batch_validator = batch_validator(amenity_model)
+
+
+@api.route('/batch')
+class AmenityBatch(BaseResource):
+    @api.expect([amenity_model])
+    @api.response(201, 'All amenities successfully created')
+    @api.response(207, 'Some amenities could not be created, see each result')
+    @api.response(400, 'Body is not a JSON array of at most '
+                       f'{MAX_BATCH_SIZE} items')
+    def post(self):
+        """Register many amenities at once"""
+        return run_batch(amenity_batch_validator, facade.create_amenities)
 
 
 @api.route('/<amenity_id>')
-class AmenityResource(Resource):
+class AmenityResource(BaseResource):
     @api.response(200, 'Amenity details retrieved successfully')
     @api.response(404, 'Amenity not found')
     def get(self, amenity_id):
@@ -45,7 +83,10 @@ class AmenityResource(Resource):
         amenity = facade.get_amenity(amenity_id)
         if not amenity:
             return {"error": "Amenity not found"}, 404
-        return amenity.to_dict(), 200
+        etag = entity_etag(amenity)
+        if client_has(etag):
+            return not_modified(etag)
+        return amenity.to_dict(), 200, {'ETag': f'"{etag}"'}
 
     @api.expect(amenity_model, validate=True)
     @api.response(200, 'Amenity updated successfully')
@@ -65,3 +106,11 @@ class AmenityResource(Resource):
             return {"error": "Amenity not found"}, 404
 
         return amenity.to_dict(), 200
+
+    @api.response(200, 'Amenity deleted successfully')
+    @api.response(404, 'Amenity not found')
+    def delete(self, amenity_id):
+        """Delete an amenity and remove it from every place"""
+        if not facade.delete_amenity(amenity_id):
+            return {"error": "Amenity not found"}, 404
+        return {"message": "Amenity deleted successfully"}, 200
@@ -0,0 +1,52 @@
+from flask import request
+from app.api.v1.validation import schema_validator
+
+MAX_BATCH_SIZE = 1000
+
+
+def batch_validator(model):
+    """Compile an API model once into a validator for batch items.
+
+    It returns an item's {field: message} errors, as the single create
+    endpoint reports them.
+    """
+    return schema_validator(model)
+
+
+def run_batch(validator, create_many):
+    """Validate every item of the array body, then create the valid ones.
+
+    create_many receives the valid items and returns one (obj, error) pair
+    per item. The response lists one result per input item, in order:
+    201 if everything was created, 207 when some items failed. An invalid
+    item's result carries the same message and errors as a single create
+    would answer.
+    """
+    payload = request.get_json(force=True, silent=True)
+    if not isinstance(payload, list) or not payload:
+        return {'error': 'Request body must be a non-empty JSON array'}, 400
+    if len(payload) > MAX_BATCH_SIZE:
+        return {'error': f'At most {MAX_BATCH_SIZE} items per batch'}, 400
+
+    results = [None] * len(payload)
+    valid, positions = [], []
+    for position, item in enumerate(payload):
+        errors = validator(item)
+        if errors:
+            results[position] = {
+                'status': 400,
+                'message': 'Input payload validation failed',
+                'errors': errors,
+            }
+        else:
+            valid.append(item)
+            positions.append(position)
+
+    for position, (obj, error) in zip(positions, create_many(valid)):
+        if error is None:
+            results[position] = {'status': 201, 'data': obj.to_dict()}
+        else:
+            results[position] = {'status': 400, 'error': error}
+
+    status = 201 if all(r['status'] == 201 for r in results) else 207
+    return results, status
@@ -0,0 +1,55 @@
+import hashlib
+from functools import wraps
+from flask import Response, request
+from app.services import get_facade
+
+facade = get_facade()
+
+
+def entity_etag(obj):
+    # The facade epoch changes on restart, when versions start over.
+    return f"{facade.epoch}-{obj.version}-{obj.id}"
+
+
+def client_has(tag):
+    return request.if_none_match.contains_weak(tag)
+
+
+def not_modified(tag):
+    response = Response(status=304)
+    response.set_etag(tag)
+    return response
+
+
+def with_etag(result, tag):
+    """Attach tag to a successful resource result."""
+    if isinstance(result, Response):
+        if result.status_code == 200:
+            result.set_etag(tag)
+        return result
+    body, status, *rest = result
+    if status != 200:
+        return result
+    headers = dict(rest[0]) if rest else {}
+    headers['ETag'] = f'"{tag}"'
+    return body, status, headers
+
+
+def collection_etag(collection):
+    """Serve conditional GETs for a resource listing a collection.
+
+    The tag covers the collection version and the full query string, and
+    is read before the body is built, so a concurrent write can only make
+    the body newer than its tag, never older.
+    """
+    def decorator(method):
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            version = facade.collection_version(collection)
+            key = f"{facade.epoch}:{collection}:{version}:{request.full_path}"
+            tag = hashlib.sha1(key.encode()).hexdigest()[:20]
+            if client_has(tag):
+                return not_modified(tag)
+            return with_etag(method(*args, **kwargs), tag)
+        return wrapper
+    return decorator
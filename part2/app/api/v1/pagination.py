@@ -0,0 +1,52 @@
+from flask import request
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+pagination_params = {
+    'limit': f'Page size (1-{MAX_LIMIT}, default {DEFAULT_LIMIT})',
+    'cursor': f'Opaque cursor taken from the {NEXT_CURSOR_HEADER} header',
+}
+
+
+def is_paginated():
+    """Collections stay unpaginated unless the client asks for a page."""
+    return 'limit' in request.args or 'cursor' in request.args
+
+
+def decode_seq_cursor(raw):
+    cursor = int(raw)
+    if cursor < 0:
+        raise ValueError("Invalid cursor")
+    return cursor
+
+
+def parse_page_args(decode_cursor=decode_seq_cursor, start=0):
+    """Read limit/cursor from the query string.
+
+    decode_cursor turns the raw cursor back into what the repository or
+    index expects, start is used when no cursor is given. Raises
+    ValueError with a client facing message on bad input.
+    """
+    try:
+        limit = int(request.args.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise ValueError("limit must be an integer")
+    if limit < 1 or limit > MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+
+    raw = request.args.get('cursor')
+    if raw is None:
+        return limit, start
+    try:
+        return limit, decode_cursor(raw)
+    except ValueError:
+        raise ValueError("Invalid cursor")
+
+
+def page_response(items, next_cursor, encode_cursor=str):
+    headers = {}
+    if next_cursor is not None:
+        headers[NEXT_CURSOR_HEADER] = encode_cursor(next_cursor)
+    return [item.to_dict() for item in items], 200, headers
@@ -1,6 +1,20 @@
+import math
 from flask import request
-from flask_restx import Namespace, Resource, fields
-from app.services import facade
+from flask_restx import Namespace, fields
+from app.services import get_facade
+from app.api.v1.resource import BaseResource
+from app.api.v1.batch import MAX_BATCH_SIZE, batch_validator, run_batch
+from app.api.v1.conditional import (
+    client_has, collection_etag, entity_etag, not_modified
+)
+from app.api.v1.pagination import (
+    is_paginated, page_response, pagination_params, parse_page_args
+)
+from app.api.v1.streaming import (
+    stream_response, streaming_params, wants_stream
+)
+
+facade = get_facade()
 
 api = Namespace('places', description='Place operations')
 
@@ -40,8 +54,59 @@ place_update_model = api.model('PlaceUpdate', {
 })
 
 
+filter_params = {
+    'amenities': 'Comma separated amenity IDs the places must all have',
+    'min_price': 'Only places priced at least this much',
+    'max_price': 'Only places priced at most this much',
+    'sort': "'price' to list places by ascending price",
+}
+
+
+def _parse_price_filter(args):
+    """Return (min_price, max_price), or None if no price query was made."""
+    if not any(name in args for name in ('min_price', 'max_price', 'sort')):
+        return None
+    if args.get('sort', 'price') != 'price':
+        raise ValueError("sort must be 'price'")
+    bounds = []
+    for name in ('min_price', 'max_price'):
+        if name not in args:
+            bounds.append(None)
+            continue
+        try:
+            bound = float(args[name])
+        except ValueError:
+            bound = math.nan
+        if not math.isfinite(bound):
+            raise ValueError(f"{name} must be a number")
+        bounds.append(bound)
+    if None not in bounds and bounds[0] > bounds[1]:
+        raise ValueError("min_price must not exceed max_price")
+    return tuple(bounds)
+
+
+def _parse_amenity_filter(args):
+    if 'amenities' not in args:
+        return None
+    amenity_ids = [a.strip() for a in args['amenities'].split(',')]
+    if not all(amenity_ids):
+        raise ValueError("amenities must be a comma separated list of IDs")
+    return amenity_ids
+
+
+def _decode_price_cursor(raw):
+    price, _, place_id = raw.partition(':')
+    if not place_id or not math.isfinite(float(price)):
+        raise ValueError("Invalid cursor")
+    return float(price), place_id
+
+
+def _encode_price_cursor(cursor):
+    return f"{cursor[0]!r}:{cursor[1]}"
+
+
 @api.route('/')
-class PlaceList(Resource):
+class PlaceList(BaseResource):
     @api.expect(place_model, validate=True)
     @api.response(201, 'Place successfully created')
     @api.response(400, 'Invalid input data')
@@ -54,15 +119,191 @@ class PlaceList(Resource):
         except ValueError as e:
             return {'error': str(e)}, 400
 
+    @api.doc(params={**pagination_params, **streaming_params,
+                     **filter_params})
     @api.response(200, 'List of places retrieved successfully')
+    @api.response(400, 'Invalid query parameters')
+    @collection_etag('places')
     def get(self):
         """Retrieve a list of all places"""
-        places = facade.get_all_places()
-        return [p.to_dict() for p in places], 200
+        try:
+            price_filter = _parse_price_filter(request.args)
+            amenity_ids = _parse_amenity_filter(request.args)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        if price_filter is not None:
+            return self._get_by_price(*price_filter, amenity_ids)
+        if amenity_ids is not None:
+            return self._get_with_amenities(amenity_ids)
+
+        if wants_stream():
+            return stream_response(facade.iter_places())
+        if not is_paginated():
+            places = facade.get_all_places()
+            return [p.to_dict() for p in places], 200
+        try:
+            limit, cursor = parse_page_args()
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return page_response(*facade.get_places_page(limit, cursor))
+
+    def _get_by_price(self, min_price, max_price, amenity_ids):
+        if wants_stream():
+            return stream_response(facade.iter_places_by_price(
+                min_price, max_price, amenity_ids
+            ))
+        if not is_paginated():
+            places, _ = facade.get_places_by_price(
+                min_price, max_price, amenity_ids=amenity_ids
+            )
+            return [p.to_dict() for p in places], 200
+        try:
+            limit, cursor = parse_page_args(_decode_price_cursor, None)
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        places, next_cursor = facade.get_places_by_price(
+            min_price, max_price, limit, cursor, amenity_ids
+        )
+        return page_response(places, next_cursor, _encode_price_cursor)
+
+    def _get_with_amenities(self, amenity_ids):
+        if wants_stream():
+            return stream_response(
+                facade.iter_places_with_amenities(amenity_ids)
+            )
+        if not is_paginated():
+            places, _ = facade.get_places_with_amenities(amenity_ids)
+            return [p.to_dict() for p in places], 200
+        try:
+            limit, cursor = parse_page_args()
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return page_response(*facade.get_places_with_amenities(
+            amenity_ids, limit, cursor
+        ))
+
+
+place_batch_validator = batch_validator(place_model)
+
+
+@api.route('/batch')
+class PlaceBatch(BaseResource):
+    @api.expect([place_model])
+    @api.response(201, 'All places successfully created')
+    @api.response(207, 'Some places could not be created, see each result')
+    @api.response(400, 'Body is not a JSON array of at most '
+                       f'{MAX_BATCH_SIZE} items')
+    def post(self):
+        """Register many places at once"""
+        return run_batch(place_batch_validator, facade.create_places)
+
+
+DEFAULT_TOP = 10
+MAX_TOP = 100
+
+
+@api.route('/top')
+class PlaceTopRated(BaseResource):
+    @api.doc(params={'k': f'Number of places (1-{MAX_TOP}, '
+                          f'default {DEFAULT_TOP})'})
+    @api.response(200, 'Top rated places retrieved successfully')
+    @api.response(400, 'Invalid k')
+    @collection_etag('places')
+    def get(self):
+        """Retrieve the best rated places, best first"""
+        try:
+            k = int(request.args.get('k', DEFAULT_TOP))
+        except ValueError:
+            return {'error': 'k must be an integer'}, 400
+        if k < 1 or k > MAX_TOP:
+            return {'error': f'k must be between 1 and {MAX_TOP}'}, 400
+        return [p.to_dict() for p in facade.get_top_rated_places(k)], 200
+
+
+MAX_NEAREST = 1000
+
+search_params = {
+    'bbox': 'min_lat,min_lon,max_lat,max_lon (min_lon > max_lon crosses '
+            'the antimeridian)',
+    'near': 'lat,lon of the search center',
+    'radius_km': 'Radius around near, in kilometers',
+    'k': f'Number of nearest places to near (1-{MAX_NEAREST})',
+}
+
+
+def _parse_floats(name, raw, count):
+    try:
+        values = [float(v) for v in raw.split(',')]
+    except ValueError:
+        values = []
+    # float() also takes "inf" and "nan", which no coordinate or radius is.
+    if len(values) != count or not all(map(math.isfinite, values)):
+        raise ValueError(f"{name} must be {count} comma separated numbers")
+    return values
+
+
+def _check_point(lat, lon):
+    if lat < -90.0 or lat > 90.0:
+        raise ValueError("latitude must be between -90.0 and 90.0")
+    if lon < -180.0 or lon > 180.0:
+        raise ValueError("longitude must be between -180.0 and 180.0")
+
+
+def _search(args):
+    if 'bbox' in args:
+        min_lat, min_lon, max_lat, max_lon = _parse_floats(
+            'bbox', args['bbox'], 4
+        )
+        _check_point(min_lat, min_lon)
+        _check_point(max_lat, max_lon)
+        if min_lat > max_lat:
+            raise ValueError("bbox min_lat must not exceed max_lat")
+        places = facade.search_places_in_bbox(
+            min_lat, min_lon, max_lat, max_lon
+        )
+        return [p.to_dict() for p in places]
+
+    if 'near' not in args:
+        raise ValueError("bbox or near is required")
+    lat, lon = _parse_floats('near', args['near'], 2)
+    _check_point(lat, lon)
+
+    radius_km = k = None
+    if 'radius_km' in args:
+        radius_km = _parse_floats('radius_km', args['radius_km'], 1)[0]
+        if radius_km <= 0:
+            raise ValueError("radius_km must be a positive value")
+    if 'k' in args:
+        try:
+            k = int(args['k'])
+        except ValueError:
+            raise ValueError("k must be an integer")
+        if k < 1 or k > MAX_NEAREST:
+            raise ValueError(f"k must be between 1 and {MAX_NEAREST}")
+    if radius_km is None and k is None:
+        raise ValueError("near requires radius_km or k")
+
+    found = facade.search_places_near(lat, lon, radius_km=radius_km, k=k)
+    return [dict(place.to_dict(), distance_km=round(distance, 3))
+            for place, distance in found]
+
+
+@api.route('/search')
+class PlaceSearch(BaseResource):
+    @api.doc(params=search_params)
+    @api.response(200, 'Matching places retrieved successfully')
+    @api.response(400, 'Invalid search parameters')
+    @collection_etag('places')
+    def get(self):
+        """Find places inside a bounding box or around a point"""
+        try:
+            return _search(request.args), 200
+        except ValueError as e:
+            return {'error': str(e)}, 400
 
 
 @api.route('/<string:place_id>')
-class PlaceResource(Resource):
+class PlaceResource(BaseResource):
     @api.response(200, 'Place details retrieved successfully')
     @api.response(404, 'Place not found')
     def get(self, place_id):
@@ -70,7 +311,10 @@ class PlaceResource(Resource):
         place = facade.get_place(place_id)
         if not place:
             return {'error': 'Place not found'}, 404
-        return place.to_dict(), 200
+        etag = entity_etag(place)
+        if client_has(etag):
+            return not_modified(etag)
+        return place.to_dict(), 200, {'ETag': f'"{etag}"'}
 
     @api.expect(place_update_model, validate=True)
     @api.response(200, 'Place updated successfully')
@@ -88,3 +332,25 @@ class PlaceResource(Resource):
             return {'error': 'Place not found'}, 404
 
         return updated.to_dict(), 200
+
+
+@api.route('/<string:place_id>/reviews')
+class PlaceReviewList(BaseResource):
+    @api.doc(params=pagination_params)
+    @api.response(200, 'List of reviews for the place retrieved successfully')
+    @api.response(400, 'Invalid pagination parameters')
+    @api.response(404, 'Place not found')
+    @collection_etag('reviews')
+    def get(self, place_id):
+        """Retrieve the reviews of a place, one page at a time"""
+        if not facade.get_place(place_id):
+            return {'error': 'Place not found'}, 404
+        try:
+            limit, cursor = parse_page_args()
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+        reviews, next_cursor = facade.get_reviews_page_by_place(
+            place_id, limit, cursor
+        )
+        return page_response(reviews, next_cursor)
@@ -1,6 +1,19 @@
 from flask import request
-from flask_restx import Namespace, Resource, fields
-from app.services import facade
+from flask_restx import Namespace, fields
+from app.services import get_facade
+from app.api.v1.resource import BaseResource
+from app.api.v1.batch import MAX_BATCH_SIZE, batch_validator, run_batch
+from app.api.v1.conditional import (
+    client_has, collection_etag, entity_etag, not_modified
+)
+from app.api.v1.pagination import (
+    is_paginated, page_response, pagination_params, parse_page_args
+)
+from app.api.v1.streaming import (
+    stream_response, streaming_params, wants_stream
+)
+
+facade = get_facade()
 
 api = Namespace('reviews', description='Review operations')
 
@@ -20,7 +33,7 @@ review_update_model = api.model('ReviewUpdate', {
 
 
 @api.route('/')
-class ReviewList(Resource):
+class ReviewList(BaseResource):
     @api.expect(review_model, validate=True)
     @api.response(201, 'Review successfully created')
     @api.response(400, 'Invalid input data')
@@ -32,21 +45,50 @@ class ReviewList(Resource):
         except ValueError as e:
             return {'error': str(e)}, 400
 
+    @api.doc(params={**pagination_params, **streaming_params})
     @api.response(200, 'List of reviews retrieved successfully')
+    @api.response(400, 'Invalid pagination parameters')
+    @collection_etag('reviews')
     def get(self):
-        reviews = facade.get_all_reviews()
-        return [r.to_dict() for r in reviews], 200
+        if wants_stream():
+            return stream_response(facade.iter_reviews())
+        if not is_paginated():
+            reviews = facade.get_all_reviews()
+            return [r.to_dict() for r in reviews], 200
+        try:
+            limit, cursor = parse_page_args()
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return page_response(*facade.get_reviews_page(limit, cursor))
+
+
+review_batch_validator = batch_validator(review_model)
+
+
+@api.route('/batch')
+class ReviewBatch(BaseResource):
+    @api.expect([review_model])
+    @api.response(201, 'All reviews successfully created')
+    @api.response(207, 'Some reviews could not be created, see each result')
+    @api.response(400, 'Body is not a JSON array of at most '
+                       f'{MAX_BATCH_SIZE} items')
+    def post(self):
+        """Register many reviews at once"""
+        return run_batch(review_batch_validator, facade.create_reviews)
 
 
 @api.route('/<string:review_id>')
-class ReviewResource(Resource):
+class ReviewResource(BaseResource):
     @api.response(200, 'Review details retrieved successfully')
     @api.response(404, 'Review not found')
     def get(self, review_id):
         review = facade.get_review(review_id)
         if not review:
             return {'error': 'Review not found'}, 404
-        return review.to_dict(), 200
+        etag = entity_etag(review)
+        if client_has(etag):
+            return not_modified(etag)
+        return review.to_dict(), 200, {'ETag': f'"{etag}"'}
 
     @api.expect(review_update_model, validate=True)
     @api.response(200, 'Review updated successfully')
@@ -0,0 +1,35 @@
+import json
+from flask import Response, request
+
+CHUNK_SIZE = 500
+
+streaming_params = {
+    'stream': 'Set to true to stream the whole collection as a JSON array',
+}
+
+
+def wants_stream():
+    return request.args.get('stream', '').lower() in ('1', 'true', 'yes')
+
+
+def stream_response(objects, chunk_size=CHUNK_SIZE):
+    """Serialize objects as a JSON array sent in chunks.
+
+    Only one chunk of serialized objects is held at a time, so memory stays
+    flat whatever the collection size and the first bytes leave right away.
+    """
+    def generate():
+        yield '['
+        separator = ''
+        chunk = []
+        for obj in objects:
+            chunk.append(json.dumps(obj.to_dict()))
+            if len(chunk) >= chunk_size:
+                yield separator + ','.join(chunk)
+                separator = ','
+                chunk = []
+        if chunk:
+            yield separator + ','.join(chunk)
+        yield ']'
+
+    return Response(generate(), mimetype='application/json')
@@ -1,7 +1,20 @@
 # app/api/v1/users.py
 from flask import request
-from flask_restx import Namespace, Resource, fields
-from app.services import facade
+from flask_restx import Namespace, fields
+from app.services import get_facade
+from app.api.v1.resource import BaseResource
+from app.api.v1.batch import MAX_BATCH_SIZE, batch_validator, run_batch
+from app.api.v1.conditional import (
+    client_has, collection_etag, entity_etag, not_modified
+)
+from app.api.v1.pagination import (
+    is_paginated, page_response, pagination_params, parse_page_args
+)
+from app.api.v1.streaming import (
+    stream_response, streaming_params, wants_stream
+)
+
+facade = get_facade()
 
 api = Namespace('users', description='User operations')
 
@@ -20,7 +33,7 @@ user_model = api.model('User', {
 
 
 @api.route('/')
-class UserList(Resource):
+class UserList(BaseResource):
     @api.expect(user_model, validate=True)
     @api.response(201, 'User successfully created')
     @api.response(400, 'Email already registered')
@@ -29,11 +42,6 @@ class UserList(Resource):
         """Register a new user"""
         user_data = api.payload
 
-        # Simulate email uniqueness check
-        existing_user = facade.get_user_by_email(user_data['email'])
-        if existing_user:
-            return {'error': 'Email already registered'}, 400
-
         try:
             new_user = facade.create_user(user_data)
         except ValueError as e:
@@ -46,18 +54,48 @@ class UserList(Resource):
             'email': new_user.email
         }, 201
 
+    @api.doc(params={**pagination_params, **streaming_params})
+    @api.response(200, 'List of users retrieved successfully')
+    @api.response(400, 'Invalid pagination parameters')
+    @collection_etag('users')
     def get(self):
-        users = facade.get_all_users()
-        return [u.to_dict() for u in users], 200
+        if wants_stream():
+            return stream_response(facade.iter_users())
+        if not is_paginated():
+            users = facade.get_all_users()
+            return [u.to_dict() for u in users], 200
+        try:
+            limit, cursor = parse_page_args()
+        except ValueError as e:
+            return {'error': str(e)}, 400
+        return page_response(*facade.get_users_page(limit, cursor))
+
+
+user_batch_validator = batch_validator(user_model)
+
+
+@api.route('/batch')
+class UserBatch(BaseResource):
+    @api.expect([user_model])
+    @api.response(201, 'All users successfully created')
+    @api.response(207, 'Some users could not be created, see each result')
+    @api.response(400, 'Body is not a JSON array of at most '
+                       f'{MAX_BATCH_SIZE} items')
+    def post(self):
+        """Register many users at once"""
+        return run_batch(user_batch_validator, facade.create_users)
 
 
 @api.route("/<string:user_id>")
-class UsersItem(Resource):
+class UsersItem(BaseResource):
     def get(self, user_id):
         user = facade.get_user(user_id)
         if not user:
             return {"error": "User not found"}, 404
-        return user.to_dict(), 200
+        etag = entity_etag(user)
+        if client_has(etag):
+            return not_modified(etag)
+        return user.to_dict(), 200, {'ETag': f'"{etag}"'}
 
     def put(self, user_id):
         data = request.get_json(force=True) or {}
@@ -0,0 +1,104 @@
+from jsonschema.validators import validator_for
+
+# Flask-RESTX validates request payloads against the latest JSON Schema
+# draft, where 5.0 is an integer too.
+_TYPE_CHECKS = {
+    'string': lambda v: isinstance(v, str),
+    'number': lambda v: isinstance(v, (int, float))
+    and not isinstance(v, bool),
+    'integer': lambda v: not isinstance(v, bool) and (
+        isinstance(v, int) or isinstance(v, float) and v.is_integer()
+    ),
+    'boolean': lambda v: isinstance(v, bool),
+    'array': lambda v: isinstance(v, list),
+    'object': lambda v: isinstance(v, dict),
+}
+
+# Schema keywords the compiled checks know how to enforce.
+_SUPPORTED = {'type', 'items', 'description', 'example', 'title'}
+
+
+def _type_error(value, type_name):
+    return f"{value!r} is not of type '{type_name}'"
+
+
+def _compile_property(name, schema):
+    """Function listing the (key, message) errors of a property's value.
+
+    Keys are the dotted path of the wrong value, as Flask-RESTX writes
+    them: "amenities.2" for the third item of amenities.
+    """
+    type_name = schema.get('type')
+    check = _TYPE_CHECKS.get(type_name)
+    items = schema.get('items')
+    item_check = item_type = None
+    if items is not None:
+        item_type = items.get('type')
+        item_check = _TYPE_CHECKS.get(item_type)
+    if (check is None or set(schema) - _SUPPORTED
+            or (items is not None and (item_check is None
+                                       or set(items) - _SUPPORTED))):
+        return None
+
+    def errors(value):
+        if not check(value):
+            return [(name, _type_error(value, type_name))]
+        if item_check is None:
+            return []
+        return [(f"{name}.{i}", _type_error(item, item_type))
+                for i, item in enumerate(value) if not item_check(item)]
+    return errors
+
+
+def _compile(schema):
+    """Function listing every error of a payload, in jsonschema's order.
+
+    Returns None for a schema the compiled checks do not cover.
+    """
+    required = tuple(schema.get('required', ()))
+    checks = []
+    for name, prop in schema.get('properties', {}).items():
+        errors = _compile_property(name, prop)
+        if errors is None:
+            return None
+        checks.append((name, errors))
+
+    def errors(payload):
+        if not isinstance(payload, dict):
+            return [('', _type_error(payload, 'object'))]
+        found = [(name, f"'{name}' is a required property")
+                 for name in required if name not in payload]
+        for name, check in checks:
+            if name in payload:
+                found.extend(check(payload[name]))
+        return found
+    return errors
+
+
+def compile_payload_validator(model):
+    """Turn an API model into a function returning a payload's errors.
+
+    The errors are a {key: message} dict, empty for a valid payload,
+    identical to the one Flask-RESTX answers a failed validation with.
+    Returns None for a model the compiled checks do not cover.
+    """
+    errors = _compile(model.__schema__)
+    if errors is None:
+        return None
+    return lambda payload: dict(errors(payload))
+
+
+def schema_validator(model):
+    """Like compile_payload_validator(), for any model.
+
+    Models the compiled checks do not cover get a jsonschema validator,
+    built once, reporting errors the way Flask-RESTX does.
+    """
+    validate = compile_payload_validator(model)
+    if validate is not None:
+        return validate
+    schema = model.__schema__
+    validator = validator_for(schema)(schema)
+    return lambda payload: dict(
+        model.format_error(e) for e in validator.iter_errors(payload)
+    )
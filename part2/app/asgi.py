@@ -0,0 +1,178 @@
+"""ASGI variant of the app, for servers such as uvicorn (see asgi.py).
+
+Connections belong to the event loop, so an idle or slow client costs no
+thread: the request body is read asynchronously, the v1 API (the same
+Flask-RESTX resources and validation as create_app()) handles the
+complete request in WSGIExecutor's bounded thread pool, and the response
+is sent back asynchronously.
+"""
+import asyncio
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from app import create_app
+
+# Response chunks pulled from a streamed response per executor call.
+CHUNK_SIZE = 64 * 1024
+
+
+class WSGIExecutor:
+    """Awaitable calls into the synchronous WSGI app.
+
+    Calls run in a bounded pool of max_workers threads, whatever the
+    backend, and excess requests queue for them: the event loop itself
+    never runs a request.
+    """
+
+    def __init__(self, max_workers=8):
+        self.executor = ThreadPoolExecutor(max_workers,
+                                           thread_name_prefix="wsgi")
+
+    async def run(self, fn, *args):
+        """Call fn(*args) in the executor."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, fn, *args)
+
+    def close(self):
+        self.executor.shutdown()
+
+
+def create_asgi_app(max_workers=8):
+    """ASGI app serving the routes of create_app().
+
+    max_workers bounds the threads running requests.
+    """
+    wsgi_app = create_app()
+    executor = WSGIExecutor(max_workers)
+
+    async def app(scope, receive, send):
+        if scope["type"] == "lifespan":
+            await _lifespan(receive, send, executor)
+            return
+        if scope["type"] != "http":
+            raise ValueError("Unsupported scope: {}".format(scope["type"]))
+        body = await _read_body(receive)
+        status, headers, response = await executor.run(
+            _call, wsgi_app, _environ(scope, body)
+        )
+        await send({"type": "http.response.start", "status": status,
+                    "headers": headers})
+        try:
+            while True:
+                chunk = await executor.run(_read_chunk, response)
+                if not chunk:
+                    break
+                await send({"type": "http.response.body", "body": chunk,
+                            "more_body": True})
+        finally:
+            await executor.run(response.close)
+        await send({"type": "http.response.body", "body": b""})
+
+    app.executor = executor
+    return app
+
+
+async def _lifespan(receive, send, executor):
+    while True:
+        message = await receive()
+        if message["type"] == "lifespan.startup":
+            await send({"type": "lifespan.startup.complete"})
+        elif message["type"] == "lifespan.shutdown":
+            executor.close()
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body"):
+            break
+    return b"".join(chunks)
+
+
+def _environ(scope, body):
+    """WSGI environ (PEP 3333) of an ASGI http scope."""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode().decode("latin1"),
+        "PATH_INFO": scope["path"].encode().decode("latin1"),
+        "QUERY_STRING": scope["query_string"].decode("latin1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": "HTTP/" + scope.get("http_version", "1.1"),
+        "REMOTE_ADDR": client[0],
+        "REMOTE_PORT": str(client[1]),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+    }
+    for name, value in scope["headers"]:
+        name = name.decode("latin1")
+        if name == "content-type":
+            key = "CONTENT_TYPE"
+        elif name == "content-length":
+            key = "CONTENT_LENGTH"
+        else:
+            key = "HTTP_" + name.upper().replace("-", "_")
+        value = value.decode("latin1")
+        if key in environ:
+            value = environ[key] + "," + value
+        environ[key] = value
+    # The body is complete, whether or not the client sent it chunked.
+    environ["CONTENT_LENGTH"] = str(len(body))
+    return environ
+
+
+def _call(wsgi_app, environ):
+    """Run wsgi_app, return (status, ASGI headers, response iterator)."""
+    started = {}
+
+    def start_response(status, headers, exc_info=None):
+        started["status"] = int(status.split(" ", 1)[0])
+        started["headers"] = [(k.lower().encode("latin1"),
+                               v.encode("latin1")) for k, v in headers]
+
+    response = wsgi_app(environ, start_response)
+    chunks = iter(response)
+    # start_response may only be called once the first chunk is asked for.
+    first = next(chunks, b"")
+    return started["status"], started["headers"], \
+        _Response(first, chunks, response)
+
+
+class _Response:
+    """WSGI response iterable whose first chunk was already read."""
+
+    def __init__(self, first, chunks, response):
+        self.pending = [first] if first else []
+        self.chunks = chunks
+        self.response = response
+
+    def close(self):
+        if hasattr(self.response, "close"):
+            self.response.close()
+
+
+def _read_chunk(response):
+    """Up to CHUNK_SIZE bytes of the response, b"" once it is exhausted."""
+    parts = response.pending
+    size = sum(map(len, parts))
+    while size < CHUNK_SIZE:
+        part = next(response.chunks, None)
+        if part is None:
+            break
+        parts.append(part)
+        size += len(part)
+    response.pending = []
+    return b"".join(parts)
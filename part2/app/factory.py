@@ -0,0 +1,275 @@
+"""The Flask application: the v1 API and its optional instrumentation.
+
+Loaded by app.create_app() on first use.
+"""
+import gzip
+import hashlib
+import hmac
+import json
+import threading
+import time
+from functools import wraps
+from flask import Flask, Response, request
+from flask_restx import Api
+from flask_restx.representations import output_json
+from werkzeug.exceptions import HTTPException
+from app.api.v1.users import api as users_ns
+from app.api.v1.amenities import api as amenities_ns
+from app.api.v1.places import api as places_ns
+from app.api.v1.reviews import api as reviews_ns
+from app.profiling import Sampler, SlowRequests, folded, profile_process
+from app.services import get_facade, settings
+from app.tracing import current_span, span
+
+facade = get_facade()
+
+
+NAMESPACES = ((users_ns, '/api/v1/users'),
+              (amenities_ns, '/api/v1/amenities'),
+              (places_ns, '/api/v1/places'),
+              (reviews_ns, '/api/v1/reviews'))
+# Served by the documentation app, see _add_docs().
+DOC_PATHS = ('/api/v1/', '/swagger.json')
+
+
+def create_app():
+    # The API serves no static files; the Swagger UI's are served by the
+    # documentation app.
+    app = Flask(__name__, static_folder=None)
+    _add_docs(app)
+    if facade.metrics is not None:
+        _add_metrics(app, facade.metrics)
+    _add_profiling(app, settings)
+
+    @app.before_request
+    def reject_writes():
+        # Set by serve() on forked workers: each one writing to its own
+        # copy of the data would let them drift apart.
+        if app.config.get('READ_ONLY') and \
+                request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            return {'error': 'This server is read-only'}, 503
+
+    api = _api(app, doc=False, add_specs=False)
+
+    if facade.tracer is not None:
+        _add_tracing(app, api, facade.tracer, settings.TRACE_HEADER)
+
+    # Register namespaces
+    for namespace, path in NAMESPACES:
+        api.add_namespace(namespace, path=path)
+
+    return app
+
+
+def _api(app, doc, add_specs=True):
+    api = Api(
+        version='1.0',
+        title='HBnB API',
+        description='HBnB Application API',
+        doc=doc
+    )
+    # init_app() ignores the add_specs given to the constructor.
+    api.init_app(app, add_specs=add_specs)
+    return api
+
+
+def _add_docs(app):
+    """Serve the Swagger UI and swagger.json from an app built on first use.
+
+    Registering their routes, templates and static files takes a good
+    share of create_app(), which tests and workers call far more often
+    than anyone reads the documentation. Documentation requests are not
+    counted in the request metrics.
+    """
+    wsgi_app = app.wsgi_app
+    lock = threading.Lock()
+    docs = []
+
+    def docs_wsgi_app(environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if path not in DOC_PATHS and not path.startswith('/swaggerui/'):
+            return wsgi_app(environ, start_response)
+        if not docs:
+            with lock:
+                if not docs:
+                    docs_app = Flask(__name__, static_folder=None)
+                    api = _api(docs_app, doc='/api/v1/')
+                    for namespace, ns_path in NAMESPACES:
+                        api.add_namespace(namespace, path=ns_path)
+                    docs_app.view_functions['specs'] = _specs_view(docs_app,
+                                                                   api)
+                    docs.append(docs_app)
+        return docs[0].wsgi_app(environ, start_response)
+    app.wsgi_app = docs_wsgi_app
+
+
+def _specs_view(app, api):
+    """swagger.json encoded once, served gzip-compressed with an ETag.
+
+    The spec only changes with the code, so requests get the stored bytes
+    (or a 304 if their If-None-Match matches) instead of Flask-RESTX
+    encoding the schema again.
+    """
+    with app.test_request_context():
+        schema = api.__schema__
+    status = 500 if 'error' in schema else 200
+    # Sorted, so that every worker builds the same bytes and ETag.
+    body = json.dumps(schema, sort_keys=True,
+                      separators=(',', ':')).encode()
+    etag = hashlib.sha256(body).hexdigest()[:32]
+    # mtime=0 keeps the compressed bytes the same from one build to the
+    # next, like their ETag.
+    compressed = gzip.compress(body, mtime=0)
+
+    def specs():
+        if request.accept_encodings['gzip'] > 0:
+            response = Response(compressed, status,
+                                mimetype='application/json')
+            response.headers['Content-Encoding'] = 'gzip'
+            response.set_etag(etag + '-gzip')
+        else:
+            response = Response(body, status, mimetype='application/json')
+            response.set_etag(etag)
+        response.vary.add('Accept-Encoding')
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+    return specs
+
+
+def _add_metrics(app, metrics):
+    """Time every request and serve metrics at /metrics.
+
+    The clock starts before Flask sees the request, so requests rejected
+    by a hook are timed too; a streamed response is timed up to its first
+    chunk.
+    """
+    wsgi_app = app.wsgi_app
+
+    def timed_wsgi_app(environ, start_response):
+        environ['hbnb.start'] = time.perf_counter()
+        return wsgi_app(environ, start_response)
+    app.wsgi_app = timed_wsgi_app
+
+    @app.after_request
+    def record_request(response):
+        req = request._get_current_object()
+        rule = req.url_rule
+        metrics.requests.observe(
+            (req.method, rule.rule if rule else 'unmatched',
+             str(response.status_code)),
+            time.perf_counter() - req.environ['hbnb.start']
+        )
+        return response
+
+    @app.route('/metrics')
+    def export_metrics():
+        return Response(metrics.render(),
+                        mimetype='text/plain; version=0.0.4')
+
+
+def _add_tracing(app, api, tracer, trace_header=False):
+    """Open a root span for sampled requests, and one for JSON encoding.
+
+    A request is sampled at the tracer's rate, or always when trace_header
+    is set and it carries an X-HBnB-Trace: 1 header.
+    """
+    wsgi_app = app.wsgi_app
+
+    def traced_wsgi_app(environ, start_response):
+        force = trace_header and environ.get('HTTP_X_HBNB_TRACE') == '1'
+        with tracer.trace('request', force):
+            return wsgi_app(environ, start_response)
+    app.wsgi_app = traced_wsgi_app
+
+    @app.after_request
+    def name_trace(response):
+        root = current_span()
+        if root is not None:
+            rule = request.url_rule
+            root.name = '{} {}'.format(request.method,
+                                       rule.rule if rule else 'unmatched')
+            root.set(path=request.path, status=response.status_code)
+        return response
+
+    @api.representation('application/json')
+    def traced_output_json(data, code, headers=None):
+        with span('encode_json'):
+            return output_json(data, code, headers)
+
+
+def _add_profiling(app, settings):
+    """Profile slow requests, and serve the /admin/ profiling endpoints."""
+    interval = settings.PROFILE_INTERVAL_MS / 1e3
+    slow = None
+    if settings.SLOW_REQUEST_MS > 0:
+        slow = SlowRequests(settings.SLOW_REQUEST_MS / 1e3,
+                            Sampler(interval), settings.PROFILE_DIR)
+        wsgi_app = app.wsgi_app
+
+        def profiled_wsgi_app(environ, start_response):
+            ident = threading.get_ident()
+            stacks = slow.sampler.watch(ident)
+            start = time.perf_counter()
+            try:
+                return wsgi_app(environ, start_response)
+            finally:
+                slow.sampler.unwatch(ident)
+                duration = time.perf_counter() - start
+                if duration >= slow.threshold:
+                    slow.record(environ['REQUEST_METHOD'],
+                                environ.get('PATH_INFO', ''),
+                                _route(app, environ), duration, stacks)
+        app.wsgi_app = profiled_wsgi_app
+    app.slow_requests = slow
+
+    token = settings.ADMIN_TOKEN
+    if not token:
+        return
+
+    def admin(view):
+        @wraps(view)
+        def checked(*args, **kwargs):
+            given = request.headers.get('Authorization', '')
+            if not hmac.compare_digest(given, 'Bearer ' + token):
+                return {'error': 'Forbidden'}, 403
+            return view(*args, **kwargs)
+        return checked
+
+    @app.route('/admin/profile')
+    @admin
+    def profile():
+        try:
+            seconds = float(request.args.get('seconds', '10'))
+        except ValueError:
+            return {'error': 'seconds must be a number'}, 400
+        if not 0 < seconds <= 60:
+            return {'error': 'seconds must be between 0 and 60'}, 400
+        stacks = profile_process(seconds, interval,
+                                 idle=request.args.get('idle') == '1')
+        return Response(folded(stacks), mimetype='text/plain')
+
+    @app.route('/admin/slow-requests')
+    @admin
+    def slow_requests():
+        if slow is None:
+            return {'error': 'Slow request profiling is disabled'}, 404
+        return [{k: v for k, v in p.items() if k != 'stacks'}
+                for p in slow.recent()]
+
+    @app.route('/admin/slow-requests/<profile_id>')
+    @admin
+    def slow_request(profile_id):
+        found = slow.get(profile_id) if slow is not None else None
+        if found is None:
+            return {'error': 'Profile not found'}, 404
+        return Response(found['stacks'], mimetype='text/plain')
+
+
+def _route(app, environ):
+    try:
+        rule, _ = app.url_map.bind_to_environ(environ).match(
+            return_rule=True
+        )
+        return rule.rule
+    except HTTPException:
+        return 'unmatched'
@@ -0,0 +1,195 @@
+"""In-process metrics rendered in the Prometheus text format.
+
+create_app() times every request into a histogram per method, route and
+status, and serves the registry at /metrics; HBnBFacade counts and times
+its own methods and the operations of its repositories. Each metric takes
+one lock per update, so instrumentation stays cheap enough to leave on.
+Values are per process: forked workers each count their own requests.
+"""
+import threading
+import time
+from bisect import bisect_left
+from functools import wraps
+
+# Request latency buckets, in seconds.
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25,
+           0.5, 1.0, 2.5)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"') \
+        .replace("\n", "\\n")
+
+
+def _labels(names, values, extra=""):
+    pairs = ['{}="{}"'.format(n, _escape(v)) for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _header(self):
+        return ["# HELP {} {}".format(self.name, self.help),
+                "# TYPE {} {}".format(self.name, self.kind)]
+
+    def samples(self):
+        """{label values: value} copied under the lock."""
+        with self._lock:
+            return {key: list(value) if isinstance(value, list) else value
+                    for key, value in self._values.items()}
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, key=(), amount=1):
+        """Add amount to the series of label values key."""
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = self._header()
+        for key, value in sorted(self.samples().items()):
+            lines.append("{}{} {}".format(
+                self.name, _labels(self.labels, key), value
+            ))
+        return lines
+
+
+class Summary(_Metric):
+    """Count and sum of observations, without quantiles."""
+    kind = "summary"
+
+    def observe(self, key, value):
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                self._values[key] = [1, value]
+            else:
+                series[0] += 1
+                series[1] += value
+
+    def render(self):
+        lines = self._header()
+        for key, (count, total) in sorted(self.samples().items()):
+            labels = _labels(self.labels, key)
+            lines.append("{}_count{} {}".format(self.name, labels, count))
+            lines.append("{}_sum{} {!r}".format(self.name, labels, total))
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, key, value):
+        # One count per bucket, then the +Inf count and the sum.
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * (len(self.buckets) + 2)
+            series[i] += 1
+            series[-1] += value
+
+    def render(self):
+        lines = self._header()
+        bounds = [repr(b) for b in self.buckets] + ["+Inf"]
+        for key, series in sorted(self.samples().items()):
+            cumulative = 0
+            for bound, count in zip(bounds, series):
+                cumulative += count
+                lines.append("{}_bucket{} {}".format(
+                    self.name,
+                    _labels(self.labels, key, 'le="{}"'.format(bound)),
+                    cumulative
+                ))
+            labels = _labels(self.labels, key)
+            lines.append("{}_sum{} {!r}".format(self.name, labels,
+                                                series[-1]))
+            lines.append("{}_count{} {}".format(self.name, labels,
+                                                cumulative))
+        return lines
+
+
+class Registry:
+    """The metrics of the process, and the series HBnB records."""
+
+    def __init__(self):
+        self._metrics = []
+        self.requests = self.histogram(
+            "hbnb_http_request_duration_seconds",
+            "Time spent handling HTTP requests.",
+            ("method", "route", "status"))
+        self.facade_calls = self.summary(
+            "hbnb_facade_call_duration_seconds",
+            "Time spent in HBnBFacade methods.", ("method",))
+        self.facade_errors = self.counter(
+            "hbnb_facade_errors_total",
+            "HBnBFacade calls that raised an exception.",
+            ("method", "exception"))
+        self.repository_calls = self.summary(
+            "hbnb_repository_operation_duration_seconds",
+            "Time spent in repository operations.",
+            ("collection", "operation"))
+
+    def _register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labels=()):
+        return self._register(Counter(name, help, labels))
+
+    def summary(self, name, help, labels=()):
+        return self._register(Summary(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=BUCKETS):
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def render(self):
+        """Every metric in the Prometheus text exposition format."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def wrap_facade(self, fn, method):
+        """Time fn as the facade method named method."""
+        return _timed(fn, self.facade_calls, (method,), self.facade_errors)
+
+    def wrap_repository(self, fn, collection, operation):
+        """Time fn as a repository operation on collection."""
+        return _timed(fn, self.repository_calls, (collection, operation))
+
+
+def _timed(fn, summary, key, errors=None):
+    clock = time.perf_counter
+
+    @wraps(fn)
+    def timed(*args, **kwargs):
+        start = clock()
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            if errors is not None:
+                errors.inc(key + (type(e).__name__,))
+            raise
+        finally:
+            summary.observe(key, clock() - start)
+    return timed
+
+
+registry = Registry()
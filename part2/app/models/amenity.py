@@ -2,6 +2,8 @@ from .base import BaseModel
 
 
 class Amenity(BaseModel):
+    __slots__ = ("_name",)
+
     def __init__(self, name):
         super().__init__()
         self.name = name
@@ -21,10 +23,16 @@ class Amenity(BaseModel):
             raise ValueError("name must be at most 50 characters")
         self._name = v
 
-    def to_dict(self):
+    def _serialize(self):
         return {
             "id": self.id,
             "name": self.name,
             "created_at": self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat(),
         }
+
+    def _record_fields(self):
+        return {"name": self._name}
+
+    def _load_record(self, record, resolve):
+        self._name = record["name"]
@@ -1,18 +1,104 @@
 import uuid
 from datetime import datetime
+from app.tracing import span
 
 
 class BaseModel:
+    # Models are held by the million, so they use __slots__ instead of a
+    # per-instance __dict__; subclasses list their own backing fields.
+    # __weakref__ lets storage backends keep an identity map of them.
+    __slots__ = ("id", "created_at", "updated_at", "_version", "_cached",
+                 "__weakref__")
+
     def __init__(self):
         self.id = str(uuid.uuid4())
         self.created_at = datetime.now()
-        self.updated_at = datetime.now()
+        self.updated_at = self.created_at
+        self._version = 0
+        self._cached = None
+
+    @property
+    def version(self):
+        """Counter bumped on every change that shows up in to_dict()."""
+        return self._version
+
+    def touch(self):
+        """Record a change that does not touch updated_at (relationships)."""
+        self._version += 1
 
     def save(self):
         self.updated_at = datetime.now()
+        self._version += 1
+
+    @classmethod
+    def writable(cls, name):
+        """Whether update() may set the attribute name.
+
+        Private attributes and properties without a setter (version,
+        rating aggregates) are not.
+        """
+        if name.startswith("_"):
+            return False
+        attr = getattr(cls, name, None)
+        return not isinstance(attr, property) or attr.fset is not None
 
     def update(self, data):
+        for key in data:
+            if hasattr(self, key) and not self.writable(key):
+                raise ValueError(f"{key} cannot be updated")
         for key, value in data.items():
             if hasattr(self, key):
                 setattr(self, key, value)
         self.save()
+
+    def to_dict(self):
+        """Serialized form, memoized until the next version bump.
+
+        The returned dict is shared between callers and must be treated
+        as read-only.
+        """
+        cached = self._cached
+        if cached is None or cached[0] != self._version:
+            with span("to_dict", model=type(self).__name__):
+                cached = self._cached = (self._version, self._serialize())
+        return cached[1]
+
+    def _serialize(self):
+        raise NotImplementedError
+
+    def to_record(self):
+        """Flat storage representation, relationships stored as ids."""
+        record = {
+            "id": self.id,
+            "created_at": self.created_at.isoformat(),
+            "updated_at": self.updated_at.isoformat(),
+            "version": self._version,
+        }
+        record.update(self._record_fields())
+        return record
+
+    @classmethod
+    def from_record(cls, record, resolve):
+        """Rebuild an instance from to_record() output.
+
+        The record was validated when it was stored, so the setters are
+        bypassed. resolve(collection, id) returns related objects.
+        """
+        obj = cls.__new__(cls)
+        obj.restore(record, resolve)
+        return obj
+
+    def restore(self, record, resolve):
+        """Overwrite this instance's state with a to_record() output."""
+        self.id = record["id"]
+        self.created_at = datetime.fromisoformat(record["created_at"])
+        self.updated_at = datetime.fromisoformat(record["updated_at"])
+        self._version = record["version"]
+        self._cached = None
+        self._load_record(record, resolve)
+
+    def _record_fields(self):
+        raise NotImplementedError
+
+    def _load_record(self, record, resolve):
+        raise NotImplementedError
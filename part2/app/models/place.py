@@ -1,8 +1,12 @@
+import math
 from .base import BaseModel
 from .user import User
 
 
 class Place(BaseModel):
+    __slots__ = ("_title", "_description", "_price", "_latitude",
+                 "_longitude", "_owner", "_ratings", "amenities")
+
     def __init__(self, title, description, price, latitude, longitude, owner):
         super().__init__()
         self.title = title
@@ -11,7 +15,9 @@ class Place(BaseModel):
         self.latitude = latitude
         self.longitude = longitude
         self.owner = owner
-        self.reviews = []
+        # (review count, rating sum, histogram), replaced as a whole so a
+        # concurrent reader never sees a review half counted.
+        self._ratings = (0, 0, (0, 0, 0, 0, 0))
         self.amenities = []
 
     @property
@@ -49,7 +55,9 @@ class Place(BaseModel):
         if not isinstance(value, (int, float)):
             raise ValueError("price must be a number")
         v = float(value)
-        if v <= 0:
+        if not math.isfinite(v):
+            raise ValueError("price must be a number")
+        if not v > 0:
             raise ValueError("price must be a positive value")
         self._price = v
 
@@ -62,7 +70,8 @@ class Place(BaseModel):
         if not isinstance(value, (int, float)):
             raise ValueError("latitude must be a number")
         v = float(value)
-        if v < -90.0 or v > 90.0:
+        # JSON bodies may carry NaN, which every comparison lets through.
+        if not math.isfinite(v) or v < -90.0 or v > 90.0:
             raise ValueError("latitude must be between -90.0 and 90.0")
         self._latitude = v
 
@@ -75,7 +84,7 @@ class Place(BaseModel):
         if not isinstance(value, (int, float)):
             raise ValueError("longitude must be a number")
         v = float(value)
-        if v < -180.0 or v > 180.0:
+        if not math.isfinite(v) or v < -180.0 or v > 180.0:
             raise ValueError("longitude must be between -180.0 and 180.0")
         self._longitude = v
 
@@ -89,13 +98,54 @@ class Place(BaseModel):
             raise ValueError("owner must be an User instance")
         self._owner = value
 
+    @property
+    def review_count(self):
+        return self._ratings[0]
+
+    @property
+    def rating_sum(self):
+        return self._ratings[1]
+
+    @property
+    def rating_histogram(self):
+        return self._ratings[2]
+
+    @property
+    def average_rating(self):
+        count, total, _ = self._ratings
+        if not count:
+            return None
+        return total / count
+
+    def _rate(self, count, removed, added):
+        """Replace the aggregates after removing and adding a rating."""
+        old_count, total, histogram = self._ratings
+        histogram = list(histogram)
+        if removed is not None:
+            total -= removed
+            histogram[removed - 1] -= 1
+        if added is not None:
+            total += added
+            histogram[added - 1] += 1
+        self._ratings = (old_count + count, total, tuple(histogram))
+        self.touch()
+
     def add_review(self, review):
-        self.reviews.append(review)
+        # Reviews themselves live in the review repository (indexed by
+        # place), the place only keeps running rating aggregates.
+        self._rate(1, None, review.rating)
+
+    def remove_review(self, review):
+        self._rate(-1, review.rating, None)
+
+    def change_review_rating(self, old_rating, new_rating):
+        self._rate(0, old_rating, new_rating)
 
     def add_amenity(self, amenity):
         self.amenities.append(amenity)
+        self.touch()
 
-    def to_dict(self):
+    def _serialize(self):
         return {
             "id": self.id,
             "title": self.title,
@@ -106,6 +156,36 @@ class Place(BaseModel):
             "owner": self.owner.id,
             "created_at": self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat(),
-            "reviews": [r.id for r in self.reviews],
+            "review_count": self.review_count,
+            "rating_sum": self.rating_sum,
+            "average_rating": self.average_rating,
+            "rating_histogram": list(self.rating_histogram),
+            "amenities": [a.id for a in self.amenities],
+        }
+
+    def _record_fields(self):
+        return {
+            "title": self._title,
+            "description": self._description,
+            "price": self._price,
+            "latitude": self._latitude,
+            "longitude": self._longitude,
+            "owner_id": self._owner.id,
+            "review_count": self.review_count,
+            "rating_sum": self.rating_sum,
+            "rating_histogram": list(self.rating_histogram),
             "amenities": [a.id for a in self.amenities],
         }
+
+    def _load_record(self, record, resolve):
+        self._title = record["title"]
+        self._description = record["description"]
+        self._price = record["price"]
+        self._latitude = record["latitude"]
+        self._longitude = record["longitude"]
+        self._owner = resolve("users", record["owner_id"])
+        self._ratings = (record["review_count"], record["rating_sum"],
+                         tuple(record["rating_histogram"]))
+        # Amenities deleted since the place was stored are dropped.
+        amenities = (resolve("amenities", i) for i in record["amenities"])
+        self.amenities = [a for a in amenities if a is not None]
@@ -4,6 +4,8 @@ from .user import User
 
 
 class Review(BaseModel):
+    __slots__ = ("_text", "_rating", "_place", "_user")
+
     def __init__(self, text, rating, place, user):
         super().__init__()
         self.text = text
@@ -55,7 +57,7 @@ class Review(BaseModel):
             raise ValueError("user must be a User instance")
         self._user = value
 
-    def to_dict(self):
+    def _serialize(self):
         return {
             "id": self.id,
             "text": self.text,
@@ -65,3 +67,17 @@ class Review(BaseModel):
             "created_at": self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat(),
         }
+
+    def _record_fields(self):
+        return {
+            "text": self._text,
+            "rating": self._rating,
+            "place_id": self._place.id,
+            "user_id": self._user.id,
+        }
+
+    def _load_record(self, record, resolve):
+        self._text = record["text"]
+        self._rating = record["rating"]
+        self._place = resolve("places", record["place_id"])
+        self._user = resolve("users", record["user_id"])
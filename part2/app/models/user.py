@@ -2,6 +2,8 @@ from .base import BaseModel
 
 
 class User(BaseModel):
+    __slots__ = ("_first_name", "_last_name", "_email", "_is_admin")
+
     def __init__(self, first_name, last_name, email, is_admin=False):
         super().__init__()
         self.first_name = first_name
@@ -58,7 +60,7 @@ class User(BaseModel):
             raise ValueError("is_admin must be a boolean")
         self._is_admin = value
 
-    def to_dict(self):
+    def _serialize(self):
         return {
             "id": self.id,
             "first_name": self.first_name,
@@ -68,3 +70,17 @@ class User(BaseModel):
             "created_at": self.created_at.isoformat(),
             "updated_at": self.updated_at.isoformat(),
         }
+
+    def _record_fields(self):
+        return {
+            "first_name": self._first_name,
+            "last_name": self._last_name,
+            "email": self._email,
+            "is_admin": self._is_admin,
+        }
+
+    def _load_record(self, record, resolve):
+        self._first_name = record["first_name"]
+        self._last_name = record["last_name"]
+        self._email = record["email"]
+        self._is_admin = record["is_admin"]
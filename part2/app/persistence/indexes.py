@@ -0,0 +1,520 @@
+import math
+import threading
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from operator import attrgetter, itemgetter
+
+_REMOVED = object()
+
+
+class _Last:
+    """Sorts after any other value."""
+
+    def __lt__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+
+_LAST = _Last()
+
+
+class OrderedKeys:
+    """Insertion-ordered set of keys with stable integer cursors.
+
+    Each key gets an increasing sequence number and removal only tombstones
+    its slot, so a cursor (the last sequence number handed out) keeps
+    pointing at the same position whatever is inserted or deleted later.
+    Tombstones are compacted away once they outnumber the live keys.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._seqs = []
+        self._keys = []
+        self._positions = {}
+        self._next_seq = 1
+        self._removed = 0
+
+    def __len__(self):
+        return len(self._positions)
+
+    def __contains__(self, key):
+        return key in self._positions
+
+    def __iter__(self):
+        cursor = 0
+        while cursor is not None:
+            keys, cursor = self.page(cursor, 1000)
+            yield from keys
+
+    def add(self, key):
+        with self._lock:
+            if key in self._positions:
+                return
+            seq = self._next_seq
+            self._next_seq += 1
+            self._seqs.append(seq)
+            self._keys.append(key)
+            self._positions[key] = seq
+
+    def discard(self, key):
+        with self._lock:
+            seq = self._positions.pop(key, None)
+            if seq is None:
+                return
+            self._keys[bisect_left(self._seqs, seq)] = _REMOVED
+            self._removed += 1
+            if self._removed > 64 and self._removed > len(self._positions):
+                self._compact()
+
+    def page(self, after=0, limit=None):
+        """Return up to limit keys added after cursor `after`.
+
+        The second value is the cursor for the next page, or None when
+        there is nothing left.
+        """
+        with self._lock:
+            seqs, keys = self._seqs, self._keys
+            i = bisect_right(seqs, after)
+            found = []
+            while i < len(keys) and (limit is None or len(found) < limit):
+                if keys[i] is not _REMOVED:
+                    found.append(keys[i])
+                    after = seqs[i]
+                i += 1
+            while i < len(keys) and keys[i] is _REMOVED:
+                i += 1
+            return found, (after if i < len(keys) else None)
+
+    def _compact(self):
+        live = [(seq, key) for seq, key in zip(self._seqs, self._keys)
+                if key is not _REMOVED]
+        self._seqs = [seq for seq, _ in live]
+        self._keys = [key for _, key in live]
+        self._removed = 0
+
+
+class Index:
+    """Secondary index kept in sync by a repository.
+
+    Every index remembers the key it last saw for each object id so the
+    repository can re-index an object after an in-place change without
+    having to know its previous state.
+
+    record_key computes the same key from a to_record() dict, so snapshot
+    rows can be indexed without materializing them; it defaults to the
+    record field of the same name when key is not given.
+    """
+
+    def __init__(self, name, key=None, record_key=None):
+        self.name = name
+        self.key = key or attrgetter(name)
+        self.record_key = record_key
+        if record_key is None and key is None:
+            self.record_key = itemgetter(name)
+        self._keys = {}
+
+    def __len__(self):
+        return len(self._keys)
+
+    def key_of(self, obj_id):
+        return self._keys.get(obj_id)
+
+    def check(self, obj):
+        """Raise ValueError if obj cannot be stored in this index."""
+
+    def insert(self, obj):
+        # Remembered once inserted: a failed insert leaves no trace.
+        value = self.key(obj)
+        self._insert(value, obj.id)
+        self._keys[obj.id] = value
+
+    def remove(self, obj_id):
+        if obj_id in self._keys:
+            self._remove(self._keys.pop(obj_id), obj_id)
+
+    def load(self, items):
+        """Fill an empty index from (obj_id, key) pairs."""
+        for obj_id, value in items:
+            self._keys[obj_id] = value
+            self._insert(value, obj_id)
+
+    def refresh(self, obj):
+        """Re-index obj if its key changed, return True if it did."""
+        value = self.key(obj)
+        if obj.id in self._keys and self._keys[obj.id] == value:
+            return False
+        self.remove(obj.id)
+        self._insert(value, obj.id)
+        self._keys[obj.id] = value
+        return True
+
+    def _insert(self, value, obj_id):
+        raise NotImplementedError
+
+    def _remove(self, value, obj_id):
+        raise NotImplementedError
+
+
+class HashIndex(Index):
+    """Equality index, optionally enforcing unique values."""
+
+    def __init__(self, name, unique=False, key=None, record_key=None):
+        super().__init__(name, key, record_key)
+        self.unique = unique
+        self._buckets = {}
+
+    def check(self, obj):
+        if not self.unique:
+            return
+        value = self.key(obj)
+        owner = self._buckets.get(value)
+        if owner is not None and owner != obj.id:
+            raise ValueError(
+                "{} already registered".format(self.name.capitalize())
+            )
+
+    def find(self, value):
+        """Return the ids stored under value."""
+        bucket = self._buckets.get(value)
+        if bucket is None:
+            return []
+        if self.unique:
+            return [bucket]
+        return list(bucket)
+
+    def count(self, value):
+        bucket = self._buckets.get(value)
+        if bucket is None:
+            return 0
+        return 1 if self.unique else len(bucket)
+
+    def page(self, value, after=0, limit=None):
+        """Paginate the ids stored under value, in insertion order."""
+        bucket = self._buckets.get(value)
+        if bucket is None:
+            return [], None
+        if self.unique:
+            return ([bucket], None) if after == 0 else ([], None)
+        return bucket.page(after, limit)
+
+    def _insert(self, value, obj_id):
+        if self.unique:
+            self._buckets[value] = obj_id
+        else:
+            bucket = self._buckets.get(value)
+            if bucket is None:
+                bucket = self._buckets[value] = OrderedKeys()
+            bucket.add(obj_id)
+
+    def _remove(self, value, obj_id):
+        if self.unique:
+            if self._buckets.get(value) == obj_id:
+                del self._buckets[value]
+            return
+        bucket = self._buckets.get(value)
+        if bucket is not None:
+            bucket.discard(obj_id)
+            if not bucket:
+                del self._buckets[value]
+
+
+class SortedIndex(Index):
+    """Ordered index answering range queries in O(log n + k).
+
+    Entries are (value, id) pairs kept sorted with bisect, so ties on value
+    have a stable order and (value, id) works as a pagination cursor.
+    """
+
+    def __init__(self, name, key=None, record_key=None):
+        super().__init__(name, key, record_key)
+        self._entries = []
+
+    def load(self, items):
+        # One sort instead of an insort (and its memmove) per entry.
+        entries = self._entries
+        for obj_id, value in items:
+            self._keys[obj_id] = value
+            entries.append((value, obj_id))
+        entries.sort()
+
+    def _insert(self, value, obj_id):
+        insort(self._entries, (value, obj_id))
+
+    def _remove(self, value, obj_id):
+        entries = self._entries
+        i = bisect_left(entries, (value, obj_id))
+        if i < len(entries) and entries[i] == (value, obj_id):
+            del entries[i]
+
+    def range(self, low=None, high=None, after=None, limit=None):
+        """Return ids with low <= value <= high, in ascending order.
+
+        after is the (value, id) cursor of the previous page; the second
+        value returned is the cursor of the next page, or None.
+        """
+        entries = self._entries
+        start = 0 if low is None else bisect_left(entries, (low,))
+        if after is not None:
+            start = max(start, bisect_right(entries, tuple(after)))
+        end = len(entries) if high is None \
+            else bisect_left(entries, (high, _LAST))
+        stop = end if limit is None else min(end, start + limit)
+        page = entries[start:stop]
+        next_cursor = page[-1] if page and stop < end else None
+        return [obj_id for _, obj_id in page], next_cursor
+
+    def last(self, count):
+        """Return the ids of the count highest values, highest first."""
+        if count <= 0:
+            return []
+        return [obj_id for _, obj_id in reversed(self._entries[-count:])]
+
+
+def _contains(postings, slot):
+    i = bisect_left(postings, slot)
+    return i < len(postings) and postings[i] == slot
+
+
+class InvertedIndex(Index):
+    """Maps every term of a multi-valued key to the objects carrying it.
+
+    The key must return a frozenset of terms. Objects get a dense integer
+    slot and each term keeps a sorted array of slots (8 bytes per entry),
+    so "has all of these terms" is an intersection of sorted arrays driven
+    by the shortest one. Slots only grow, which also makes them usable as
+    pagination cursors.
+    """
+
+    def __init__(self, name, key=None, record_key=None):
+        super().__init__(name, key, record_key)
+        self._postings = {}
+        self._slots = {}
+        self._ids = [None]
+
+    def count(self, term):
+        return len(self._postings.get(term, ()))
+
+    def refresh(self, obj):
+        terms = self.key(obj)
+        previous = self._keys.get(obj.id)
+        if previous is None:
+            self.insert(obj)
+            return True
+        if previous == terms:
+            return False
+        slot = self._slots[obj.id]
+        for term in previous - terms:
+            self._discard(term, slot)
+        for term in terms - previous:
+            self._add(term, slot)
+        self._keys[obj.id] = terms
+        return True
+
+    def match_all(self, terms, after=0, limit=None):
+        """Return (ids, next_cursor) of objects carrying every term."""
+        postings = sorted(
+            (self._postings.get(term, ()) for term in set(terms)), key=len
+        )
+        if not postings or not postings[0]:
+            return [], None
+        shortest, others = postings[0], postings[1:]
+        start = bisect_right(shortest, after)
+        if limit is None:
+            # Whole answer wanted: set intersection runs in C.
+            matched = set(shortest[start:]).intersection(*others)
+            return [self._ids[slot] for slot in sorted(matched)], None
+        found = []
+        for i in range(start, len(shortest)):
+            slot = shortest[i]
+            if all(_contains(p, slot) for p in others):
+                if limit is not None and len(found) == limit:
+                    return found, after
+                found.append(self._ids[slot])
+                after = slot
+        return found, None
+
+    def _insert(self, terms, obj_id):
+        slot = self._slots.get(obj_id)
+        if slot is None:
+            slot = self._slots[obj_id] = len(self._ids)
+            self._ids.append(obj_id)
+        for term in terms:
+            self._add(term, slot)
+
+    def _remove(self, terms, obj_id):
+        slot = self._slots.pop(obj_id)
+        self._ids[slot] = None
+        for term in terms:
+            self._discard(term, slot)
+
+    def _add(self, term, slot):
+        postings = self._postings.get(term)
+        if postings is None:
+            postings = self._postings[term] = array('q')
+        if not postings or postings[-1] < slot:
+            postings.append(slot)
+        elif not _contains(postings, slot):
+            postings.insert(bisect_left(postings, slot), slot)
+
+    def _discard(self, term, slot):
+        postings = self._postings.get(term)
+        if postings is None or not _contains(postings, slot):
+            return
+        del postings[bisect_left(postings, slot)]
+        if not postings:
+            del self._postings[term]
+
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180.0
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = (math.sin(dphi / 2) ** 2
+         + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2)
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex(Index):
+    """Spatial index bucketing (latitude, longitude) points in grid cells.
+
+    Queries only visit the cells overlapping the searched area, so their
+    cost follows the size of the answer rather than the number of points.
+    """
+
+    def __init__(self, name, key=None, cell_size=0.5, record_key=None):
+        super().__init__(name, key, record_key)
+        self.cell_size = cell_size
+        self._lon_cells = int(math.ceil(360.0 / cell_size))
+        self._min_row = self._row(-90.0)
+        self._max_row = self._row(90.0)
+        self._cells = {}
+
+    def _row(self, lat):
+        return int(math.floor(lat / self.cell_size))
+
+    def _col(self, lon):
+        return int(math.floor((lon + 180.0) / self.cell_size)) \
+            % self._lon_cells
+
+    def _cell(self, point):
+        return self._row(point[0]), self._col(point[1])
+
+    def _insert(self, value, obj_id):
+        self._cells.setdefault(self._cell(value), set()).add(obj_id)
+
+    def _remove(self, value, obj_id):
+        cell = self._cell(value)
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.discard(obj_id)
+            if not bucket:
+                del self._cells[cell]
+
+    def _cols(self, min_lon, max_lon):
+        if max_lon - min_lon >= 360.0:
+            return range(self._lon_cells)
+        first, last = self._col(min_lon), self._col(max_lon)
+        if first <= last:
+            return range(first, last + 1)
+        return list(range(first, self._lon_cells)) + list(range(last + 1))
+
+    def _candidates(self, min_lat, max_lat, cols):
+        rows = range(max(self._row(min_lat), self._min_row),
+                     min(self._row(max_lat), self._max_row) + 1)
+        if len(rows) * len(cols) > len(self._cells):
+            # Sparser to walk the occupied cells than the covered area.
+            wanted = set(cols)
+            for (row, col), bucket in self._cells.items():
+                if row in rows and col in wanted:
+                    yield from bucket
+            return
+        for row in rows:
+            for col in cols:
+                bucket = self._cells.get((row, col))
+                if bucket:
+                    yield from bucket
+
+    def bbox(self, min_lat, min_lon, max_lat, max_lon):
+        """Return the ids inside the box, which may cross the antimeridian."""
+        crosses = min_lon > max_lon
+        if crosses:
+            cols = self._cols(min_lon, max_lon + 360.0)
+        else:
+            cols = self._cols(min_lon, max_lon)
+        found = []
+        for obj_id in self._candidates(min_lat, max_lat, cols):
+            lat, lon = self._keys[obj_id]
+            if not min_lat <= lat <= max_lat:
+                continue
+            if crosses:
+                inside = lon >= min_lon or lon <= max_lon
+            else:
+                inside = min_lon <= lon <= max_lon
+            if inside:
+                found.append(obj_id)
+        return found
+
+    def within(self, lat, lon, radius_km):
+        """Return (distance_km, id) pairs within radius_km, nearest first."""
+        dlat = radius_km / KM_PER_DEGREE
+        min_lat, max_lat = lat - dlat, lat + dlat
+        cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+        if min_lat <= -90.0 or max_lat >= 90.0 or dlat / cos_lat >= 180.0:
+            cols = range(self._lon_cells)
+        else:
+            dlon = dlat / cos_lat
+            cols = self._cols(lon - dlon, lon + dlon)
+        found = []
+        for obj_id in self._candidates(min_lat, max_lat, cols):
+            p_lat, p_lon = self._keys[obj_id]
+            distance = haversine_km(lat, lon, p_lat, p_lon)
+            if distance <= radius_km:
+                found.append((distance, obj_id))
+        found.sort()
+        return found
+
+    def nearest(self, lat, lon, k):
+        """Return the k nearest (distance_km, id) pairs, nearest first."""
+        if k <= 0 or not self._keys:
+            return []
+        if k >= len(self._keys):
+            return sorted(
+                (haversine_km(lat, lon, *point), obj_id)
+                for obj_id, point in self._keys.items()
+            )
+        # Grow rings of cells around the point until k candidates are seen;
+        # the k-th of those bounds the radius holding the true k nearest.
+        row, col = self._cell((lat, lon))
+        candidates = set()
+        visited = 0
+        ring = 0
+        while len(candidates) < k and visited <= len(self._cells):
+            for cell in self._ring(row, col, ring):
+                visited += 1
+                candidates.update(self._cells.get(cell, ()))
+            ring += 1
+        if len(candidates) < k:
+            candidates = self._keys
+        bound = sorted(
+            haversine_km(lat, lon, *self._keys[obj_id])
+            for obj_id in candidates
+        )[k - 1]
+        return self.within(lat, lon, bound)[:k]
+
+    def _ring(self, row, col, ring):
+        for r in range(row - ring, row + ring + 1):
+            if r < self._min_row or r > self._max_row:
+                continue
+            if abs(r - row) == ring:
+                cols = range(col - ring, col + ring + 1)
+            else:
+                cols = (col - ring, col + ring) if ring else (col,)
+            for c in cols:
+                yield r, c % self._lon_cells
@@ -0,0 +1,387 @@
+import json
+import logging
+import os
+import threading
+from contextlib import ExitStack, contextmanager
+from functools import partial
+from app.persistence.snapshot import MappedSnapshot, write_snapshot
+
+FSYNC_POLICIES = ("always", "interval", "never")
+SNAPSHOT_FILE = "snapshot.snap"
+
+logger = logging.getLogger(__name__)
+
+
+def _dumps(entry):
+    return json.dumps(entry, separators=(",", ":")) + "\n"
+
+
+class JournalError(OSError):
+    """Raised to writers whose entries could not be written to the log."""
+
+
+class CollectionLog:
+    """Journal handle of one repository, set as its `journal`."""
+
+    def __init__(self, journal, name, repo, model):
+        self.journal = journal
+        self.name = name
+        self.repo = repo
+        self.model = model
+
+    def put(self, obj):
+        self.put_many([obj])
+
+    def put_many(self, objs):
+        def entry():
+            # Serialized under the journal lock: the log order is then the
+            # order in which states were captured, and an object deleted
+            # meanwhile is not written back. stores() takes no repository
+            # lock, which a writer may hold while waiting for this one.
+            return "".join(
+                _dumps({"op": "put", "c": self.name, "r": obj.to_record()})
+                for obj in objs if self.repo.stores(obj)
+            ) or None
+        self.journal.append(entry)
+
+    def delete(self, obj_id):
+        self.journal.append(lambda: _dumps(
+            {"op": "del", "c": self.name, "id": obj_id}
+        ))
+
+
+class Journal:
+    """Append-only log of repository writes, compacted by snapshots.
+
+    Each write appends the full record of the object (or a delete marker)
+    and returns once its line is in the log. Concurrent writers share a
+    group commit: whichever arrives first writes every pending line with
+    a single write() and, depending on the fsync policy, a single fsync:
+
+    - "always": fsync before returning, nothing acknowledged is lost
+    - "interval": a background thread fsyncs every fsync_interval seconds
+    - "never": left to the OS, survives a process crash but not the host's
+
+    The log is split into numbered segments. A snapshot switches to a new
+    segment, then dumps every collection while writes go on; recovery
+    loads the snapshot and replays the segments written since the switch,
+    whose full records supersede whatever the snapshot caught in flight.
+
+    Snapshots use the mmap-ed format of app.persistence.snapshot: on
+    recovery the repositories serve its rows lazily and their indexes are
+    built by a background thread, so startup does not depend on the size
+    of the dataset.
+    """
+
+    def __init__(self, directory, fsync="always", fsync_interval=1.0,
+                 snapshot_interval=None):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError("Unknown fsync policy: {}".format(fsync))
+        self.directory = directory
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.snapshot_interval = snapshot_interval
+        self._collections = {}
+        self._cond = threading.Condition()
+        self._pending = []
+        self._appended = 0
+        self._written = 0
+        self._failed = 0
+        self._flushing = False
+        self._segment = 0
+        self._file = None
+        self._snapshot_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._indexer = None
+        self._local = threading.local()
+        self.mapped = None
+        self.entries_since_snapshot = 0
+        # Records recovery could not apply, and those of them that no
+        # later entry superseded: {(collection, id): error}.
+        self.skipped = 0
+        self.unresolved = {}
+        os.makedirs(directory, exist_ok=True)
+
+    def attach(self, name, repo, model):
+        """Journal repo's writes; attach in dependency order."""
+        log = CollectionLog(self, name, repo, model)
+        self._collections[name] = log
+        repo.journal = log
+        return log
+
+    # Writing
+
+    def append(self, entry):
+        """Write the lines returned by entry(), wait for the group commit.
+
+        entry is called under the journal lock and may return None to
+        write nothing. Inside batch() the wait is left to the batch.
+        """
+        with self._cond:
+            line = entry()
+            if line is None:
+                return
+            self._pending.append(line)
+            self._appended += 1
+            self.entries_since_snapshot += 1
+            if getattr(self._local, "batches", 0):
+                self._local.ticket = self._appended
+                return
+            self._wait(self._appended)
+
+    @contextmanager
+    def batch(self):
+        """Defer the commit waits of the block's appends to its end.
+
+        A caller holding locks around several writes can release them
+        before waiting, instead of making other writers wait for its fsync.
+        """
+        local = self._local
+        local.batches = getattr(local, "batches", 0) + 1
+        try:
+            yield
+        finally:
+            local.batches -= 1
+            ticket = getattr(local, "ticket", 0)
+            if not local.batches and ticket:
+                local.ticket = 0
+                with self._cond:
+                    self._wait(ticket)
+
+    def _wait(self, ticket):
+        """Wait until entry ticket is written; called with the lock held."""
+        while self._written < ticket:
+            if ticket <= self._failed:
+                raise JournalError("journal write failed")
+            if self._flushing:
+                self._cond.wait()
+            else:
+                self._flush()
+
+    def _flush(self):
+        """Write every pending line; called with the lock held."""
+        self._flushing = True
+        lines, self._pending = self._pending, []
+        last = self._appended
+        file = self._file
+        self._cond.release()
+        try:
+            file.write("".join(lines))
+            file.flush()
+            if self.fsync == "always":
+                os.fsync(file.fileno())
+        except Exception:
+            self._failed = last
+            raise
+        finally:
+            self._cond.acquire()
+            self._flushing = False
+            self._cond.notify_all()
+        self._written = last
+
+    def _segment_path(self, number):
+        return os.path.join(self.directory, "wal.{:08d}.log".format(number))
+
+    def _segments(self):
+        numbers = []
+        for name in os.listdir(self.directory):
+            if name.startswith("wal.") and name.endswith(".log"):
+                numbers.append(int(name[4:-4]))
+        return sorted(numbers)
+
+    def _rotate(self):
+        """Continue the log in a new segment, return its number."""
+        with self._cond:
+            while self._flushing:
+                self._cond.wait()
+            if self._pending:
+                self._flush()
+            if self._file is not None:
+                self._file.close()
+            self._segment += 1
+            self._file = open(self._segment_path(self._segment), "a",
+                              encoding="utf-8")
+            self.entries_since_snapshot = 0
+            return self._segment
+
+    # Recovery
+
+    def _lookup(self, collection, obj_id):
+        return self._collections[collection].repo.get(obj_id)
+
+    def _resolve(self, collection, obj_id):
+        obj = self._lookup(collection, obj_id)
+        if obj is None:
+            raise KeyError(obj_id)
+        return obj
+
+    def _replay(self, entry):
+        log = self._collections[entry["c"]]
+        if entry["op"] == "del":
+            log.repo.delete(entry["id"])
+            self.unresolved.pop((entry["c"], entry["id"]), None)
+            return
+        record = entry["r"]
+        key = (entry["c"], record["id"])
+        try:
+            obj = log.repo.get(record["id"])
+            if obj is None:
+                log.repo.add(log.model.from_record(record, self._resolve))
+            else:
+                obj.restore(record, self._resolve)
+                log.repo.save(obj)
+        except (KeyError, ValueError) as e:
+            # A snapshot can hold an object whose references (or unique
+            # key) only settle later in the log, which also rewrites it.
+            self.skipped += 1
+            self.unresolved[key] = e
+            logger.debug("Skipped %s %s during recovery: %r", *key, e)
+            return
+        self.unresolved.pop(key, None)
+
+    def _read(self, path):
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # Torn last write of a crash: nothing was acknowledged
+                    # past this point.
+                    return
+
+    def recover(self):
+        """Rebuild the attached repositories, then open a new segment.
+
+        Records that cannot be applied when replayed are skipped, and
+        logged as an error if no later entry supersedes them: the objects
+        they held are then missing from the repositories.
+        """
+        repos = [log.repo for log in self._collections.values()]
+        for repo in repos:
+            repo.journal = None
+        try:
+            start = self._load_snapshot()
+            segments = self._segments()
+            with ExitStack() as stack:
+                for repo in repos:
+                    stack.enter_context(repo.deferred_indexes())
+                for number in segments:
+                    if number >= start:
+                        for entry in self._read(self._segment_path(number)):
+                            self._replay(entry)
+        finally:
+            for log in self._collections.values():
+                log.repo.journal = log
+        if self.unresolved:
+            logger.error(
+                "Journal recovery dropped %d record(s) it could not apply "
+                "(%d skipped in all): %s", len(self.unresolved),
+                self.skipped, "; ".join(
+                    f"{c} {i}: {e!r}" for (c, i), e in self.unresolved.items()
+                )
+            )
+        elif self.skipped:
+            logger.info("Journal recovery skipped %d record(s), all "
+                        "superseded later in the log", self.skipped)
+        self._segment = max(segments + [start - 1])
+        self._rotate()
+        if self.mapped is not None:
+            self._indexer = threading.Thread(
+                target=self.build_indexes, daemon=True, name="journal-index"
+            )
+            self._indexer.start()
+
+    def _load_snapshot(self):
+        """Load the latest snapshot, return the first segment to replay."""
+        path = os.path.join(self.directory, SNAPSHOT_FILE)
+        if os.path.exists(path):
+            self.mapped = MappedSnapshot(path)
+            for name, log in self._collections.items():
+                base = self.mapped.collections.get(name)
+                if base is not None:
+                    log.repo.load_snapshot(base, partial(
+                        log.model.from_record, resolve=self._lookup
+                    ))
+            return self.mapped.meta["segment"]
+        return 1
+
+    def build_indexes(self):
+        """Index the snapshot rows of every repository."""
+        for log in self._collections.values():
+            log.repo.build_indexes()
+
+    # Snapshots
+
+    def snapshot(self):
+        """Dump every collection and drop the segments it covers."""
+        with self._snapshot_lock:
+            start = self._rotate()
+            path = os.path.join(self.directory, SNAPSHOT_FILE)
+            tmp = path + ".tmp"
+            with open(tmp, "wb") as f:
+                write_snapshot(f, {
+                    name: log.repo.iter_records()
+                    for name, log in self._collections.items()
+                }, segment=start)
+                f.flush()
+                os.fsync(f.fileno())
+            # A repository still reading the previous file keeps its
+            # mapping: the replaced file lives on until it is unmapped.
+            os.replace(tmp, path)
+            dir_fd = os.open(self.directory, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+            for number in self._segments():
+                if number < start:
+                    os.remove(self._segment_path(number))
+
+    def start(self):
+        """Start the background fsync / snapshot thread if needed."""
+        if self._thread is not None:
+            return
+        if self.fsync != "interval" and not self.snapshot_interval:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name="journal")
+        self._thread.start()
+
+    def _run(self):
+        intervals = [self.snapshot_interval]
+        if self.fsync == "interval":
+            intervals.append(self.fsync_interval)
+        tick = min(i for i in intervals if i)
+        elapsed = 0.0
+        while not self._stop.wait(tick):
+            if self.fsync == "interval":
+                self.sync()
+            elapsed += tick
+            if self.snapshot_interval and elapsed >= self.snapshot_interval:
+                elapsed = 0.0
+                if self.entries_since_snapshot:
+                    self.snapshot()
+
+    def sync(self):
+        """Force the written log to disk."""
+        with self._cond:
+            if self._file is not None:
+                os.fsync(self._file.fileno())
+
+    def close(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        with self._cond:
+            while self._flushing:
+                self._cond.wait()
+            if self._pending:
+                self._flush()
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
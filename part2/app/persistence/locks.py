@@ -0,0 +1,99 @@
+import threading
+
+
+class _Held:
+    """Reusable context manager taking one side of an RWLock."""
+
+    __slots__ = ("_acquire", "_release")
+
+    def __init__(self, acquire, release):
+        self._acquire = acquire
+        self._release = release
+
+    def __enter__(self):
+        self._acquire()
+
+    def __exit__(self, *exc):
+        self._release()
+
+
+class RWLock:
+    """Reader/writer lock, reentrant, giving priority to waiting writers.
+
+    A thread holding the write lock may take it (or the read lock) again.
+    A thread holding only the read lock cannot upgrade it: two readers
+    upgrading at once would wait for each other forever.
+    """
+
+    def __init__(self):
+        # State is guarded by a plain lock, the condition only waits on it.
+        self._mutex = threading.Lock()
+        self._cond = threading.Condition(self._mutex)
+        self._readers = {}
+        self._writer = None
+        self._writes = 0
+        self._waiting_writers = 0
+        self._read = _Held(self.acquire_read, self.release_read)
+        self._write = _Held(self.acquire_write, self.release_write)
+
+    def acquire_read(self):
+        me = threading.get_ident()
+        with self._mutex:
+            if self._writer == me:
+                self._writes += 1
+                return
+            if me in self._readers:
+                self._readers[me] += 1
+                return
+            while self._writer is not None or self._waiting_writers:
+                self._cond.wait()
+            self._readers[me] = 1
+
+    def release_read(self):
+        me = threading.get_ident()
+        with self._mutex:
+            if self._writer == me:
+                self._release_write()
+                return
+            count = self._readers[me] - 1
+            if count:
+                self._readers[me] = count
+                return
+            del self._readers[me]
+            if not self._readers:
+                self._cond.notify_all()
+
+    def acquire_write(self):
+        me = threading.get_ident()
+        with self._mutex:
+            if self._writer == me:
+                self._writes += 1
+                return
+            if me in self._readers:
+                raise RuntimeError("cannot upgrade a read lock to write")
+            self._waiting_writers += 1
+            try:
+                while self._writer is not None or self._readers:
+                    self._cond.wait()
+            finally:
+                self._waiting_writers -= 1
+            self._writer = me
+            self._writes = 1
+
+    def release_write(self):
+        with self._mutex:
+            self._release_write()
+
+    def _release_write(self):
+        self._writes -= 1
+        if not self._writes:
+            self._writer = None
+            self._cond.notify_all()
+
+    def read(self):
+        """Context manager holding the lock shared."""
+        return self._read
+
+    def write(self):
+        """Context manager holding the lock exclusively."""
+        return self._write
@@ -1,5 +1,8 @@
+import threading
 from abc import ABC, abstractmethod
-from app.models.amenity import Amenity
+from contextlib import contextmanager
+from app.persistence.indexes import HashIndex, OrderedKeys
+from app.persistence.locks import RWLock
 
 
 class Repository(ABC):
@@ -15,6 +18,10 @@ class Repository(ABC):
     def get_all(self):
         pass
 
+    @abstractmethod
+    def page(self, limit, cursor=0):
+        pass
+
     @abstractmethod
     def update(self, obj_id, data):
         pass
@@ -23,33 +30,364 @@ class Repository(ABC):
     def delete(self, obj_id):
         pass
 
+    @abstractmethod
+    def save(self, obj):
+        """Record in-place changes made to a stored object."""
+        pass
+
     @abstractmethod
     def get_by_attribute(self, attr_name, attr_value):
         pass
 
+    def add_many(self, objs):
+        """Add objs, returning one error message (or None) per object."""
+        errors = []
+        for obj in objs:
+            try:
+                self.add(obj)
+            except ValueError as e:
+                errors.append(str(e))
+            else:
+                errors.append(None)
+        return errors
+
+    def get_many(self, obj_ids):
+        """Return {id: object} for the ids that exist, in one lookup."""
+        found = {}
+        for obj_id in set(obj_ids):
+            obj = self.get(obj_id)
+            if obj is not None:
+                found[obj_id] = obj
+        return found
+
+    def iter_all(self, batch_size=1000):
+        """Yield every object without materializing the whole table."""
+        cursor = 0
+        while cursor is not None:
+            objs, cursor = self.page(batch_size, cursor)
+            yield from objs
+
+    def warm(self):
+        """Do ahead of time the work deferred to first use, if any."""
+
 
 class InMemoryRepository(Repository):
-    def __init__(self):
+    """Repository keeping its objects in a dict.
+
+    Writes hold `lock` exclusively; reads that walk the storage or an
+    index hold it shared, and so must callers of index(). get() stays
+    lock-free: a single dict lookup is atomic, only building a snapshot
+    row takes the shared lock. The journal is written once the lock is
+    released, so writers still share its group commits.
+    """
+
+    def __init__(self, indexes=None):
+        self.lock = RWLock()
         self._storage = {}
+        self._order = OrderedKeys()
+        self._indexes = {}
+        self._version = 0
+        # Set by Journal.attach() to log every write.
+        self.journal = None
+        # Snapshot rows served lazily, see load_snapshot().
+        self._base = None
+        self._build = None
+        self._deleted = set()
+        self._indexed = True
+        self._deferred = False
+        self._index_lock = threading.Lock()
+        for index in indexes or []:
+            self.add_index(index)
 
-    def add(self, obj):
+    def add_index(self, index):
+        with self.lock.write():
+            if self._indexed:
+                for obj in self._storage.values():
+                    index.check(obj)
+                    index.insert(obj)
+            self._indexes[index.name] = index
+
+    def index(self, name):
+        """The index called name; use it while holding lock.read()."""
+        if not self._indexed:
+            self.build_indexes()
+        return self._indexes[name]
+
+    @property
+    def version(self):
+        """Counter bumped by every write to the repository."""
+        return self._version
+
+    def load_snapshot(self, base, build):
+        """Serve the rows of a MappedCollection without loading them.
+
+        Objects are built with build(record) the first time they are read.
+        Indexes stay empty until build_indexes(), which any index lookup
+        or write runs first; writes inside deferred_indexes() skip them
+        instead and are picked up by the build.
+        """
+        if len(base):
+            self._base = base
+            self._build = build
+            self._indexed = False
+
+    @contextmanager
+    def deferred_indexes(self):
+        """Let trusted writes (a journal replay) skip unbuilt indexes."""
+        self._deferred = True
+        try:
+            yield
+        finally:
+            self._deferred = False
+
+    def build_indexes(self):
+        """Index the snapshot rows and every object written since."""
+        with self._index_lock:
+            if self._indexed:
+                return
+            indexes = list(self._indexes.values())
+            entries = [[] for _ in indexes]
+            for obj_id, obj, record in self._rows():
+                for index, found in zip(indexes, entries):
+                    if obj is not None:
+                        found.append((obj_id, index.key(obj)))
+                    elif index.record_key is not None:
+                        found.append((obj_id, index.record_key(record)))
+                    else:
+                        found.append((obj_id, index.key(self._build(record))))
+            for index, found in zip(indexes, entries):
+                index.load(found)
+            self._indexed = True
+
+    def warm(self):
+        """Build the indexes, every object and its to_dict() cache."""
+        self.build_indexes()
+        for obj in self.iter_all():
+            obj.to_dict()
+
+    def _write_indexes(self):
+        """Indexes a write has to maintain."""
+        if not self._indexed:
+            if self._deferred:
+                return ()
+            self.build_indexes()
+        return self._indexes.values()
+
+    def _rows(self):
+        """Yield (id, object, record) for every stored object.
+
+        Snapshot rows not materialized yet come with object None and their
+        record, the others with record None.
+        """
+        base, storage = self._base, self._storage
+        if base is not None:
+            deleted = self._deleted
+            for row in range(len(base)):
+                obj_id = base.id_at(row)
+                if obj_id in deleted:
+                    continue
+                obj = storage.get(obj_id)
+                if obj is None:
+                    yield obj_id, None, base.record(row)
+                else:
+                    yield obj_id, obj, None
+        for obj_id in self._order:
+            obj = storage.get(obj_id)
+            if obj is not None:
+                yield obj_id, obj, None
+
+    def iter_records(self):
+        """Yield the to_record() of every object, materializing none."""
+        for _, obj, record in self._rows():
+            yield record if obj is None else obj.to_record()
+
+    def _in_base(self, obj_id):
+        return (self._base is not None and obj_id not in self._deleted
+                and self._base.row_of(obj_id) is not None)
+
+    def _materialize(self, obj_id, row=None):
+        if row is None:
+            row = self._base.row_of(obj_id)
+            if row is None:
+                return None
+        if obj_id in self._deleted:
+            return None
+        # Built without the lock: resolving references takes the locks of
+        # the other repositories, in another order than the facade does.
+        obj = self._build(self._base.record(row))
+        # Shared lock: a concurrent delete cannot slip between the check
+        # and the insertion and leave the deleted object stored.
+        with self.lock.read():
+            if obj_id in self._deleted:
+                return None
+            return self._storage.setdefault(obj_id, obj)
+
+    def _add(self, obj):
+        indexes = self._write_indexes()
+        for index in indexes:
+            index.check(obj)
+        # Indexed first and stored last, so an index failing on obj
+        # leaves it in neither the storage nor any index.
+        inserted = []
+        try:
+            for index in indexes:
+                index.insert(obj)
+                inserted.append(index)
+        except Exception:
+            for index in inserted:
+                index.remove(obj.id)
+            raise
         self._storage[obj.id] = obj
+        self._order.add(obj.id)
+        self._version += 1
+
+    def add(self, obj):
+        with self.lock.write():
+            self._add(obj)
+        if self.journal is not None:
+            self.journal.put(obj)
+
+    def add_many(self, objs):
+        """Add objs, returning one error message (or None) per object.
+
+        The whole batch is logged as one journal write.
+        """
+        errors = []
+        added = []
+        with self.lock.write():
+            for obj in objs:
+                try:
+                    self._add(obj)
+                except ValueError as e:
+                    errors.append(str(e))
+                else:
+                    errors.append(None)
+                    added.append(obj)
+        if self.journal is not None and added:
+            self.journal.put_many(added)
+        return errors
 
     def get(self, obj_id):
-        return self._storage.get(obj_id)
+        obj = self._storage.get(obj_id)
+        if obj is None and self._base is not None:
+            obj = self._materialize(obj_id)
+        return obj
+
+    def stores(self, obj):
+        """Whether obj is the object stored under its id, without locking."""
+        return self._storage.get(obj.id) is obj
+
+    def get_many(self, obj_ids):
+        storage = self._storage
+        if self._base is None:
+            return {obj_id: storage[obj_id] for obj_id in set(obj_ids)
+                    if obj_id in storage}
+        return super().get_many(obj_ids)
 
     def get_all(self):
-        return list(self._storage.values())
+        if self._base is None:
+            with self.lock.read():
+                return list(self._storage.values())
+        return list(self.iter_all())
+
+    def page(self, limit, cursor=0):
+        """Return (objects, next_cursor) for the page following cursor.
+
+        Snapshot rows come first, with their row number as cursor; objects
+        added since follow, their cursor offset by the number of rows.
+        Rows not built yet are built once the lock is released.
+        """
+        with self.lock.read():
+            base = self._base
+            rows = 0 if base is None else len(base)
+            entries = []
+            while cursor < rows and len(entries) < limit:
+                obj_id = base.id_at(cursor)
+                if obj_id not in self._deleted:
+                    entries.append((obj_id, cursor,
+                                    self._storage.get(obj_id)))
+                cursor += 1
+            if len(entries) == limit:
+                more = cursor < rows or len(self._order)
+                next_cursor = cursor if more else None
+                tail = []
+            else:
+                ids, next_cursor = self._order.page(cursor - rows,
+                                                    limit - len(entries))
+                tail = list(map(self._storage.__getitem__, ids))
+                if next_cursor is not None:
+                    next_cursor += rows
+        objs = []
+        for obj_id, row, obj in entries:
+            if obj is None:
+                obj = self._materialize(obj_id, row)
+            if obj is not None:
+                objs.append(obj)
+        return objs + tail, next_cursor
 
     def update(self, obj_id, data):
-        obj = self.get(obj_id)
-        if obj:
-            obj.update(data)
+        # Built, if it has to be, before the lock is taken.
+        self.get(obj_id)
+        with self.lock.write():
+            obj = self._storage.get(obj_id)
+            if not obj:
+                return
+            indexes = self._write_indexes()
+            # Keep the previous values so a failed update (validation error
+            # or unique index conflict) leaves the object and indexes intact.
+            previous = {key: getattr(obj, key) for key in data
+                        if hasattr(obj, key) and obj.writable(key)}
+            previous["updated_at"] = obj.updated_at
+            try:
+                obj.update(data)
+                for index in indexes:
+                    index.check(obj)
+                for index in indexes:
+                    index.refresh(obj)
+            except Exception:
+                for key, value in previous.items():
+                    setattr(obj, key, value)
+                # Bumped so a memoized to_dict drops the rejected values.
+                obj.touch()
+                for index in indexes:
+                    index.refresh(obj)
+                raise
+            self._version += 1
+        if self.journal is not None:
+            self.journal.put(obj)
+
+    def save(self, obj):
+        with self.lock.write():
+            if obj.id not in self._storage:
+                return
+            for index in self._write_indexes():
+                index.refresh(obj)
+            self._version += 1
+        if self.journal is not None:
+            self.journal.put(obj)
 
     def delete(self, obj_id):
-        if obj_id in self._storage:
-            del self._storage[obj_id]
+        with self.lock.write():
+            in_base = self._in_base(obj_id)
+            if obj_id not in self._storage and not in_base:
+                return
+            indexes = self._write_indexes()
+            self._storage.pop(obj_id, None)
+            if in_base:
+                self._deleted.add(obj_id)
+            else:
+                self._order.discard(obj_id)
+            for index in indexes:
+                index.remove(obj_id)
+            self._version += 1
+        if self.journal is not None:
+            self.journal.delete(obj_id)
 
     def get_by_attribute(self, attr_name, attr_value):
-        return next((obj for obj in self._storage.values() if getattr
+        index = self._indexes.get(attr_name)
+        if isinstance(index, HashIndex):
+            with self.lock.read():
+                ids = self.index(attr_name).find(attr_value)
+            return self.get(ids[0]) if ids else None
+        return next((obj for obj in self.iter_all() if getattr
                      (obj, attr_name) == attr_value), None)
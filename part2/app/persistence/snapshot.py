@@ -0,0 +1,221 @@
+"""Columnar binary snapshot of repository records, read through mmap.
+
+Layout (sections aligned on 8 bytes, in the byte order of the host that
+wrote the file, which the header records):
+
+    b"HBNBSNAP" | u64 header offset | u64 header length | sections | header
+
+The header is JSON and describes, per collection, its row count and one
+column per to_record() field:
+
+    "d" float64, "q" int64, "?" bool (1 byte): fixed-width arrays
+    "s" text, "j" JSON values: u64 offsets (rows + 1) into a utf-8 blob
+
+plus "ids", the rows as u32 sorted by id, to look an id up by bisection.
+Nothing is decoded when the file is opened; a row becomes a record dict
+only when it is asked for.
+"""
+import json
+import mmap
+import struct
+import sys
+from array import array
+from collections.abc import Mapping
+
+MAGIC = b"HBNBSNAP"
+_PREAMBLE = struct.Struct("<8sQQ")
+_decode_json = json.JSONDecoder().decode
+
+
+def _column_type(values):
+    if all(type(v) is bool for v in values):
+        return "?"
+    if all(type(v) is int for v in values):
+        return "q"
+    if all(type(v) in (int, float) for v in values):
+        return "d"
+    if all(type(v) is str for v in values):
+        return "s"
+    return "j"
+
+
+class _Writer:
+    def __init__(self, f):
+        self.f = f
+        self.pos = _PREAMBLE.size
+        f.write(b"\0" * self.pos)
+
+    def section(self, data):
+        offset = self.pos
+        if isinstance(data, array):
+            data = data.tobytes()
+        self.f.write(data)
+        self.pos += len(data)
+        padding = -self.pos % 8
+        self.f.write(b"\0" * padding)
+        self.pos += padding
+        return offset
+
+    def blob(self, strings):
+        encoded = [s.encode("utf-8") for s in strings]
+        offsets = array("Q", [0])
+        total = 0
+        for data in encoded:
+            total += len(data)
+            offsets.append(total)
+        return {"offsets": self.section(offsets),
+                "data": self.section(b"".join(encoded))}
+
+
+def write_snapshot(f, collections, **meta):
+    """Write {name: iterable of records} to the binary file object f.
+
+    Extra keyword arguments are stored in the header (see
+    MappedSnapshot.meta).
+    """
+    writer = _Writer(f)
+    header = {"byteorder": sys.byteorder, "meta": meta, "collections": {}}
+    for name, records in collections.items():
+        columns = {}
+        rows = 0
+        for record in records:
+            for field, value in record.items():
+                columns.setdefault(field, [None] * rows).append(value)
+            rows += 1
+        spec = {"rows": rows, "columns": {}}
+        for field, values in columns.items():
+            values.extend([None] * (rows - len(values)))
+            kind = _column_type(values)
+            if kind == "?":
+                column = {"offset": writer.section(bytes(values))}
+            elif kind in "qd":
+                column = {"offset": writer.section(array(kind, values))}
+            elif kind == "s":
+                column = writer.blob(values)
+            else:
+                column = writer.blob(json.dumps(v) for v in values)
+            column["type"] = kind
+            spec["columns"][field] = column
+        ids = columns.get("id", [])
+        order = sorted(range(rows), key=ids.__getitem__)
+        spec["ids"] = writer.section(array("I", order))
+        header["collections"][name] = spec
+    data = json.dumps(header).encode("utf-8")
+    offset = writer.section(data)
+    f.seek(0)
+    f.write(_PREAMBLE.pack(MAGIC, offset, len(data)))
+
+
+class Row(Mapping):
+    """Record of one row, each field decoded when it is read."""
+
+    __slots__ = ("_readers", "_row")
+
+    def __init__(self, readers, row):
+        self._readers = readers
+        self._row = row
+
+    def __getitem__(self, field):
+        return self._readers[field](self._row)
+
+    def __iter__(self):
+        return iter(self._readers)
+
+    def __len__(self):
+        return len(self._readers)
+
+
+class MappedCollection:
+    """Read-only view over the rows of one collection."""
+
+    def __init__(self, snapshot, spec):
+        self.rows = spec["rows"]
+        self._readers = {}
+        self._id = None
+        for field, column in spec["columns"].items():
+            self._readers[field] = snapshot._reader(column, self.rows)
+            if field == "id":
+                self._id = snapshot._bytes_reader(column, self.rows)
+        self._order = snapshot._view(spec["ids"], "I", self.rows)
+
+    def __len__(self):
+        return self.rows
+
+    def id_at(self, row):
+        return self._id(row).decode("utf-8")
+
+    def row_of(self, obj_id):
+        """Row holding obj_id, or None."""
+        if not isinstance(obj_id, str) or not self.rows:
+            return None
+        key = obj_id.encode("utf-8")
+        order, read = self._order, self._id
+        low, high = 0, self.rows
+        while low < high:
+            mid = (low + high) // 2
+            if read(order[mid]) < key:
+                low = mid + 1
+            else:
+                high = mid
+        if low < self.rows and read(order[low]) == key:
+            return order[low]
+        return None
+
+    def record(self, row):
+        """The row's record, as a read-only mapping decoded on access."""
+        return Row(self._readers, row)
+
+
+class MappedSnapshot:
+    """A snapshot file mapped in memory, see write_snapshot()."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views = []
+        magic, offset, length = _PREAMBLE.unpack_from(self._mmap, 0)
+        if magic != MAGIC:
+            self._mmap.close()
+            raise ValueError("{} is not a snapshot file".format(path))
+        header = json.loads(self._mmap[offset:offset + length])
+        if header["byteorder"] != sys.byteorder:
+            self._mmap.close()
+            raise ValueError("{} was written on a {}-endian host".format(
+                path, header["byteorder"]
+            ))
+        self.meta = header["meta"]
+        self.collections = {
+            name: MappedCollection(self, spec)
+            for name, spec in header["collections"].items()
+        }
+
+    def _view(self, offset, typecode, count):
+        size = array(typecode).itemsize
+        view = memoryview(self._mmap)[offset:offset + size * count]
+        view = view.cast(typecode)
+        self._views.append(view)
+        return view
+
+    def _bytes_reader(self, column, rows):
+        offsets = self._view(column["offsets"], "Q", rows + 1)
+        data = self._view(column["data"], "B", offsets[rows])
+        return lambda row: data[offsets[row]:offsets[row + 1]].tobytes()
+
+    def _reader(self, column, rows):
+        kind = column["type"]
+        if kind == "?":
+            values = self._view(column["offset"], "B", rows)
+            return lambda row: bool(values[row])
+        if kind in "qd":
+            return self._view(column["offset"], kind, rows).__getitem__
+        read = self._bytes_reader(column, rows)
+        if kind == "s":
+            return lambda row: read(row).decode("utf-8")
+        return lambda row: _decode_json(read(row).decode("utf-8"))
+
+    def close(self):
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._mmap.close()
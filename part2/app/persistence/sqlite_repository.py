@@ -0,0 +1,373 @@
+import json
+import sqlite3
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from app.persistence.indexes import HashIndex
+from app.persistence.locks import RWLock
+from app.persistence.repository import Repository
+
+# Most recently used objects each SQLiteRepository holds strongly, on top
+# of its weak identity map.
+CACHE_SIZE = 10000
+
+
+class ConnectionPool:
+    """One sqlite3 connection per thread, opened on first use.
+
+    Connections run in WAL mode, so readers never wait for the writer, and
+    in autocommit mode: a single statement commits on its own and writes
+    spanning several statements go through transaction(). Connections of
+    threads that have exited are closed when a new one is opened.
+    """
+
+    def __init__(self, path, timeout=5.0):
+        self.path = path
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = {}
+
+    def connection(self):
+        conn = getattr(self._local, "connection", None)
+        if conn is None:
+            conn = self._local.connection = self._connect()
+        return conn
+
+    def _connect(self):
+        # sqlite3 keeps up to cached_statements prepared statements per
+        # connection, keyed by SQL text; repositories only use fixed SQL.
+        conn = sqlite3.connect(self.path, timeout=self.timeout,
+                               isolation_level=None,
+                               check_same_thread=False,
+                               cached_statements=256)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        with self._lock:
+            for thread in [t for t in self._connections if not t.is_alive()]:
+                self._connections.pop(thread).close()
+            self._connections[threading.current_thread()] = conn
+        return conn
+
+    @contextmanager
+    def transaction(self):
+        conn = self.connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def close(self):
+        with self._lock:
+            connections, self._connections = self._connections, {}
+            self._local = threading.local()
+        for conn in connections.values():
+            conn.close()
+
+
+class ColumnIndex:
+    """HashIndex stored as an indexed column of the repository table."""
+
+    def __init__(self, repo, index):
+        self.name = index.name
+        self.unique = index.unique
+        self.key = index.key
+        self._pool = repo.pool
+        table, column = repo.table, index.name
+        self._find_sql = (f"SELECT id FROM {table} WHERE {column} = ? "
+                          f"ORDER BY seq")
+        self._count_sql = f"SELECT COUNT(*) FROM {table} WHERE {column} = ?"
+        self._page_sql = (f"SELECT seq, id FROM {table} "
+                          f"WHERE {column} = ? AND seq > ? "
+                          f"ORDER BY seq LIMIT ?")
+
+    def find(self, value):
+        rows = self._pool.connection().execute(self._find_sql, (value,))
+        return [obj_id for obj_id, in rows]
+
+    def count(self, value):
+        conn = self._pool.connection()
+        return conn.execute(self._count_sql, (value,)).fetchone()[0]
+
+    def page(self, value, after=0, limit=None):
+        """Paginate the ids stored under value, in insertion order."""
+        rows = self._pool.connection().execute(self._page_sql, (
+            value, after, -1 if limit is None else limit + 1
+        )).fetchall()
+        next_cursor = None
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = rows[-1][0]
+        return [obj_id for _, obj_id in rows], next_cursor
+
+
+class SQLiteRepository(Repository):
+    """Repository keeping objects as JSON records in a SQLite table.
+
+    HashIndexes become indexed columns (unique ones backed by a UNIQUE
+    constraint) while the other indexes stay in memory and are rebuilt
+    from the table on startup. Loaded objects are kept in a weak identity
+    map, so callers holding an object all share the same instance; the
+    cache_size most recently used ones are also held strongly, so they
+    (and their to_dict() caches) outlive the request that loaded them.
+    Cursors are the table's AUTOINCREMENT sequence, which is never reused.
+    Writes hold `lock` exclusively, which keeps the in-memory indexes and
+    the table in step; callers of index() hold it shared.
+    """
+
+    def __init__(self, pool, table, model, indexes=None, resolve=None,
+                 cache_size=CACHE_SIZE):
+        self.pool = pool
+        self.table = table
+        self.model = model
+        self._resolve = resolve
+        self._identity = weakref.WeakValueDictionary()
+        self._recent = OrderedDict()
+        self._cache_size = cache_size
+        self._lock = threading.Lock()
+        self.lock = RWLock()
+        self._columns = {}
+        self._indexes = {}
+        self._version = 0
+
+        columns = [i for i in indexes or [] if isinstance(i, HashIndex)]
+        self._create_table(columns)
+        for index in columns:
+            self._columns[index.name] = ColumnIndex(self, index)
+        names = ["id", "data"] + [index.name for index in columns]
+        self._insert_sql = "INSERT INTO {} ({}) VALUES ({})".format(
+            table, ", ".join(names), ", ".join("?" * len(names))
+        )
+        self._update_sql = "UPDATE {} SET {} WHERE id = ?".format(
+            table, ", ".join(f"{name} = ?" for name in names[1:])
+        )
+        self._get_sql = f"SELECT id, data FROM {table} WHERE id = ?"
+        self._get_many_sql = (f"SELECT id, data FROM {table} WHERE id IN "
+                              f"(SELECT value FROM json_each(?))")
+        self._page_sql = (f"SELECT seq, id, data FROM {table} "
+                          f"WHERE seq > ? ORDER BY seq LIMIT ?")
+        self._delete_sql = f"DELETE FROM {table} WHERE id = ?"
+        self._by_column_sql = {
+            name: (f"SELECT id, data FROM {table} WHERE {name} = ? "
+                   f"ORDER BY seq LIMIT 1")
+            for name in self._columns
+        }
+
+        for index in indexes or []:
+            if not isinstance(index, HashIndex):
+                self.add_index(index)
+
+    def _create_table(self, columns):
+        conn = self.pool.connection()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS {} (seq INTEGER PRIMARY KEY "
+            "AUTOINCREMENT, id TEXT NOT NULL UNIQUE, data TEXT NOT NULL{})"
+            .format(self.table, "".join(f", {i.name}" for i in columns))
+        )
+        for index in columns:
+            # Non-unique lookups page by seq, so it is part of the key.
+            key = index.name if index.unique else f"{index.name}, seq"
+            conn.execute("CREATE {}INDEX IF NOT EXISTS {}_{} ON {} ({})"
+                         .format("UNIQUE " if index.unique else "",
+                                 self.table, index.name, self.table, key))
+
+    def add_index(self, index):
+        with self.lock.write():
+            for obj in self.iter_all():
+                index.insert(obj)
+            self._indexes[index.name] = index
+
+    def index(self, name):
+        """The index called name; use it while holding lock.read()."""
+        if name in self._columns:
+            return self._columns[name]
+        return self._indexes[name]
+
+    @property
+    def version(self):
+        """Counter bumped by every write made through this repository."""
+        return self._version
+
+    def _values(self, obj):
+        return [json.dumps(obj.to_record(), separators=(",", ":"))] + [
+            column.key(obj) for column in self._columns.values()
+        ]
+
+    def _load(self, obj_id, data):
+        obj = self._identity.get(obj_id)
+        if obj is None:
+            built = self.model.from_record(json.loads(data), self._resolve)
+            with self._lock:
+                obj = self._identity.setdefault(obj_id, built)
+        return obj
+
+    def _cached(self, obj_id):
+        """The object loaded under obj_id if still alive, else None."""
+        obj = self._identity.get(obj_id)
+        return None if obj is None else self._used(obj)
+
+    def _used(self, obj):
+        """Keep obj among the cache_size most recently used objects.
+
+        Only single lookups count as uses: a scan (pages, streams) would
+        otherwise push the objects actually in demand out.
+        """
+        with self._lock:
+            recent = self._recent
+            recent[obj.id] = obj
+            recent.move_to_end(obj.id)
+            if len(recent) > self._cache_size:
+                recent.popitem(last=False)
+        return obj
+
+    def _conflict(self, error):
+        # sqlite reports "UNIQUE constraint failed: <table>.<column>".
+        column = str(error).rsplit(".", 1)[-1]
+        return ValueError("{} already registered".format(column.capitalize()))
+
+    def _stored(self, obj):
+        self._identity[obj.id] = obj
+        self._used(obj)
+        for index in self._indexes.values():
+            index.insert(obj)
+        self._version += 1
+
+    def add(self, obj):
+        with self.lock.write():
+            for index in self._indexes.values():
+                index.check(obj)
+            try:
+                self.pool.connection().execute(
+                    self._insert_sql, [obj.id] + self._values(obj)
+                )
+            except sqlite3.IntegrityError as e:
+                raise self._conflict(e) from None
+            self._stored(obj)
+
+    def add_many(self, objs):
+        """Insert objs in a single transaction, one error (or None) each."""
+        errors = []
+        stored = []
+        with self.lock.write():
+            with self.pool.transaction() as conn:
+                for obj in objs:
+                    try:
+                        for index in self._indexes.values():
+                            index.check(obj)
+                        conn.execute(self._insert_sql,
+                                     [obj.id] + self._values(obj))
+                    except ValueError as e:
+                        errors.append(str(e))
+                    except sqlite3.IntegrityError as e:
+                        errors.append(str(self._conflict(e)))
+                    else:
+                        errors.append(None)
+                        stored.append(obj)
+            for obj in stored:
+                self._stored(obj)
+        return errors
+
+    def get(self, obj_id):
+        obj = self._cached(obj_id)
+        if obj is not None:
+            return obj
+        row = self.pool.connection().execute(
+            self._get_sql, (obj_id,)
+        ).fetchone()
+        return None if row is None else self._used(self._load(*row))
+
+    def get_many(self, obj_ids):
+        found = {}
+        missing = []
+        for obj_id in set(obj_ids):
+            obj = self._cached(obj_id)
+            if obj is not None:
+                found[obj_id] = obj
+            elif isinstance(obj_id, str):
+                missing.append(obj_id)
+        if missing:
+            rows = self.pool.connection().execute(
+                self._get_many_sql, (json.dumps(missing),)
+            )
+            for obj_id, data in rows.fetchall():
+                found[obj_id] = self._used(self._load(obj_id, data))
+        return found
+
+    def get_all(self):
+        return list(self.iter_all())
+
+    def page(self, limit, cursor=0):
+        """Return (objects, next_cursor) for the page following cursor."""
+        rows = self.pool.connection().execute(
+            self._page_sql, (cursor, limit + 1)
+        ).fetchall()
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = rows[-1][0]
+        objs = [self._load(obj_id, data) for _, obj_id, data in rows]
+        return objs, next_cursor
+
+    def update(self, obj_id, data):
+        with self.lock.write():
+            obj = self.get(obj_id)
+            if not obj:
+                return
+            previous = {key: getattr(obj, key) for key in data
+                        if hasattr(obj, key) and obj.writable(key)}
+            previous["updated_at"] = obj.updated_at
+            try:
+                obj.update(data)
+                for index in self._indexes.values():
+                    index.check(obj)
+                self.pool.connection().execute(
+                    self._update_sql, self._values(obj) + [obj.id]
+                )
+            except Exception as e:
+                for key, value in previous.items():
+                    setattr(obj, key, value)
+                # Bumped so a memoized to_dict drops the rejected values.
+                obj.touch()
+                if isinstance(e, sqlite3.IntegrityError):
+                    raise self._conflict(e) from None
+                raise
+            for index in self._indexes.values():
+                index.refresh(obj)
+            self._version += 1
+
+    def save(self, obj):
+        with self.lock.write():
+            cursor = self.pool.connection().execute(
+                self._update_sql, self._values(obj) + [obj.id]
+            )
+            if cursor.rowcount:
+                for index in self._indexes.values():
+                    index.refresh(obj)
+                self._version += 1
+
+    def delete(self, obj_id):
+        with self.lock.write():
+            cursor = self.pool.connection().execute(
+                self._delete_sql, (obj_id,)
+            )
+            if cursor.rowcount:
+                self._identity.pop(obj_id, None)
+                with self._lock:
+                    self._recent.pop(obj_id, None)
+                for index in self._indexes.values():
+                    index.remove(obj_id)
+                self._version += 1
+
+    def get_by_attribute(self, attr_name, attr_value):
+        sql = self._by_column_sql.get(attr_name)
+        if sql is not None:
+            row = self.pool.connection().execute(
+                sql, (attr_value,)
+            ).fetchone()
+            return None if row is None else self._used(self._load(*row))
+        return next((obj for obj in self.iter_all() if getattr
+                     (obj, attr_name) == attr_value), None)
@@ -0,0 +1,207 @@
+"""Stack-sampling profiler for slow requests and for the whole process.
+
+A Sampler thread reads the Python stack of the threads it watches every
+`interval` seconds (sys._current_frames()); no tracing hook is installed,
+so a watched request only pays for the samples taken while it runs.
+create_app() watches every request when HBNB_SLOW_REQUEST_MS is set and
+keeps the samples of those slower than that (see SlowRequests).
+
+Stacks are counted in the collapsed format of flamegraph.pl, speedscope
+and similar tools: one "outer;...;inner count" line per distinct stack,
+each frame written module:function.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+# Leaf frames of threads waiting for work rather than running Python.
+IDLE = {("threading", "wait"), ("selectors", "select"), ("queue", "get"),
+        ("concurrent.futures.thread", "_worker"),
+        ("socketserver", "serve_forever"), ("app.profiling", "_run")}
+
+_labels = {}
+
+
+def _label(frame):
+    code = frame.f_code
+    label = _labels.get(code)
+    if label is None:
+        module = frame.f_globals.get("__name__", "?")
+        label = _labels[code] = "{}:{}".format(module, code.co_name)
+    return label
+
+
+def collapse(frame):
+    """The stack ending at frame, outermost frame first."""
+    labels = []
+    while frame is not None:
+        labels.append(_label(frame))
+        frame = frame.f_back
+    labels.reverse()
+    return ";".join(labels)
+
+
+def _idle(frame):
+    return (frame.f_globals.get("__name__"), frame.f_code.co_name) in IDLE
+
+
+def folded(stacks):
+    """Collapsed-stack text of a Counter of stacks, heaviest first."""
+    return "".join("{} {}\n".format(stack, count)
+                   for stack, count in stacks.most_common())
+
+
+def profile_process(seconds, interval=0.005, idle=False):
+    """Sample every other thread for seconds; return a Counter of stacks.
+
+    Stacks are prefixed with the thread name. Threads waiting for work
+    are left out unless idle is true.
+    """
+    names = {t.ident: t.name for t in threading.enumerate()}
+    me = threading.get_ident()
+    stacks = Counter()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == me or (not idle and _idle(frame)):
+                continue
+            name = names.get(ident)
+            if name is None:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                name = names.get(ident, str(ident))
+            stacks[name + ";" + collapse(frame)] += 1
+        time.sleep(interval)
+    return stacks
+
+
+class Sampler:
+    """Background thread sampling the stacks of watched threads."""
+
+    def __init__(self, interval=0.005):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._watched = {}
+        self._pid = None
+
+    def watch(self, ident):
+        """Start counting the stacks of thread ident; return the Counter."""
+        stacks = Counter()
+        with self._lock:
+            # Threads do not survive fork(): each worker starts its own.
+            if self._pid != os.getpid():
+                self._pid = os.getpid()
+                threading.Thread(target=self._run, name="hbnb-sampler",
+                                 daemon=True).start()
+            self._watched[ident] = stacks
+        if not self._wake.is_set():
+            self._wake.set()
+        return stacks
+
+    def unwatch(self, ident):
+        with self._lock:
+            return self._watched.pop(ident, None)
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            time.sleep(self.interval)
+            with self._lock:
+                watched = list(self._watched.items())
+                if not watched:
+                    self._wake.clear()
+                    continue
+            frames = sys._current_frames()
+            for ident, stacks in watched:
+                frame = frames.get(ident)
+                if frame is not None:
+                    stacks[collapse(frame)] += 1
+
+
+class SlowRequests:
+    """Profiles of the requests that took at least threshold seconds.
+
+    The last `keep` are held in memory; with a directory, each is also
+    written there as <id>.json (details) and <id>.folded (stacks).
+    """
+
+    def __init__(self, threshold, sampler, directory=None, keep=100):
+        self.threshold = threshold
+        self.sampler = sampler
+        self.directory = directory
+        self._profiles = deque(maxlen=keep)
+        self._lock = threading.Lock()
+        self._serial = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def record(self, method, path, route, duration, stacks):
+        with self._lock:
+            self._serial += 1
+            profile_id = "{}-{}-{}".format(int(time.time()), os.getpid(),
+                                           self._serial)
+        profile = {
+            "id": profile_id,
+            "time": time.time(),
+            "method": method,
+            "path": path,
+            "route": route,
+            "handler": handler(stacks),
+            "facade_method": facade_method(stacks),
+            "duration_ms": round(duration * 1e3, 3),
+            "samples": sum(stacks.values()),
+            "stacks": folded(stacks),
+        }
+        with self._lock:
+            self._profiles.append(profile)
+        if self.directory:
+            base = os.path.join(self.directory, profile_id)
+            with open(base + ".folded", "w") as f:
+                f.write(profile["stacks"])
+            details = {k: v for k, v in profile.items() if k != "stacks"}
+            with open(base + ".json", "w") as f:
+                json.dump(details, f)
+        return profile
+
+    def recent(self):
+        """Profiles held in memory, the most recent first."""
+        with self._lock:
+            return list(reversed(self._profiles))
+
+    def get(self, profile_id):
+        with self._lock:
+            for profile in self._profiles:
+                if profile["id"] == profile_id:
+                    return profile
+        return None
+
+
+_HTTP_METHODS = {"get", "post", "put", "patch", "delete"}
+
+
+def facade_method(stacks):
+    """Public HBnBFacade method the most samples were taken in."""
+    return _outermost(stacks, lambda module, name: (
+        module == "app.services.facade" and not name.startswith("_")
+    ))
+
+
+def handler(stacks):
+    """v1 resource method the most samples were taken in."""
+    return _outermost(stacks, lambda module, name: (
+        module.startswith("app.api.v1.") and name in _HTTP_METHODS
+    ))
+
+
+def _outermost(stacks, match):
+    calls = Counter()
+    for stack, count in stacks.items():
+        for frame in stack.split(";"):
+            module, _, name = frame.partition(":")
+            if match(module, name):
+                calls[frame] += count
+                break
+    return calls.most_common(1)[0][0] if calls else None
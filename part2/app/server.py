@@ -0,0 +1,150 @@
+"""Pre-fork WSGI server for production, see serve.py.
+
+The dataset is loaded, indexed and serialized once in the parent process,
+then the workers are forked and share those pages copy-on-write. Two
+things would otherwise copy them into every worker:
+
+- the cyclic GC, which writes to the header of every object it visits:
+  gc.freeze() after loading moves them out of its reach;
+- lazy work on first use (snapshot rows, indexes, to_dict() caches):
+  HBnBFacade.warm() does it all before forking.
+
+Reference counts are still written when an object is read, so the pages
+a worker reads often end up copied; the rest stays shared.
+"""
+import gc
+import logging
+import os
+import signal
+import socket
+import time
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.serving import BaseWSGIServer, WSGIRequestHandler
+
+# A worker dying sooner than this after its fork is restarted after a
+# delay, doubled on every such death up to MAX_RESTART_DELAY seconds, so
+# a worker failing on startup does not make the parent fork in a loop.
+MIN_UPTIME = 1.0
+RESTART_DELAY = 0.1
+MAX_RESTART_DELAY = 30.0
+
+logger = logging.getLogger(__name__)
+
+
+class _Handler(WSGIRequestHandler):
+    # An idle keep-alive connection gives its pool thread back after this.
+    timeout = 5
+
+    def log_request(self, code="-", size="-"):
+        pass
+
+
+class PoolWSGIServer(BaseWSGIServer):
+    """Werkzeug server handing connections to a fixed pool of threads."""
+
+    multithread = True
+
+    def __init__(self, host, port, app, threads, fd=None):
+        super().__init__(host, port, app, handler=_Handler, fd=fd)
+        self.pool = ThreadPoolExecutor(threads, thread_name_prefix="request")
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process, request, client_address)
+
+    def _process(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+
+def serve(app, facade, host, port, workers=1, threads=8):
+    """Serve app with workers processes of threads threads each.
+
+    A single worker runs in this process and serves every request. With
+    more, each forked worker works on its own copy of the data, so they
+    only serve reads (the app answers 503 to writes) and the journal is
+    closed before forking.
+    """
+    facade.warm()
+    listener = socket.create_server((host, port), backlog=1024)
+    if workers <= 1:
+        gc.collect()
+        gc.freeze()
+        _run_worker(app, host, port, threads, listener)
+        return
+
+    app.config["READ_ONLY"] = True
+    if facade.journal is not None:
+        facade.journal.close()
+    if facade.backend == "sqlite":
+        # A sqlite connection must not be used on both sides of a fork.
+        facade.pool.close()
+    gc.collect()
+    gc.freeze()
+
+    children = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            status = 1
+            try:
+                _run_worker(app, host, port, threads, listener)
+                status = 0
+            except Exception:
+                logger.exception("Worker %d crashed", os.getpid())
+            finally:
+                # Never return into the parent's loop, whatever happened.
+                os._exit(status)
+        children[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            os.kill(pid, signal.SIGTERM)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for _ in range(workers):
+        spawn()
+    delay = 0.0
+    while children:
+        pid, status = os.wait()
+        uptime = time.monotonic() - children.pop(pid)
+        if stopping:
+            continue
+        if status:
+            logger.warning("Worker %d exited with status %d", pid,
+                           os.waitstatus_to_exitcode(status))
+        # A worker died: fork a new one from the same warm state.
+        delay = restart_delay(delay, uptime)
+        time.sleep(delay)
+        if not stopping:
+            spawn()
+    listener.close()
+
+
+def restart_delay(delay, uptime):
+    """Seconds to wait before replacing a worker that ran uptime seconds.
+
+    delay is the previous wait, 0 after a worker that ran long enough.
+    """
+    if uptime >= MIN_UPTIME:
+        return 0.0
+    return min(max(delay * 2, RESTART_DELAY), MAX_RESTART_DELAY)
+
+
+def _run_worker(app, host, port, threads, listener):
+    server = PoolWSGIServer(host, port, app, threads, fd=listener.fileno())
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        server.pool.shutdown(wait=False)
@@ -1,3 +1,41 @@
-from app.services.facade import HBnBFacade
+"""The settings of the process and its facade.
 
-facade = HBnBFacade()
+The facade, with its journal and tracer, is built by the first call to
+get_facade() (usually create_app() importing the API), so reading the
+settings does not open the journal or replay it.
+"""
+import os
+import threading
+from config import config
+
+settings = config[os.getenv('HBNB_CONFIG', 'default')]
+_lock = threading.Lock()
+_facade = None
+
+
+def get_facade():
+    """The facade of the process, built on first call."""
+    global _facade
+    if _facade is None:
+        with _lock:
+            if _facade is None:
+                _facade = _build()
+    return _facade
+
+
+def _build():
+    from app.metrics import registry
+    from app.persistence.journal import Journal
+    from app.services.facade import HBnBFacade
+    from app.tracing import JsonLinesExporter, Tracer
+
+    journal = None
+    if settings.JOURNAL:
+        journal = Journal(settings.JOURNAL, fsync=settings.JOURNAL_FSYNC,
+                          snapshot_interval=settings.SNAPSHOT_INTERVAL)
+    tracer = None
+    if settings.TRACE_FILE:
+        tracer = Tracer(JsonLinesExporter(settings.TRACE_FILE),
+                        settings.TRACE_SAMPLE_RATE)
+    return HBnBFacade(settings.REPOSITORY, settings.DATABASE, journal,
+                      registry if settings.METRICS else None, tracer)
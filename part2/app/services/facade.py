@@ -1,22 +1,192 @@
+import uuid
+from bisect import bisect_right
+from contextlib import ExitStack, contextmanager
+from operator import itemgetter
+from app.persistence.indexes import (
+    GridIndex, HashIndex, InvertedIndex, SortedIndex
+)
 from app.persistence.repository import InMemoryRepository
+from app.persistence.sqlite_repository import ConnectionPool, SQLiteRepository
+from app.tracing import span
 from app.models.amenity import Amenity
 from app.models.user import User
 from app.models.place import Place
 from app.models.review import Review
 
+# Repository operations timed and traced when instrumentation is on.
+REPOSITORY_OPERATIONS = ("add", "add_many", "get", "get_many", "get_all",
+                         "page", "update", "save", "delete",
+                         "get_by_attribute")
+
 
 class HBnBFacade:
-    def __init__(self):
-        self.user_repo = InMemoryRepository()
-        self.place_repo = InMemoryRepository()
-        self.review_repo = InMemoryRepository()
-        self.amenity_repo = InMemoryRepository()
+    def __init__(self, backend="memory", database=None, journal=None,
+                 metrics=None, tracer=None):
+        # Distinguishes this facade's versions from a previous process'.
+        self.epoch = uuid.uuid4().hex[:8]
+        self.backend = backend
+        if backend == "sqlite":
+            self.pool = ConnectionPool(database)
+        elif backend != "memory":
+            raise ValueError("Unknown repository backend: {}".format(backend))
+        if journal is not None and backend != "memory":
+            raise ValueError("A journal requires the memory backend")
+        self.journal = journal
+        # A metrics Registry and a Tracer instrumenting the facade and
+        # repository calls, see _instrument().
+        self.metrics = metrics
+        self.tracer = tracer
+        self._repos = {}
+        self._models = {}
+        # Places and reviews resolve users/amenities/places when loaded, so
+        # the repositories are created in dependency order.
+        self.user_repo = self._repository("users", User, [
+            HashIndex("email", unique=True),
+        ])
+        self.amenity_repo = self._repository("amenities", Amenity)
+        # record_key computes the same keys from stored records, which lets
+        # snapshot rows be indexed without building the objects.
+        self.place_repo = self._repository("places", Place, [
+            GridIndex("location",
+                      key=lambda place: (place.latitude, place.longitude),
+                      record_key=lambda r: (r["latitude"], r["longitude"])),
+            SortedIndex("price"),
+            InvertedIndex("amenities", key=lambda place: frozenset(
+                amenity.id for amenity in place.amenities
+            ), record_key=lambda r: frozenset(r["amenities"])),
+            SortedIndex("rating", key=lambda place: (
+                place.average_rating or 0.0, place.review_count
+            ), record_key=lambda r: (
+                r["rating_sum"] / r["review_count"] if r["review_count"]
+                else 0.0, r["review_count"]
+            )),
+        ])
+        self.review_repo = self._repository("reviews", Review, [
+            HashIndex("place_id", key=lambda review: review.place.id,
+                      record_key=itemgetter("place_id")),
+        ])
+        if journal is not None:
+            for collection, repo in self._repos.items():
+                journal.attach(collection, repo, self._models[collection])
+            journal.recover()
+            journal.start()
+        self._instrument()
+
+    def _repository(self, collection, model, indexes=None):
+        if self.backend == "sqlite":
+            repo = SQLiteRepository(self.pool, collection, model, indexes,
+                                    resolve=self._resolve)
+        else:
+            repo = InMemoryRepository(indexes=indexes)
+        self._instrument_repository(repo, collection)
+        self._repos[collection] = repo
+        self._models[collection] = model
+        return repo
+
+    def _instrument(self):
+        """Wrap the public methods in tracer spans and metrics timers.
+
+        Wrappers left by a previous __init__ are dropped first.
+        """
+        cls = type(self)
+        for name in dir(cls):
+            method = getattr(cls, name)
+            if name.startswith("_") or not callable(method):
+                continue
+            vars(self).pop(name, None)
+            fn = getattr(self, name)
+            if self.tracer is not None:
+                fn = self.tracer.wrap(fn, "facade." + name)
+            if self.metrics is not None:
+                fn = self.metrics.wrap_facade(fn, name)
+            if self.tracer is not None or self.metrics is not None:
+                setattr(self, name, fn)
+
+    def _instrument_repository(self, repo, collection):
+        for name in REPOSITORY_OPERATIONS:
+            vars(repo).pop(name, None)
+            fn = getattr(repo, name)
+            if self.tracer is not None:
+                fn = self.tracer.wrap(fn, "repository." + name,
+                                      collection=collection)
+            if self.metrics is not None:
+                fn = self.metrics.wrap_repository(fn, collection, name)
+            setattr(repo, name, fn)
+
+    @contextmanager
+    def _atomic(self, *writes, read=()):
+        """Hold the write locks of writes and the read locks of read.
+
+        Locks are taken in repository creation order, so two operations
+        spanning the same repositories cannot deadlock. The repositories
+        created before a written one are held shared too: building one of
+        its snapshot rows reads them. Journal commits are waited for once
+        the locks are released.
+        """
+        modes = {id(repo): "read" for repo in read}
+        modes.update((id(repo), "write") for repo in writes)
+        repos = list(self._repos.values())
+        last = max((repos.index(repo) for repo in writes), default=0)
+        for repo in repos[:last]:
+            modes.setdefault(id(repo), "read")
+        with ExitStack() as stack:
+            if self.journal is not None:
+                stack.enter_context(self.journal.batch())
+            for repo in repos:
+                mode = modes.get(id(repo))
+                if mode == "write":
+                    stack.enter_context(repo.lock.write())
+                elif mode == "read":
+                    stack.enter_context(repo.lock.read())
+            yield
+
+    def warm(self):
+        """Load and index the whole dataset now rather than on first use.
+
+        Called before forking workers, which then share the result.
+        """
+        for repo in self._repos.values():
+            repo.warm()
+
+    def _resolve(self, collection, obj_id):
+        return self._repos[collection].get(obj_id)
+
+    def collection_version(self, collection):
+        """Version of a whole collection, bumped by any write to it."""
+        return self._repos[collection].version
 
     def create_user(self, user_data):
+        # The unique email index rejects duplicates inside add(), so there
+        # is no window between checking and storing the user.
         user = User(**user_data)
         self.user_repo.add(user)
         return user
 
+    def create_users(self, batch):
+        """Create many users, returning one (user, error) pair per item."""
+        results = []
+        for user_data in batch:
+            try:
+                results.append((User(**user_data), None))
+            except TypeError:
+                results.append((None, "Invalid input data"))
+            except ValueError as e:
+                results.append((None, str(e)))
+        return self._add_many(self.user_repo, results)
+
+    def _add_many(self, repo, results):
+        """Store the built objects of (obj, error) pairs in one batch."""
+        built = [obj for obj, _ in results if obj is not None]
+        errors = iter(repo.add_many(built))
+        stored = []
+        for obj, error in results:
+            if obj is not None:
+                error = next(errors)
+                if error is not None:
+                    obj = None
+            stored.append((obj, error))
+        return stored
+
     # User
     def get_user(self, user_id):
         return self.user_repo.get(user_id)
@@ -27,6 +197,12 @@ class HBnBFacade:
     def get_all_users(self):
         return self.user_repo.get_all()
 
+    def get_users_page(self, limit, cursor=0):
+        return self.user_repo.page(limit, cursor)
+
+    def iter_users(self):
+        return self.user_repo.iter_all()
+
     def update_user(self, user_id, user_data):
         user = self.user_repo.get(user_id)
         if not user:
@@ -44,12 +220,30 @@ class HBnBFacade:
 
         return amenity
 
+    def create_amenities(self, batch):
+        """Create many amenities, one (amenity, error) pair per item."""
+        results = []
+        for amenity_data in batch:
+            try:
+                if "name" not in amenity_data:
+                    raise ValueError("Name is required")
+                results.append((Amenity(name=amenity_data["name"]), None))
+            except ValueError as e:
+                results.append((None, str(e)))
+        return self._add_many(self.amenity_repo, results)
+
     def get_amenity(self, amenity_id):
         return self.amenity_repo.get(amenity_id)
 
     def get_all_amenities(self):
         return self.amenity_repo.get_all()
 
+    def get_amenities_page(self, limit, cursor=0):
+        return self.amenity_repo.page(limit, cursor)
+
+    def iter_amenities(self):
+        return self.amenity_repo.iter_all()
+
     def update_amenity(self, amenity_id, amenity_data):
         amenity = self.amenity_repo.get(amenity_id)
         if not amenity:
@@ -58,20 +252,36 @@ class HBnBFacade:
         self.amenity_repo.update(amenity_id, amenity_data)
         return amenity
 
+    def delete_amenity(self, amenity_id):
+        # A place created meanwhile could otherwise keep the amenity.
+        with self._atomic(self.amenity_repo, self.place_repo):
+            amenity = self.amenity_repo.get(amenity_id)
+            if not amenity:
+                return False
+
+            place_ids, _ = self.place_repo.index("amenities").match_all(
+                [amenity_id]
+            )
+            for place in self._get_places(place_ids):
+                self.place_repo.update(place.id, {"amenities": [
+                    a for a in place.amenities if a.id != amenity_id
+                ]})
+            self.amenity_repo.delete(amenity_id)
+        return True
+
     # Place
-    def create_place(self, place_data):
-        owner_id = place_data.get("owner_id")
-        owner = self.get_user(owner_id)
+    def _build_place(self, place_data, owners, amenities):
+        """Build a Place from ids already resolved into owners/amenities."""
+        owner = owners.get(place_data.get("owner_id"))
         if not owner:
             raise ValueError("Owner not found")
 
-        amenity_ids = place_data.get("amenities", [])
-        amenities = []
-        for amenity_id in amenity_ids:
-            amenity = self.get_amenity(amenity_id)
+        place_amenities = []
+        for amenity_id in place_data.get("amenities", []):
+            amenity = amenities.get(amenity_id)
             if not amenity:
                 raise ValueError("Amenity not found")
-            amenities.append(amenity)
+            place_amenities.append(amenity)
 
         place = Place(
             title=place_data["title"],
@@ -82,12 +292,49 @@ class HBnBFacade:
             owner=owner,
         )
 
-        for amenity in amenities:
+        for amenity in place_amenities:
             place.add_amenity(amenity)
+        return place
 
-        self.place_repo.add(place)
+    def create_place(self, place_data):
+        # Amenities cannot be deleted between their lookup and the add.
+        with self._atomic(self.place_repo, read=[self.amenity_repo]):
+            with span("resolve_references"):
+                owners = self.user_repo.get_many(
+                    [place_data.get("owner_id")]
+                )
+                amenities = self.amenity_repo.get_many(
+                    place_data.get("amenities", [])
+                )
+                place = self._build_place(place_data, owners, amenities)
+            self.place_repo.add(place)
         return place
 
+    def create_places(self, batch):
+        """Create many places, one (place, error) pair per item.
+
+        Owner and amenity ids of the whole batch are resolved in a single
+        lookup per repository.
+        """
+        with self._atomic(self.place_repo, read=[self.amenity_repo]):
+            with span("resolve_references", items=len(batch)):
+                owners = self.user_repo.get_many(
+                    data.get("owner_id") for data in batch
+                )
+                amenities = self.amenity_repo.get_many(
+                    amenity_id for data in batch
+                    for amenity_id in data.get("amenities", [])
+                )
+                results = []
+                for place_data in batch:
+                    try:
+                        results.append((self._build_place(
+                            place_data, owners, amenities
+                        ), None))
+                    except ValueError as e:
+                        results.append((None, str(e)))
+            return self._add_many(self.place_repo, results)
+
     def get_place(self, place_id):
         # Placeholder for logic to retrieve a place by ID,
         # including associated owner and amenities
@@ -97,13 +344,123 @@ class HBnBFacade:
         # Placeholder for logic to retrieve all places
         return self.place_repo.get_all()
 
+    def get_places_page(self, limit, cursor=0):
+        return self.place_repo.page(limit, cursor)
+
+    def iter_places(self):
+        return self.place_repo.iter_all()
+
+    def _get_places(self, ids):
+        places = [self.place_repo.get(place_id) for place_id in ids]
+        return [p for p in places if p is not None]
+
+    def get_places_by_price(self, min_price=None, max_price=None,
+                            limit=None, cursor=None, amenity_ids=None):
+        """Return (places, next_cursor) in price order within the range.
+
+        With amenity_ids only places having all of them are returned; the
+        amenity index then drives the query and its matches get sorted.
+        """
+        if not amenity_ids:
+            with self.place_repo.lock.read():
+                ids, next_cursor = self.place_repo.index("price").range(
+                    min_price, max_price, after=cursor, limit=limit
+                )
+            return self._get_places(ids), next_cursor
+
+        with self.place_repo.lock.read():
+            ids, _ = self.place_repo.index("amenities").match_all(
+                amenity_ids
+            )
+        entries = sorted(
+            (p.price, p.id) for p in self._get_places(ids)
+            if (min_price is None or p.price >= min_price)
+            and (max_price is None or p.price <= max_price)
+        )
+        start = 0 if cursor is None else bisect_right(entries, tuple(cursor))
+        stop = len(entries) if limit is None else start + limit
+        page = entries[start:stop]
+        next_cursor = page[-1] if page and stop < len(entries) else None
+        return self._get_places(i for _, i in page), next_cursor
+
+    def iter_places_by_price(self, min_price=None, max_price=None,
+                             amenity_ids=None):
+        cursor = None
+        while True:
+            places, cursor = self.get_places_by_price(
+                min_price, max_price, 1000, cursor, amenity_ids
+            )
+            yield from places
+            if cursor is None:
+                return
+
+    def get_places_with_amenities(self, amenity_ids, limit=None, cursor=0):
+        """Return (places, next_cursor) of places having every amenity."""
+        with self.place_repo.lock.read():
+            ids, next_cursor = self.place_repo.index("amenities").match_all(
+                amenity_ids, after=cursor, limit=limit
+            )
+        return self._get_places(ids), next_cursor
+
+    def iter_places_with_amenities(self, amenity_ids):
+        cursor = 0
+        while cursor is not None:
+            places, cursor = self.get_places_with_amenities(
+                amenity_ids, 1000, cursor
+            )
+            yield from places
+
+    def get_top_rated_places(self, k):
+        """Return the k places with the best average rating.
+
+        Unrated places sort last in the rating index and are left out.
+        """
+        with self.place_repo.lock.read():
+            ids = self.place_repo.index("rating").last(k)
+        return [p for p in self._get_places(ids) if p.review_count]
+
+    def search_places_in_bbox(self, min_lat, min_lon, max_lat, max_lon):
+        with self.place_repo.lock.read():
+            ids = self.place_repo.index("location").bbox(
+                min_lat, min_lon, max_lat, max_lon
+            )
+        return [self.place_repo.get(place_id) for place_id in ids]
+
+    def search_places_near(self, latitude, longitude, radius_km=None,
+                           k=None):
+        """Return (place, distance_km) pairs, nearest first.
+
+        Either every place within radius_km, or the k nearest places
+        (limited to radius_km when both are given).
+        """
+        with self.place_repo.lock.read():
+            index = self.place_repo.index("location")
+            if k is None:
+                found = index.within(latitude, longitude, radius_km)
+            else:
+                found = index.nearest(latitude, longitude, k)
+        if k is not None and radius_km is not None:
+            found = [(d, i) for d, i in found if d <= radius_km]
+        return [(self.place_repo.get(place_id), distance)
+                for distance, place_id in found]
+
     def update_place(self, place_id, place_data):
+        with self._atomic(self.place_repo, read=[self.amenity_repo]):
+            return self._update_place(place_id, place_data)
+
+    def _update_place(self, place_id, place_data):
         place = self.place_repo.get(place_id)
         if not place:
             return None
 
         updated_data = dict(place_data)
+        with span("resolve_references"):
+            self._resolve_place_references(updated_data)
+        self.place_repo.update(place_id, updated_data)
+        return place
 
+    def _resolve_place_references(self, updated_data):
+        """Replace owner_id and amenity ids in updated_data by objects."""
         if "owner_id" in updated_data:
             owner = self.get_user(updated_data["owner_id"])
             if not owner:
@@ -118,35 +475,75 @@ class HBnBFacade:
                 if not amenity:
                     raise ValueError("Amenity not found")
                 amenities.append(amenity)
-            place.amenities = amenities
-            del updated_data["amenities"]
-
-        self.place_repo.update(place_id, updated_data)
-        return place
+            # Goes through the repository so the amenity index follows.
+            updated_data["amenities"] = amenities
 
     # Review
-    def create_review(self, review_data):
-        user_id = review_data.get("user_id")
-        place_id = review_data.get("place_id")
-
-        user = self.get_user(user_id)
+    def _build_review(self, review_data, users, places):
+        """Build a Review from ids already resolved into users/places."""
+        user = users.get(review_data.get("user_id"))
         if not user:
             raise ValueError("User not found")
 
-        place = self.get_place(place_id)
+        place = places.get(review_data.get("place_id"))
         if not place:
             raise ValueError("Place not found")
 
-        review = Review(
+        return Review(
             text=review_data["text"],
             rating=review_data["rating"],
             place=place,
             user=user,
         )
-        self.review_repo.add(review)
-        place.add_review(review)
+
+    def create_review(self, review_data):
+        # The review and its place's aggregates change together.
+        with self._atomic(self.place_repo, self.review_repo):
+            with span("resolve_references"):
+                users = self.user_repo.get_many(
+                    [review_data.get("user_id")]
+                )
+                places = self.place_repo.get_many(
+                    [review_data.get("place_id")]
+                )
+                review = self._build_review(review_data, users, places)
+            self.review_repo.add(review)
+            review.place.add_review(review)
+            self.place_repo.save(review.place)
         return review
 
+    def create_reviews(self, batch):
+        """Create many reviews, one (review, error) pair per item.
+
+        User and place ids are resolved in one lookup per repository and
+        each touched place is re-indexed once for the whole batch.
+        """
+        with self._atomic(self.place_repo, self.review_repo):
+            with span("resolve_references", items=len(batch)):
+                users = self.user_repo.get_many(
+                    data.get("user_id") for data in batch
+                )
+                places = self.place_repo.get_many(
+                    data.get("place_id") for data in batch
+                )
+                results = []
+                for review_data in batch:
+                    try:
+                        results.append((self._build_review(
+                            review_data, users, places
+                        ), None))
+                    except ValueError as e:
+                        results.append((None, str(e)))
+            results = self._add_many(self.review_repo, results)
+            touched = {}
+            for review, _ in results:
+                if review is not None:
+                    review.place.add_review(review)
+                    touched[review.place.id] = review.place
+            for place in touched.values():
+                self.place_repo.save(place)
+        return results
+
     def get_review(self, review_id):
         # Placeholder for logic to retrieve a review by ID
         return self.review_repo.get(review_id)
@@ -155,30 +552,51 @@ class HBnBFacade:
         # Placeholder for logic to retrieve all reviews
         return self.review_repo.get_all()
 
+    def get_reviews_page(self, limit, cursor=0):
+        return self.review_repo.page(limit, cursor)
+
+    def iter_reviews(self):
+        return self.review_repo.iter_all()
+
     def get_reviews_by_place(self, place_id):
-        return [r for r in self.review_repo.get_all()
-                if r.place.id == place_id]
+        with self.review_repo.lock.read():
+            ids = self.review_repo.index("place_id").find(place_id)
+        return [self.review_repo.get(review_id) for review_id in ids]
 
-    def update_review(self, review_id, review_data):
-        review = self.review_repo.get(review_id)
-        if not review:
-            return None
+    def get_reviews_page_by_place(self, place_id, limit, cursor=0):
+        with self.review_repo.lock.read():
+            ids, next_cursor = self.review_repo.index("place_id").page(
+                place_id, cursor, limit
+            )
+        return [self.review_repo.get(i) for i in ids], next_cursor
 
+    def update_review(self, review_id, review_data):
         updated_data = {
             key: value for key, value in review_data.items()
             if key in ["text", "rating"]
         }
 
-        self.review_repo.update(review_id, updated_data)
+        with self._atomic(self.place_repo, self.review_repo):
+            review = self.review_repo.get(review_id)
+            if not review:
+                return None
+
+            old_rating = review.rating
+            self.review_repo.update(review_id, updated_data)
+            if review.rating != old_rating:
+                review.place.change_review_rating(old_rating, review.rating)
+                self.place_repo.save(review.place)
         return review
 
     def delete_review(self, review_id):
-        review = self.review_repo.get(review_id)
-        if not review:
-            return False
-
-        self.review_repo.delete(review_id)
-        review.place.reviews = [
-            r for r in review.place.reviews if r.id != review_id
-        ]
+        # Looked up under the locks: of two concurrent deletes, only one
+        # finds the review and takes its rating off the place.
+        with self._atomic(self.place_repo, self.review_repo):
+            review = self.review_repo.get(review_id)
+            if not review:
+                return False
+
+            self.review_repo.delete(review_id)
+            review.place.remove_review(review)
+            self.place_repo.save(review.place)
         return True
@@ -0,0 +1,164 @@
+"""Request tracing: nested spans written to a JSON-lines file.
+
+A sampled request opens a root span (see create_app()); span() then opens
+children wherever it is called: payload validation, the facade method,
+reference resolution, repository operations, to_dict() cache misses and
+the JSON encoding of the response. Outside a sampled request span()
+returns a shared no-op context, so the unsampled cost is one ContextVar
+lookup.
+
+Each span is one line in the Chrome trace event format. The file loads
+into Perfetto or chrome://tracing once wrapped in an array:
+    jq -s '{traceEvents: .}' traces.jsonl > trace.json
+"""
+import json
+import os
+import random
+import threading
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+_current = ContextVar("hbnb_span", default=None)
+_random_bits = random.getrandbits
+# Attributes may hold any value; the ones JSON lacks are written as str().
+_encode = json.JSONEncoder(default=str, separators=(",", ":")).encode
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start",
+                 "duration", "attrs", "thread", "finished")
+
+    def __init__(self, name, parent, attrs):
+        self.name = name
+        # Ids are random integers, formatted in hex on export.
+        if parent is None:
+            self.trace_id = _random_bits(128)
+            self.parent_id = None
+            self.finished = []
+        else:
+            self.trace_id = parent.trace_id
+            self.parent_id = parent.span_id
+            self.finished = parent.finished
+        self.span_id = _random_bits(64)
+        self.attrs = attrs
+        self.thread = threading.get_ident()
+        self.start = time.perf_counter()
+        self.duration = None
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+class _Noop:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP = _Noop()
+
+
+class _Open:
+    """Context manager opening a span under parent (None for a root)."""
+
+    __slots__ = ("name", "parent", "attrs", "exporter", "span", "token")
+
+    def __init__(self, name, parent, attrs, exporter=None):
+        self.name = name
+        self.parent = parent
+        self.attrs = attrs
+        self.exporter = exporter
+
+    def __enter__(self):
+        self.span = Span(self.name, self.parent, self.attrs)
+        self.token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        span = self.span
+        span.duration = time.perf_counter() - span.start
+        _current.reset(self.token)
+        if exc_type is not None:
+            span.attrs["error"] = exc_type.__name__
+        span.finished.append(span)
+        if self.exporter is not None:
+            self.exporter.export(span.finished)
+        return False
+
+
+def span(name, **attrs):
+    """Context manager timing a child of the current span, if any."""
+    parent = _current.get()
+    if parent is None:
+        return _NOOP
+    return _Open(name, parent, attrs)
+
+
+def current_span():
+    return _current.get()
+
+
+class Tracer:
+    """Starts the root spans of sampled requests and exports traces.
+
+    sample_rate is the fraction of requests traced; a request can also
+    ask to be traced (create_app() honours an X-HBnB-Trace header when
+    TRACE_HEADER is set).
+    """
+
+    def __init__(self, exporter, sample_rate=0.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def trace(self, name, force=False, **attrs):
+        """Root span of a new trace, or a no-op if it is not sampled."""
+        if not force and random.random() >= self.sample_rate:
+            return _NOOP
+        return _Open(name, None, attrs, self.exporter)
+
+    def wrap(self, fn, name, **attrs):
+        """fn opening a span called name when called in a trace."""
+        @wraps(fn)
+        def traced(*args, **kwargs):
+            parent = _current.get()
+            if parent is None:
+                return fn(*args, **kwargs)
+            with _Open(name, parent, dict(attrs)):
+                return fn(*args, **kwargs)
+        return traced
+
+
+class JsonLinesExporter:
+    """Appends finished traces to path, one Chrome trace event per span."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        # Spans are timed with perf_counter; this maps them to wall time.
+        self._epoch = time.time() - time.perf_counter()
+        self._file = open(path, "a", encoding="utf-8")
+
+    def export(self, spans):
+        pid = os.getpid()
+        lines = []
+        for s in spans:
+            args = dict(s.attrs, trace_id="%032x" % s.trace_id,
+                        span_id="%016x" % s.span_id)
+            if s.parent_id is not None:
+                args["parent_id"] = "%016x" % s.parent_id
+            lines.append(_encode({
+                "name": s.name, "ph": "X", "pid": pid, "tid": s.thread,
+                "ts": round((self._epoch + s.start) * 1e6, 1),
+                "dur": round(s.duration * 1e6, 1),
+                "args": args,
+            }))
+        with self._lock:
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,5 @@
+from app.asgi import create_asgi_app
+from app.services import settings
+
+# uvicorn asgi:app --port 8000
+app = create_asgi_app(max_workers=settings.THREADS)
@@ -0,0 +1,82 @@
+"""Repository operations on the in-memory and SQLite backends.
+
+Run from part2/:
+    python -m benchmarks.bench_backends --users 20000
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from app.models.user import User
+from app.services.facade import HBnBFacade
+
+
+def timed(ops, count, run):
+    start = time.perf_counter()
+    run()
+    ops.append(count / (time.perf_counter() - start))
+
+
+def measure(facade, count):
+    repo = facade.user_repo
+    users = [User("Bench", "User", f"u{i}@bench.test") for i in range(count)]
+    half = count // 2
+    ids = [user.id for user in users]
+    lookups = random.Random(0).sample(range(count), min(count, 5000))
+    ops = []
+
+    def add_single():
+        for user in users[:half]:
+            repo.add(user)
+
+    def add_batch():
+        for i in range(half, count, 500):
+            repo.add_many(users[i:i + 500])
+
+    def get():
+        for i in lookups:
+            repo.get(ids[i])
+
+    def by_email():
+        for i in lookups:
+            repo.get_by_attribute("email", f"u{i}@bench.test")
+
+    def page():
+        sum(1 for _ in repo.iter_all(500))
+
+    def update():
+        for i in lookups[:1000]:
+            repo.update(ids[i], {"last_name": "Updated"})
+
+    timed(ops, half, add_single)
+    timed(ops, count - half, add_batch)
+    timed(ops, len(lookups), get)
+    timed(ops, len(lookups), by_email)
+    # Cold reads: drop the objects so SQLite has to rebuild them.
+    del users
+    timed(ops, count, page)
+    timed(ops, min(len(lookups), 1000), update)
+    return ops
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=20000)
+    args = parser.parse_args()
+
+    results = {"memory": measure(HBnBFacade("memory"), args.users)}
+    with tempfile.TemporaryDirectory() as tmp:
+        facade = HBnBFacade("sqlite", os.path.join(tmp, "bench.db"))
+        results["sqlite"] = measure(facade, args.users)
+        facade.pool.close()
+
+    names = ("add", "add_many", "get", "by email", "scan", "update")
+    print(f"{'ops/s':>10}" + "".join(f"{name:>12}" for name in names))
+    for backend, ops in results.items():
+        print(f"{backend:>10}" + "".join(f"{op:>12.0f}" for op in ops))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Throughput of single-item POSTs against /batch endpoints.
+
+Run from part2/:
+    python -m benchmarks.bench_batch --items 2000 --batch-size 500
+"""
+import argparse
+import time
+
+from app import create_app
+from app.services import get_facade
+
+facade = get_facade()
+
+
+def payloads(kind, count, refs):
+    if kind == "users":
+        return [{"first_name": "Bench", "last_name": "User",
+                 "email": f"{refs['run']}-{i}@bench.test"}
+                for i in range(count)]
+    if kind == "amenities":
+        return [{"name": f"Amenity {i}"} for i in range(count)]
+    if kind == "places":
+        return [{"title": f"Place {i}", "description": "", "price": 80.0,
+                 "latitude": 45.0, "longitude": 5.0,
+                 "owner_id": refs["user"], "amenities": refs["amenities"]}
+                for i in range(count)]
+    return [{"text": "Nice", "rating": 1 + i % 5, "user_id": refs["user"],
+             "place_id": refs["place"]} for i in range(count)]
+
+
+def single(client, kind, items):
+    for item in items:
+        r = client.post(f'/api/v1/{kind}/', json=item)
+        assert r.status_code == 201, r.get_json()
+
+
+def batched(client, kind, items, size):
+    for i in range(0, len(items), size):
+        r = client.post(f'/api/v1/{kind}/batch', json=items[i:i + size])
+        assert r.status_code == 201, r.get_json()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    facade.__init__()
+    client = create_app().test_client()
+    user = client.post('/api/v1/users/', json={
+        "first_name": "Owner", "last_name": "Bench",
+        "email": "owner@bench.test"}).get_json()["id"]
+    amenities = [client.post('/api/v1/amenities/', json={
+        "name": f"Seed {i}"}).get_json()["id"] for i in range(3)]
+    place = client.post('/api/v1/places/', json=payloads(
+        "places", 1, {"user": user, "amenities": amenities})[0]
+    ).get_json()["id"]
+
+    print(f"{'collection':>10} {'single/s':>10} {'batch/s':>10} {'speedup':>8}")
+    for kind in ("users", "amenities", "places", "reviews"):
+        rates = []
+        for run, mode in enumerate(("single", "batch")):
+            refs = {"run": mode, "user": user, "amenities": amenities,
+                    "place": place}
+            items = payloads(kind, args.items, refs)
+            start = time.perf_counter()
+            if mode == "single":
+                single(client, kind, items)
+            else:
+                batched(client, kind, items, args.batch_size)
+            rates.append(args.items / (time.perf_counter() - start))
+        print(f"{kind:>10} {rates[0]:>10.0f} {rates[1]:>10.0f} "
+              f"{rates[1] / rates[0]:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Facade startup time from a binary snapshot versus a log replay.
+
+Run from part2/:
+    python -m benchmarks.bench_cold_start --sizes 10000,100000,1000000
+"""
+import argparse
+import random
+import tempfile
+import time
+
+from app.models.place import Place
+from app.models.review import Review
+from app.models.user import User
+from app.persistence.journal import Journal
+from app.services.facade import HBnBFacade
+
+
+def seed(directory, places, snapshot):
+    """Write places places, with one review each and 100 places per owner."""
+    rng = random.Random(0)
+    facade = HBnBFacade(journal=Journal(directory, fsync="never"))
+    users = [User("Bench", "User", f"{i}@bench.test")
+             for i in range(max(1, places // 100))]
+    facade.user_repo.add_many(users)
+    for start in range(0, places, 10000):
+        batch = [Place(f"Place {i}", "", rng.uniform(10, 500),
+                       rng.uniform(-60, 70), rng.uniform(-180, 180),
+                       users[i % len(users)])
+                 for i in range(start, min(places, start + 10000))]
+        reviews = [Review("Nice", rng.randint(1, 5), place, place.owner)
+                   for place in batch]
+        # Rating aggregates are set before the places are stored, which
+        # keeps seeding linear.
+        for review in reviews:
+            review.place.add_review(review)
+        facade.place_repo.add_many(batch)
+        facade.review_repo.add_many(reviews)
+    if snapshot:
+        facade.journal.snapshot()
+    facade.journal.close()
+    return users[0].id
+
+
+def measure(directory, probe_id):
+    start = time.perf_counter()
+    facade = HBnBFacade(journal=Journal(directory))
+    ready = time.perf_counter() - start
+    user = facade.get_user(probe_id)
+    assert user is not None
+    first_get = time.perf_counter() - start - ready
+    indexer = facade.journal._indexer
+    if indexer is not None:
+        indexer.join()
+    indexed = time.perf_counter() - start
+    facade.journal.close()
+    return ready, first_get, indexed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000")
+    args = parser.parse_args()
+
+    print(f"{'places':>9} {'source':>9} {'ready (s)':>10} "
+          f"{'get (ms)':>9} {'indexed (s)':>12}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        for snapshot in (False, True):
+            with tempfile.TemporaryDirectory() as tmp:
+                probe = seed(tmp, size, snapshot)
+                ready, first_get, indexed = measure(tmp, probe)
+            source = "snapshot" if snapshot else "log"
+            print(f"{size:>9} {source:>9} {ready:>10.3f} "
+                  f"{first_get * 1e3:>9.2f} {indexed:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Facade throughput under concurrent readers and writers.
+
+Each workload mixes review writes (create, re-rate, delete), which lock
+the place and review repositories together, with reads (place lookups,
+review pages, top rated places). The "journal" column logs writes with
+fsync="always", where writers wait for the group commit outside the locks.
+
+Run from part2/:
+    python -m benchmarks.bench_concurrency --operations 20000
+"""
+import argparse
+import random
+import tempfile
+import threading
+import time
+
+from app.persistence.journal import Journal
+from app.services.facade import HBnBFacade
+
+WORKLOADS = {"reads": 0.0, "mixed": 0.2, "writes": 1.0}
+
+
+def seed(facade, places):
+    owner = facade.create_user({
+        "first_name": "Bench", "last_name": "User",
+        "email": "owner@bench.test",
+    })
+    place_ids = [p.id for p, _ in facade.create_places([{
+        "title": f"Place {i}", "price": 10.0 + i, "latitude": 48.0,
+        "longitude": 2.0, "owner_id": owner.id,
+    } for i in range(places)])]
+    reviews = [r.id for r, _ in facade.create_reviews([{
+        "text": "Nice", "rating": 1 + i % 5, "place_id": place_id,
+        "user_id": owner.id,
+    } for i, place_id in enumerate(place_ids)])]
+    return owner.id, place_ids, reviews
+
+
+def run(facade, threads, operations, write_ratio, owner_id, place_ids,
+        reviews):
+    per_thread = operations // threads
+
+    def work(worker):
+        rng = random.Random(worker)
+        mine = list(reviews[worker::threads])
+        for _ in range(per_thread):
+            if rng.random() < write_ratio:
+                action = rng.random()
+                if action < 0.5 or not mine:
+                    mine.append(facade.create_review({
+                        "text": "Nice", "rating": rng.randint(1, 5),
+                        "place_id": rng.choice(place_ids),
+                        "user_id": owner_id,
+                    }).id)
+                elif action < 0.8:
+                    facade.update_review(rng.choice(mine),
+                                         {"rating": rng.randint(1, 5)})
+                else:
+                    facade.delete_review(mine.pop())
+            else:
+                action = rng.random()
+                if action < 0.6:
+                    facade.get_place(rng.choice(place_ids)).to_dict()
+                elif action < 0.9:
+                    facade.get_reviews_page_by_place(
+                        rng.choice(place_ids), 20
+                    )
+                else:
+                    facade.get_top_rated_places(10)
+
+    workers = [threading.Thread(target=work, args=(w,))
+               for w in range(threads)]
+    start = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return per_thread * threads / (time.perf_counter() - start)
+
+
+def measure(threads, operations, write_ratio, places, journal):
+    with tempfile.TemporaryDirectory() as tmp:
+        facade = HBnBFacade(
+            journal=Journal(tmp, fsync="always") if journal else None
+        )
+        data = seed(facade, places)
+        rate = run(facade, threads, operations, write_ratio, *data)
+        if journal:
+            facade.journal.close()
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--operations", type=int, default=20000)
+    parser.add_argument("--threads", default="1,4,16")
+    parser.add_argument("--places", type=int, default=1000)
+    args = parser.parse_args()
+
+    threads = [int(t) for t in args.threads.split(",")]
+    print(f"{'ops/s':<16}" + "".join(f"{f'{t} thr':>10}" for t in threads))
+    for journal in (False, True):
+        for name, ratio in WORKLOADS.items():
+            operations = args.operations // 10 if journal else args.operations
+            if journal and not ratio:
+                continue
+            rates = [measure(t, operations, ratio, args.places, journal)
+                     for t in threads]
+            label = f"{name}{' +journal' if journal else ''}"
+            print(f"{label:<16}" + "".join(f"{r:>10.0f}" for r in rates))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,316 @@
+"""Latency, throughput and memory of every v1 route, against a baseline.
+
+The facade is seeded deterministically with `size` places and reviews,
+size / 10 users and 20 amenities, then every route of the users, amenities,
+places and reviews namespaces is driven through app.test_client(); a
+route without a scenario here fails the run. Each size runs in its own
+process, so its peak RSS is its own. The scenarios are run --repeat
+times and each metric keeps its best value, which filters out most of the
+noise of a shared machine.
+
+Results are compared with benchmarks/baseline_endpoints.json: a p50 or
+p95 more than --tolerance above the baseline (and by at least
+--min-delta-ms), or a peak RSS more than --memory-tolerance above it, is
+a regression and makes the run exit with status 1. The baseline depends
+on the machine; record it again with --save after an intended change.
+
+Run from part2/:
+    python -m benchmarks.bench_endpoints
+    python -m benchmarks.bench_endpoints --sizes 1000000
+    python -m benchmarks.bench_endpoints --save
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import time
+
+from app import create_app
+from app.models.amenity import Amenity
+from app.models.place import Place
+from app.models.review import Review
+from app.models.user import User
+from app.metrics import registry
+from app.services import get_facade, settings
+
+facade = get_facade()
+
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                        "baseline_endpoints.json")
+AMENITIES = 20
+WARMUP = 5
+
+
+class Dataset:
+    """Seeded facade content plus generators of request payloads."""
+
+    def __init__(self, size):
+        self.rng = rng = random.Random(size)
+        self.serial = 0
+        # Instrumented as the app is, unless HBNB_METRICS=0.
+        facade.__init__(metrics=registry if settings.METRICS else None)
+        self.users = [User(f"First{i}", f"Last{i}", f"user{i}@bench.test")
+                      for i in range(max(10, size // 10))]
+        facade.user_repo.add_many(self.users)
+        self.amenities = [Amenity(f"Amenity {i}") for i in range(AMENITIES)]
+        facade.amenity_repo.add_many(self.amenities)
+        self.places = []
+        for i in range(size):
+            place = Place(f"Place {i}", "Description", rng.uniform(10, 500),
+                          rng.uniform(35, 70), rng.uniform(-10, 30),
+                          rng.choice(self.users))
+            for amenity in rng.sample(self.amenities, rng.randint(0, 4)):
+                place.add_amenity(amenity)
+            self.places.append(place)
+        self.reviews = [Review("Nice stay", rng.randint(1, 5),
+                               rng.choice(self.places), rng.choice(self.users))
+                        for _ in range(size)]
+        # Aggregates are set before storing, which keeps seeding linear.
+        for review in self.reviews:
+            review.place.add_review(review)
+        for start in range(0, size, 10000):
+            facade.place_repo.add_many(self.places[start:start + 10000])
+            facade.review_repo.add_many(self.reviews[start:start + 10000])
+
+    def next(self):
+        self.serial += 1
+        return self.serial
+
+    def pick(self, objs):
+        return self.rng.choice(objs).id
+
+    def user_data(self):
+        return {"first_name": "New", "last_name": "User",
+                "email": f"new{self.next()}@bench.test"}
+
+    def place_data(self):
+        rng = self.rng
+        return {"title": f"New place {self.next()}", "description": "",
+                "price": rng.uniform(10, 500),
+                "latitude": rng.uniform(35, 70),
+                "longitude": rng.uniform(-10, 30),
+                "owner_id": self.pick(self.users),
+                "amenities": [self.pick(self.amenities)]}
+
+    def review_data(self):
+        return {"text": "Great", "rating": self.rng.randint(1, 5),
+                "place_id": self.pick(self.places),
+                "user_id": self.pick(self.users)}
+
+    def spare_amenity(self):
+        """An amenity on 10 places, to be deleted."""
+        amenity = facade.create_amenity({"name": f"Spare {self.next()}"})
+        for place in self.rng.sample(self.places, min(10, len(self.places))):
+            facade.update_place(place.id, {
+                "amenities": [a.id for a in place.amenities] + [amenity.id]
+            })
+        return amenity.id
+
+    def spare_review(self):
+        return facade.create_review(self.review_data()).id
+
+    def bbox(self):
+        lat, lon = self.rng.uniform(40, 65), self.rng.uniform(-5, 25)
+        return f"{lat},{lon},{lat + 0.5},{lon + 0.5}"
+
+    def near(self):
+        return f"{self.rng.uniform(40, 65)},{self.rng.uniform(-5, 25)}"
+
+
+U, A, P, R = ("/api/v1/users/", "/api/v1/amenities/", "/api/v1/places/",
+              "/api/v1/reviews/")
+
+# (name, method, url rule, request(dataset) -> (path, json body, status))
+SCENARIOS = [
+    ("users.create", "POST", U, lambda d: (U, d.user_data(), 201)),
+    ("users.list", "GET", U, lambda d: (U + "?limit=100", None, 200)),
+    ("users.batch", "POST", U + "batch",
+     lambda d: (U + "batch", [d.user_data() for _ in range(50)], 201)),
+    ("users.get", "GET", U + "<string:user_id>",
+     lambda d: (U + d.pick(d.users), None, 200)),
+    ("users.update", "PUT", U + "<string:user_id>",
+     lambda d: (U + d.pick(d.users), {"last_name": f"L{d.next()}"}, 200)),
+
+    ("amenities.create", "POST", A,
+     lambda d: (A, {"name": f"New {d.next()}"}, 201)),
+    ("amenities.list", "GET", A, lambda d: (A, None, 200)),
+    ("amenities.batch", "POST", A + "batch", lambda d: (
+        A + "batch", [{"name": f"New {d.next()}"} for _ in range(10)], 201
+    )),
+    ("amenities.get", "GET", A + "<amenity_id>",
+     lambda d: (A + d.pick(d.amenities), None, 200)),
+    ("amenities.update", "PUT", A + "<amenity_id>", lambda d: (
+        A + d.pick(d.amenities), {"name": f"Renamed {d.next()}"}, 200
+    )),
+    ("amenities.delete", "DELETE", A + "<amenity_id>",
+     lambda d: (A + d.spare_amenity(), None, 200)),
+
+    ("places.create", "POST", P, lambda d: (P, d.place_data(), 201)),
+    ("places.list", "GET", P, lambda d: (P + "?limit=100", None, 200)),
+    ("places.by_price", "GET", P, lambda d: (
+        P + "?sort=price&min_price=100&max_price=200&limit=100", None, 200
+    )),
+    ("places.by_amenities", "GET", P, lambda d: (
+        P + "?limit=100&amenities={},{}".format(d.pick(d.amenities),
+                                                d.pick(d.amenities)),
+        None, 200
+    )),
+    ("places.batch", "POST", P + "batch",
+     lambda d: (P + "batch", [d.place_data() for _ in range(20)], 201)),
+    ("places.search_bbox", "GET", P + "search",
+     lambda d: (P + "search?bbox=" + d.bbox(), None, 200)),
+    ("places.search_near", "GET", P + "search",
+     lambda d: (P + "search?k=10&near=" + d.near(), None, 200)),
+    ("places.top", "GET", P + "top", lambda d: (P + "top?k=10", None, 200)),
+    ("places.get", "GET", P + "<string:place_id>",
+     lambda d: (P + d.pick(d.places), None, 200)),
+    ("places.update", "PUT", P + "<string:place_id>", lambda d: (
+        P + d.pick(d.places), {"price": d.rng.uniform(10, 500)}, 200
+    )),
+    ("places.reviews", "GET", P + "<string:place_id>/reviews",
+     lambda d: (P + d.pick(d.places) + "/reviews?limit=20", None, 200)),
+
+    ("reviews.create", "POST", R, lambda d: (R, d.review_data(), 201)),
+    ("reviews.list", "GET", R, lambda d: (R + "?limit=100", None, 200)),
+    ("reviews.batch", "POST", R + "batch",
+     lambda d: (R + "batch", [d.review_data() for _ in range(20)], 201)),
+    ("reviews.get", "GET", R + "<string:review_id>",
+     lambda d: (R + d.pick(d.reviews), None, 200)),
+    ("reviews.update", "PUT", R + "<string:review_id>", lambda d: (
+        R + d.pick(d.reviews), {"rating": d.rng.randint(1, 5)}, 200
+    )),
+    ("reviews.delete", "DELETE", R + "<string:review_id>",
+     lambda d: (R + d.spare_review(), None, 200)),
+]
+
+
+def check_coverage(app):
+    """Fail if a route of the four namespaces has no scenario."""
+    covered = {(method, rule) for _, method, rule, _ in SCENARIOS}
+    missing = []
+    for rule in app.url_map.iter_rules():
+        if not rule.rule.startswith((U, A, P, R)):
+            continue
+        for method in rule.methods - {"HEAD", "OPTIONS"}:
+            if (method, rule.rule) not in covered:
+                missing.append(f"{method} {rule.rule}")
+    if missing:
+        sys.exit("No benchmark scenario for: " + ", ".join(sorted(missing)))
+
+
+def percentile(sorted_values, p):
+    return sorted_values[min(len(sorted_values) - 1,
+                             int(len(sorted_values) * p))]
+
+
+def measure(client, dataset, method, request, count):
+    timings = []
+    for i in range(WARMUP + count):
+        path, body, expected = request(dataset)
+        start = time.perf_counter()
+        r = client.open(path, method=method, json=body)
+        elapsed = time.perf_counter() - start
+        if r.status_code != expected:
+            raise AssertionError(f"{method} {path}: {r.status_code} "
+                                 f"{r.get_data()[:200]!r}")
+        if i >= WARMUP:
+            timings.append(elapsed)
+    timings.sort()
+    return {"p50": percentile(timings, 0.50) * 1e3,
+            "p95": percentile(timings, 0.95) * 1e3,
+            "p99": percentile(timings, 0.99) * 1e3,
+            "rps": len(timings) / sum(timings)}
+
+
+def run_size(size, requests, repeat):
+    start = time.perf_counter()
+    dataset = Dataset(size)
+    seeded = time.perf_counter() - start
+    client = create_app().test_client()
+    routes = {}
+    for _ in range(repeat):
+        for name, method, _, request in SCENARIOS:
+            m = measure(client, dataset, method, request, requests)
+            best = routes.setdefault(name, m)
+            for metric in ("p50", "p95", "p99"):
+                best[metric] = min(best[metric], m[metric])
+            best["rps"] = max(best["rps"], m["rps"])
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {"seed_s": seeded, "peak_rss_mb": peak, "routes": routes}
+
+
+def compare(size, result, baseline, args):
+    """Return the regressions of result against the baseline entry."""
+    regressions = []
+    for name, metrics in result["routes"].items():
+        base = baseline["routes"].get(name)
+        if base is None:
+            continue
+        for metric in ("p50", "p95"):
+            current, previous = metrics[metric], base[metric]
+            if current > previous * (1 + args.tolerance) and \
+                    current - previous >= args.min_delta_ms:
+                regressions.append(f"{size} {name} {metric}: "
+                                   f"{previous:.3f} -> {current:.3f} ms")
+    previous = baseline["peak_rss_mb"]
+    if result["peak_rss_mb"] > previous * (1 + args.memory_tolerance):
+        regressions.append(f"{size} peak RSS: {previous:.0f} -> "
+                           f"{result['peak_rss_mb']:.0f} MB")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,100000")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--tolerance", type=float, default=1.0)
+    parser.add_argument("--min-delta-ms", type=float, default=0.5)
+    parser.add_argument("--memory-tolerance", type=float, default=0.2)
+    parser.add_argument("--save", action="store_true",
+                        help="record the results as the new baseline")
+    args = parser.parse_args()
+
+    check_coverage(create_app())
+    baselines = {}
+    if os.path.exists(BASELINE):
+        with open(BASELINE) as f:
+            baselines = json.load(f)
+
+    regressions = []
+    context = multiprocessing.get_context("fork")
+    for size in (int(s) for s in args.sizes.split(",")):
+        with context.Pool(1) as pool:
+            result = pool.apply(run_size,
+                                (size, args.requests, args.repeat))
+        print(f"\n{size} places/reviews: seeded in {result['seed_s']:.1f} s,"
+              f" peak RSS {result['peak_rss_mb']:.0f} MB")
+        print(f"{'route':<22} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+              f"{'req/s':>8}")
+        for name, m in result["routes"].items():
+            print(f"{name:<22} {m['p50']:>8.3f} {m['p95']:>8.3f} "
+                  f"{m['p99']:>8.3f} {m['rps']:>8.0f}")
+        if args.save:
+            baselines[str(size)] = result
+        elif str(size) in baselines:
+            regressions += compare(size, result, baselines[str(size)], args)
+        else:
+            print(f"(no baseline for {size})")
+
+    if args.save:
+        with open(BASELINE, "w") as f:
+            json.dump(baselines, f, indent=1, sort_keys=True)
+            f.write("\n")
+        print(f"\nBaseline written to {BASELINE}")
+    elif regressions:
+        print("\nRegressions:")
+        for regression in regressions:
+            print("  " + regression)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
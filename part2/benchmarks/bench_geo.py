@@ -0,0 +1,75 @@
+"""Spatial search latency over synthetic places.
+
+Run from part2/:
+    python -m benchmarks.bench_geo --sizes 10000,100000,1000000
+"""
+import argparse
+import random
+import statistics
+import time
+
+from app.models.place import Place
+from app.models.user import User
+from app.services import get_facade
+from app.persistence.indexes import haversine_km
+
+facade = get_facade()
+
+
+def seed_places(count, rng):
+    facade.__init__()
+    owner = User("Geo", "Owner", "geo@bench.test")
+    facade.user_repo.add(owner)
+    for i in range(count):
+        facade.place_repo.add(Place(
+            f"Place {i}", "", 100.0,
+            rng.uniform(-60.0, 70.0), rng.uniform(-180.0, 180.0), owner,
+        ))
+
+
+def timed(fn, queries):
+    timings = []
+    size = 0
+    for args in queries:
+        start = time.perf_counter()
+        size += len(fn(*args))
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings), size / len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    print(f"{'places':>9} {'query':>14} {'p50 (us)':>10} {'results':>9}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        seed_places(size, rng)
+        centers = [(rng.uniform(-50.0, 60.0), rng.uniform(-170.0, 170.0))
+                   for _ in range(args.queries)]
+        cases = {
+            "bbox 1deg": (facade.search_places_in_bbox,
+                          [(lat, lon, lat + 1.0, lon + 1.0)
+                           for lat, lon in centers]),
+            "radius 50km": (lambda lat, lon: facade.search_places_near(
+                lat, lon, radius_km=50.0), centers),
+            "k=10": (lambda lat, lon: facade.search_places_near(
+                lat, lon, k=10), centers),
+        }
+        for name, (fn, queries) in cases.items():
+            p50, results = timed(fn, queries)
+            print(f"{size:>9} {name:>14} {p50 * 1e6:>10.1f} {results:>9.1f}")
+
+        places = facade.get_all_places()
+        lat, lon = centers[0]
+        start = time.perf_counter()
+        [p for p in places
+         if haversine_km(lat, lon, p.latitude, p.longitude) <= 50.0]
+        scan = time.perf_counter() - start
+        print(f"{size:>9} {'scan 50km':>14} {scan * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
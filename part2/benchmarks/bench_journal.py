@@ -0,0 +1,81 @@
+"""Journal write throughput per fsync policy, and recovery time.
+
+Run from part2/:
+    python -m benchmarks.bench_journal --writes 2000 --records 100000
+"""
+import argparse
+import tempfile
+import threading
+import time
+
+from app.models.user import User
+from app.persistence.journal import Journal
+from app.services.facade import HBnBFacade
+
+
+def write_rate(policy, threads, writes):
+    with tempfile.TemporaryDirectory() as tmp:
+        facade = HBnBFacade(journal=Journal(tmp, fsync=policy))
+        repo = facade.user_repo
+        per_thread = writes // threads
+
+        def work(worker):
+            for i in range(per_thread):
+                repo.add(User("Bench", "User", f"{worker}-{i}@bench.test"))
+
+        workers = [threading.Thread(target=work, args=(w,))
+                   for w in range(threads)]
+        start = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - start
+        facade.journal.close()
+    return per_thread * threads / elapsed
+
+
+def recovery_time(records, snapshot):
+    with tempfile.TemporaryDirectory() as tmp:
+        facade = HBnBFacade(journal=Journal(tmp, fsync="never"))
+        users = [User("Bench", "User", f"{i}@bench.test")
+                 for i in range(records)]
+        for i in range(0, records, 1000):
+            facade.user_repo.add_many(users[i:i + 1000])
+        # Every user is then updated once, so the log holds 2 entries each.
+        for user in users:
+            facade.user_repo.update(user.id, {"last_name": "Updated"})
+        if snapshot:
+            facade.journal.snapshot()
+        facade.journal.close()
+        del users, facade
+
+        start = time.perf_counter()
+        facade = HBnBFacade(journal=Journal(tmp))
+        elapsed = time.perf_counter() - start
+        assert len(facade.get_all_users()) == records
+        facade.journal.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writes", type=int, default=2000)
+    parser.add_argument("--threads", default="1,4,16")
+    parser.add_argument("--records", type=int, default=100000)
+    args = parser.parse_args()
+
+    threads = [int(t) for t in args.threads.split(",")]
+    print("writes/s" + "".join(f"{f'{t} thr':>10}" for t in threads))
+    for policy in ("always", "interval", "never"):
+        rates = [write_rate(policy, t, args.writes) for t in threads]
+        print(f"{policy:<8}" + "".join(f"{r:>10.0f}" for r in rates))
+
+    print(f"\nrecovery of {args.records} users")
+    for snapshot in (False, True):
+        label = "snapshot" if snapshot else "log only"
+        print(f"{label:<8} {recovery_time(args.records, snapshot):>8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Memory used per model instance.
+
+Run from part2/:
+    python -m benchmarks.bench_memory --count 1000000
+"""
+import argparse
+import gc
+import tracemalloc
+
+from app.models.amenity import Amenity
+from app.models.place import Place
+from app.models.review import Review
+from app.models.user import User
+
+
+def measure(factory, count):
+    gc.collect()
+    tracemalloc.start()
+    objs = [factory(i) for i in range(count)]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objs
+    return size / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1000000)
+    args = parser.parse_args()
+
+    owner = User("Owner", "Bench", "owner@bench.test")
+    place = Place("Bench place", "", 100.0, 1.0, 1.0, owner)
+    factories = {
+        "User": lambda i: User("First", "Last", "user@bench.test"),
+        "Amenity": lambda i: Amenity("WiFi"),
+        "Place": lambda i: Place("Title", "Description", 120.0, 48.85, 2.35,
+                                 owner),
+        "Review": lambda i: Review("Nice stay", 4, place, owner),
+    }
+    print(f"{'model':>8} {'bytes/entity':>13}")
+    for name, factory in factories.items():
+        print(f"{name:>8} {measure(factory, args.count):>13.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Cost of the metrics instrumentation, per call and per request.
+
+First the wrappers alone: a repository get() and a facade get_place()
+with and without timing, and one histogram observation. Then a mix of
+bench_endpoints routes on --size places, with the instrumentation removed
+and put back every BLOCK requests so both sides see the same data and
+the same machine noise.
+
+Run from part2/:
+    python -m benchmarks.bench_metrics --size 10000
+"""
+import argparse
+import statistics
+import time
+import timeit
+
+from app import create_app
+from app.metrics import registry
+from app.services import get_facade
+from benchmarks.bench_endpoints import SCENARIOS, WARMUP, Dataset
+
+facade = get_facade()
+
+# Requests per side before switching; wrapping again allocates closures,
+# so the first WARMUP requests after a switch are not timed.
+BLOCK = 100
+ROUTES = ("users.get", "users.create", "places.get", "places.list",
+          "places.search_near", "places.update", "reviews.create",
+          "places.reviews")
+
+
+def instrument(metrics=None, tracer=None):
+    """Re-instrument the facade and its repositories in place."""
+    facade.metrics = metrics
+    facade.tracer = tracer
+    facade._instrument()
+    for collection, repo in facade._repos.items():
+        facade._instrument_repository(repo, collection)
+
+
+def set_instrumented(enabled):
+    instrument(registry if enabled else None)
+
+
+def alternate(dataset, sides, requests):
+    """{route: {side: median ms}}, switching sides every BLOCK requests.
+
+    sides maps a label to a function instrumenting the facade; each side
+    gets its own app, created once the facade is instrumented for it.
+    """
+    clients = {}
+    for side, setup in sides.items():
+        setup()
+        clients[side] = create_app().test_client()
+    labels = list(sides)
+    results = {}
+    for name, method, _, request in SCENARIOS:
+        if name not in ROUTES:
+            continue
+        timings = {side: [] for side in labels}
+        for block in range(len(labels) * requests // BLOCK):
+            side = labels[block % len(labels)]
+            sides[side]()
+            for i in range(WARMUP + BLOCK):
+                path, body, expected = request(dataset)
+                start = time.perf_counter()
+                r = clients[side].open(path, method=method, json=body)
+                elapsed = time.perf_counter() - start
+                assert r.status_code == expected, (path, r.status_code)
+                if i >= WARMUP:
+                    timings[side].append(elapsed)
+        results[name] = {side: statistics.median(values) * 1e3
+                         for side, values in timings.items()}
+    return results
+
+
+def per_call(stmt, number=200000):
+    return min(timeit.repeat(stmt, number=number, repeat=5)) / number * 1e9
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+
+    dataset = Dataset(args.size)
+    place_id = dataset.places[0].id
+
+    print(f"{'call':<26} {'plain ns':>9} {'timed ns':>9}")
+    for label, stmt in (
+        ("place_repo.get", lambda: facade.place_repo.get(place_id)),
+        ("facade.get_place", lambda: facade.get_place(place_id)),
+    ):
+        set_instrumented(False)
+        plain = per_call(stmt)
+        set_instrumented(True)
+        timed = per_call(stmt)
+        print(f"{label:<26} {plain:>9.0f} {timed:>9.0f}")
+    key = ("GET", "/api/v1/places/<string:place_id>", "200")
+    observe = per_call(lambda: registry.requests.observe(key, 0.003))
+    print(f"{'histogram observe':<26} {'':>9} {observe:>9.0f}")
+
+    results = alternate(dataset, {
+        False: lambda: set_instrumented(False),
+        True: lambda: set_instrumented(True),
+    }, args.requests)
+
+    start = time.perf_counter()
+    size = len(registry.render())
+    rendered = (time.perf_counter() - start) * 1e3
+
+    print(f"\n{args.size} places, median of {args.requests} requests, "
+          "plain and timed alternating")
+    print(f"{'route':<22} {'plain ms':>9} {'timed ms':>9} {'overhead':>9}")
+    for name, side in results.items():
+        overhead = (side[True] - side[False]) / side[False] * 100
+        print(f"{name:<22} {side[False]:>9.3f} {side[True]:>9.3f} "
+              f"{overhead:>8.1f}%")
+    print(f"\n/metrics: {size} bytes rendered in {rendered:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""GET /swagger.json: Flask-RESTX's own view against the stored spec.
+
+Flask-RESTX keeps the schema once built but encodes it to JSON on every
+request; create_app() serves bytes encoded once, gzip-compressed when the
+client accepts it, and a 304 when the client's ETag still matches. Each
+variant calls the WSGI app directly, so the test client's own overhead
+is left out; the time is the best of 5 runs. "first" is the first request
+of a new app, building the spec included.
+
+Run from part2/:
+    python -m benchmarks.bench_openapi --requests 2000
+"""
+import argparse
+import time
+import timeit
+
+from flask import Flask
+from flask_restx import Api
+from werkzeug.test import EnvironBuilder
+
+from app import create_app
+from app.factory import NAMESPACES
+
+
+def restx_app():
+    """The API documented as before: Flask-RESTX serving swagger.json."""
+    app = Flask(__name__, static_folder=None)
+    api = Api(app, version='1.0', title='HBnB API',
+              description='HBnB Application API', doc='/api/v1/')
+    for namespace, path in NAMESPACES:
+        api.add_namespace(namespace, path=path)
+    return app
+
+
+def get(app, headers=None):
+    """Status and body of GET /swagger.json."""
+    environ = EnvironBuilder('/swagger.json', headers=headers).get_environ()
+    status = []
+    body = b"".join(app(environ, lambda s, h, e=None: status.append(s)))
+    return int(status[0].split()[0]), body
+
+
+def first_request(make_app):
+    app = make_app()
+    start = time.perf_counter()
+    status, _ = get(app)
+    assert status == 200
+    return app, time.perf_counter() - start
+
+
+def per_request(app, headers, requests, expected=200):
+    environ = EnvironBuilder('/swagger.json', headers=headers).get_environ()
+
+    def start_response(status, headers, exc_info=None):
+        assert status.startswith(str(expected)), status
+
+    def call():
+        return b"".join(app(dict(environ), start_response))
+    size = len(call())
+    best = min(timeit.repeat(call, number=requests, repeat=5)) / requests
+    return best, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    restx, restx_first = first_request(restx_app)
+    cached, cached_first = first_request(create_app)
+    gzip = {'Accept-Encoding': 'gzip'}
+    etag = cached.test_client().get('/swagger.json',
+                                    headers=gzip).headers['ETag']
+    variants = [
+        ("flask-restx", restx, {}, 200, restx_first),
+        ("stored", cached, {}, 200, cached_first),
+        ("stored, gzip", cached, gzip, 200, None),
+        ("stored, If-None-Match", cached, dict(gzip, **{
+            'If-None-Match': etag
+        }), 304, None),
+    ]
+    print(f"{'variant':<22} {'first (ms)':>11} {'per request (us)':>17} "
+          f"{'bytes':>7}")
+    for name, app, headers, status, first in variants:
+        seconds, size = per_request(app, headers, args.requests, status)
+        first = f"{first * 1e3:.1f}" if first is not None else "-"
+        print(f"{name:<22} {first:>11} {seconds * 1e6:>17.1f} {size:>7}")
+
+
+if __name__ == "__main__":
+    main()
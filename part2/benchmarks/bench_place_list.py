@@ -0,0 +1,67 @@
+"""GET /api/v1/places/ latency with cold and warm to_dict caches.
+
+Run from part2/:
+    python -m benchmarks.bench_place_list --places 10000
+"""
+import argparse
+import statistics
+import time
+
+from app import create_app
+from app.models.amenity import Amenity
+from app.models.place import Place
+from app.models.user import User
+from app.services import get_facade
+
+facade = get_facade()
+
+
+def seed(count):
+    facade.__init__()
+    owner = User("List", "Owner", "list@bench.test")
+    facade.user_repo.add(owner)
+    amenities = [Amenity(f"Amenity {i}") for i in range(5)]
+    for amenity in amenities:
+        facade.amenity_repo.add(amenity)
+    for i in range(count):
+        place = Place(f"Place {i}", "Description", 100.0 + i % 50,
+                      48.85, 2.35, owner)
+        for amenity in amenities:
+            place.add_amenity(amenity)
+        facade.place_repo.add(place)
+
+
+def invalidate_all():
+    for place in facade.place_repo.get_all():
+        place.touch()
+
+
+def time_get(client, url, runs, before=None):
+    timings = []
+    for _ in range(runs):
+        if before:
+            before()
+        start = time.perf_counter()
+        r = client.get(url)
+        timings.append(time.perf_counter() - start)
+        assert r.status_code == 200
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--places", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    seed(args.places)
+    client = create_app().test_client()
+    for url in ('/api/v1/places/', '/api/v1/places/?limit=100'):
+        cold = time_get(client, url, args.runs, before=invalidate_all)
+        warm = time_get(client, url, args.runs)
+        print(f"{url:<28} cold {cold * 1e3:8.2f} ms   "
+              f"warm {warm * 1e3:8.2f} ms   x{cold / warm:.1f}")
+
+
+if __name__ == "__main__":
+    main()
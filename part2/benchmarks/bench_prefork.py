@@ -0,0 +1,134 @@
+"""Read throughput and memory of serve.py with 1 to N forked workers.
+
+A journal snapshot of --places places is written first, then serve.py is
+started on it for each worker count and hammered by --clients client
+processes (keep-alive connections) reading places and place pages.
+Memory is read from /proc/<pid>/smaps_rollup: "shared" is what a worker
+still shares with the parent copy-on-write, "private" what it copied.
+
+Run from part2/:
+    python -m benchmarks.bench_prefork --workers 1,2,4 --places 100000
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from app.persistence.snapshot import MappedSnapshot
+from benchmarks.bench_cold_start import seed
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start(journal, port, workers, threads):
+    env = dict(os.environ, HBNB_CONFIG="production", HBNB_JOURNAL=journal,
+               HBNB_HOST="127.0.0.1", HBNB_PORT=str(port),
+               HBNB_WORKERS=str(workers), HBNB_THREADS=str(threads))
+    process = subprocess.Popen([sys.executable, "serve.py"], cwd=ROOT,
+                               env=env)
+    while True:
+        try:
+            conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+            conn.request("GET", "/api/v1/amenities/")
+            conn.getresponse().read()
+            conn.close()
+            return process
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError("serve.py exited")
+            time.sleep(0.1)
+
+
+def client(port, place_ids, duration, seed_):
+    rng = random.Random(seed_)
+    conn = http.client.HTTPConnection("127.0.0.1", port, timeout=30)
+    done = 0
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        if rng.random() < 0.8:
+            path = "/api/v1/places/" + rng.choice(place_ids)
+        else:
+            path = "/api/v1/places/?limit=20"
+        conn.request("GET", path)
+        response = conn.getresponse()
+        response.read()
+        assert response.status == 200, response.status
+        done += 1
+    conn.close()
+    return done
+
+
+def memory(pid):
+    fields = {}
+    with open("/proc/{}/smaps_rollup".format(pid)) as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    shared = fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0)
+    private = fields.get("Private_Clean", 0) + \
+        fields.get("Private_Dirty", 0)
+    return shared / 1024, private / 1024
+
+
+def children(pid):
+    path = "/proc/{}/task/{}/children".format(pid, pid)
+    with open(path) as f:
+        return [int(p) for p in f.read().split()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--places", type=int, default=100000)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    print("cpus:", os.cpu_count())
+    print(f"{'workers':>7} {'req/s':>9} {'shared MB':>10} {'private MB':>11}")
+    with tempfile.TemporaryDirectory() as tmp:
+        seed(tmp, args.places, snapshot=True)
+        snapshot = MappedSnapshot(os.path.join(tmp, "snapshot.snap"))
+        places = snapshot.collections["places"]
+        place_ids = [places.id_at(row) for row in range(len(places))]
+        snapshot.close()
+
+        for workers in (int(w) for w in args.workers.split(",")):
+            port = free_port()
+            process = start(tmp, port, workers, args.threads)
+            try:
+                with multiprocessing.Pool(args.clients) as pool:
+                    counts = pool.starmap(client, [
+                        (port, place_ids, args.duration, i)
+                        for i in range(args.clients)
+                    ])
+                pids = children(process.pid) if workers > 1 \
+                    else [process.pid]
+                usage = [memory(pid) for pid in pids]
+            finally:
+                process.send_signal(signal.SIGTERM)
+                process.wait()
+            shared = sum(u[0] for u in usage) / len(usage)
+            private = sum(u[1] for u in usage) / len(usage)
+            rate = sum(counts) / args.duration
+            print(f"{workers:>7} {rate:>9.0f} {shared:>10.1f} "
+                  f"{private:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Signup latency against a pre-seeded user table.
+
+Run from part2/:
+    python -m benchmarks.bench_signup --sizes 10000,100000,1000000
+"""
+import argparse
+import statistics
+import time
+
+from app import create_app
+from app.models.user import User
+from app.services import get_facade
+
+facade = get_facade()
+
+
+def seed_users(count):
+    facade.__init__()
+    for i in range(count):
+        facade.user_repo.add(User("Seed", "User", f"seed{i}@bench.test"))
+
+
+def measure_signups(client, requests):
+    timings = []
+    for i in range(requests):
+        payload = {
+            "first_name": "New",
+            "last_name": "User",
+            "email": f"new{i}@bench.test",
+        }
+        start = time.perf_counter()
+        r = client.post('/api/v1/users/', json=payload)
+        timings.append(time.perf_counter() - start)
+        assert r.status_code == 201, r.get_json()
+    timings.sort()
+    return (statistics.median(timings),
+            timings[int(len(timings) * 0.95) - 1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--requests", type=int, default=500)
+    args = parser.parse_args()
+
+    app = create_app()
+    client = app.test_client()
+
+    print(f"{'users':>10} {'p50 (us)':>10} {'p95 (us)':>10}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        seed_users(size)
+        p50, p95 = measure_signups(client, args.requests)
+        print(f"{size:>10} {p50 * 1e6:>10.1f} {p95 * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Startup time: create_app() in a fresh process, then in a warm one.
+
+Each run starts a new interpreter and times the import of app, the first
+create_app() (which loads Flask, Flask-RESTX, the API and the facade) and
+then repeated create_app() calls, as each test's setUp makes. The run
+exits with status 1 if the median cold create_app() time, import of app
+included, exceeds --target-ms.
+
+--profile shows where the time goes instead: the imports taking the most
+time (python -X importtime, grouped by top-level package) and the
+functions create_app() spends its time in (cProfile).
+
+Run from part2/:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 20 --target-ms 300
+    python -m benchmarks.bench_startup --profile
+"""
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import statistics
+import subprocess
+import sys
+import time
+from collections import Counter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Deployed workers import from cached bytecode; without it each run would
+# recompile every module.
+ENV = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+CHILD = """
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.create_app()
+created = time.perf_counter()
+warm = []
+for _ in range({warm}):
+    t = time.perf_counter()
+    app.create_app()
+    warm.append(time.perf_counter() - t)
+print(json.dumps({{"import": imported - start, "first": created - imported,
+                  "warm": sorted(warm)[len(warm) // 2] if warm else 0}}))
+"""
+
+
+def cold_run(warm):
+    start = time.perf_counter()
+    out = subprocess.run([sys.executable, "-c", CHILD.format(warm=warm)],
+                         cwd=ROOT, env=ENV, check=True,
+                         capture_output=True, text=True).stdout
+    total = time.perf_counter() - start
+    result = json.loads(out)
+    result["cold"] = result["import"] + result["first"]
+    # Interpreter start and exit included, warm calls left out.
+    result["process"] = total - result["warm"] * warm
+    return result
+
+
+def import_times():
+    """(self, cumulative) microseconds per module, from -X importtime."""
+    err = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c",
+         "from app import create_app; create_app()"],
+        cwd=ROOT, env=ENV, check=True, capture_output=True, text=True
+    ).stderr
+    times = {}
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(own), int(cumulative))
+    return times
+
+
+def profile(top):
+    times = import_times()
+    packages = Counter()
+    for name, (own, _) in times.items():
+        packages[name.split(".")[0]] += own
+    print(f"imports: {sum(packages.values()) / 1e3:.1f} ms")
+    print(f"  {'package':<28} {'self (ms)':>10}")
+    for name, own in packages.most_common(top):
+        print(f"  {name:<28} {own / 1e3:>10.1f}")
+    print(f"  {'module':<28} {'self (ms)':>10} {'cumulative':>11}")
+    slowest = sorted(times.items(), key=lambda item: -item[1][0])[:top]
+    for name, (own, cumulative) in slowest:
+        print(f"  {name:<28} {own / 1e3:>10.1f} {cumulative / 1e3:>11.1f}")
+
+    sys.path.insert(0, ROOT)
+    from app import create_app
+    create_app()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    for _ in range(20):
+        create_app()
+    profiler.disable()
+    print("\ncreate_app() x 20, by internal time:")
+    pstats.Stats(profiler).sort_stats("tottime").print_stats(top)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--warm", type=int, default=20,
+                        help="create_app() calls timed after the first")
+    parser.add_argument("--target-ms", type=float, default=400.0,
+                        help="maximum median cold create_app()")
+    parser.add_argument("--profile", action="store_true")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    cold_run(0)  # Writes the bytecode caches.
+    if args.profile:
+        profile(args.top)
+        return
+
+    runs = [cold_run(args.warm) for _ in range(args.runs)]
+
+    def median_ms(key):
+        return statistics.median(r[key] for r in runs) * 1e3
+
+    cold = median_ms("cold")
+    print(f"{'median of':<26} {args.runs} runs")
+    print(f"{'process start to app (ms)':<26} {median_ms('process'):.1f}")
+    print(f"{'cold create_app (ms)':<26} {cold:.1f}")
+    print(f"{'  import app (ms)':<26} {median_ms('import'):.1f}")
+    print(f"{'  first create_app (ms)':<26} {median_ms('first'):.1f}")
+    print(f"{'warm create_app (ms)':<26} {median_ms('warm'):.2f}")
+    if cold > args.target_ms:
+        print(f"cold create_app above the {args.target_ms:.0f} ms target")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""Cost of request tracing: off, on but not sampled, and every request.
+
+First span() alone, outside and inside a trace. Then a mix of
+bench_endpoints routes on --size places, switching between no tracer, a
+tracer sampling nothing and a tracer sampling everything (spans written
+to a temporary file) every BLOCK requests, as bench_metrics does.
+
+Run from part2/:
+    python -m benchmarks.bench_tracing --size 10000
+"""
+import argparse
+import os
+import tempfile
+
+from app.metrics import registry
+from app.services import get_facade, settings
+from app.tracing import JsonLinesExporter, Tracer, span
+from benchmarks.bench_endpoints import Dataset
+from benchmarks.bench_metrics import alternate, instrument, per_call
+
+facade = get_facade()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=10000)
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+
+    metrics = registry if settings.METRICS else None
+    dataset = Dataset(args.size)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "traces.jsonl")
+        exporter = JsonLinesExporter(path)
+        unsampled = Tracer(exporter, sample_rate=0.0)
+        sampled = Tracer(exporter, sample_rate=1.0)
+
+        def noop():
+            with span("noop"):
+                pass
+        outside = per_call(noop)
+        with sampled.trace("bench"):
+            inside = per_call(noop, number=20000)
+        print(f"span() outside a trace: {outside:.0f} ns, "
+              f"inside: {inside:.0f} ns")
+
+        results = alternate(dataset, {
+            "off": lambda: instrument(metrics),
+            "unsampled": lambda: instrument(metrics, unsampled),
+            "sampled": lambda: instrument(metrics, sampled),
+        }, args.requests)
+        exporter.close()
+        written = os.path.getsize(path)
+    facade.tracer = None
+
+    print(f"\n{args.size} places, median of {args.requests} requests per "
+          "side, sides alternating")
+    print(f"{'route':<22} {'off ms':>8} {'unsampled':>10} {'sampled':>9}")
+    for name, side in results.items():
+        off = side["off"]
+        print(f"{name:<22} {off:>8.3f} "
+              f"{(side['unsampled'] - off) / off * 100:>9.1f}% "
+              f"{(side['sampled'] - off) / off * 100:>8.1f}%")
+    print(f"\n{written / 1e6:.1f} MB of spans written")
+
+
+if __name__ == "__main__":
+    main()
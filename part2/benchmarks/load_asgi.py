@@ -0,0 +1,143 @@
+"""Thousands of idle keep-alive connections against one server process.
+
+Each of --connections clients opens a connection, then sends --requests
+GETs on it, waiting --think seconds on average before each: slow,
+mostly idle clients. The ASGI app (uvicorn, one process) keeps them all
+on its event loop; serve.py with one worker ties a pool thread to each
+connection and starves the others. Reports completed connections,
+request rate, latency percentiles and the server's threads and RSS.
+
+Needs uvicorn for the ASGI server (pip install uvicorn). Run from part2/:
+    python -m benchmarks.load_asgi --connections 2000 --server asgi,wsgi
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+_LENGTH = re.compile(rb"content-length:\s*(\d+)", re.I)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start(server, port, threads):
+    env = dict(os.environ, HBNB_HOST="127.0.0.1", HBNB_PORT=str(port),
+               HBNB_WORKERS="1", HBNB_THREADS=str(threads))
+    if server == "asgi":
+        command = [sys.executable, "-m", "uvicorn", "asgi:app",
+                   "--port", str(port), "--log-level", "warning",
+                   "--backlog", "8192", "--timeout-keep-alive", "60"]
+    else:
+        command = [sys.executable, "serve.py"]
+    process = subprocess.Popen(command, cwd=ROOT, env=env)
+    url = "http://127.0.0.1:{}/api/v1/users/".format(port)
+    while True:
+        try:
+            request = urllib.request.Request(url, json.dumps({
+                "first_name": "Load", "last_name": "Test",
+                "email": "load@example.com",
+            }).encode(), {"Content-Type": "application/json"})
+            with urllib.request.urlopen(request) as r:
+                return process, url + json.loads(r.read())["id"]
+        except OSError:
+            if process.poll() is not None:
+                raise RuntimeError("{} server exited".format(server))
+            time.sleep(0.1)
+
+
+def status(pid):
+    fields = {}
+    with open("/proc/{}/status".format(pid)) as f:
+        for line in f:
+            name, _, value = line.partition(":")
+            fields[name] = value.split()[:1]
+    return int(fields["Threads"][0]), int(fields["VmRSS"][0]) / 1024
+
+
+async def client(port, path, args, latencies):
+    try:
+        reader, writer = await asyncio.wait_for(
+            asyncio.open_connection("127.0.0.1", port), args.timeout
+        )
+    except (OSError, asyncio.TimeoutError):
+        return False
+    request = "GET {} HTTP/1.1\r\nHost: localhost\r\n\r\n".format(path)
+    try:
+        for _ in range(args.requests):
+            await asyncio.sleep(random.uniform(0, 2 * args.think))
+            start = time.perf_counter()
+            writer.write(request.encode())
+            head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"),
+                                          args.timeout)
+            length = int(_LENGTH.search(head).group(1))
+            await asyncio.wait_for(reader.readexactly(length), args.timeout)
+            latencies.append(time.perf_counter() - start)
+        return True
+    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+        return False
+    finally:
+        writer.close()
+
+
+async def load(port, path, args, pid):
+    latencies = []
+    start = time.perf_counter()
+    tasks = [asyncio.ensure_future(client(port, path, args, latencies))
+             for _ in range(args.connections)]
+    await asyncio.sleep(args.think)
+    threads, rss = status(pid)
+    done = sum(await asyncio.gather(*tasks))
+    return done, latencies, time.perf_counter() - start, threads, rss
+
+
+def percentile(values, p):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--server", default="asgi,wsgi")
+    parser.add_argument("--connections", type=int, default=2000)
+    parser.add_argument("--requests", type=int, default=5)
+    parser.add_argument("--think", type=float, default=2.0)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=10.0)
+    args = parser.parse_args()
+
+    print(f"{'server':<6} {'completed':>11} {'req/s':>7} {'p50 ms':>8} "
+          f"{'p99 ms':>8} {'threads':>8} {'RSS MB':>7}")
+    for server in args.server.split(","):
+        port = free_port()
+        process, url = start(server, port, args.threads)
+        path = url.split(str(port), 1)[1]
+        try:
+            done, latencies, elapsed, threads, rss = asyncio.run(
+                load(port, path, args, process.pid)
+            )
+        finally:
+            process.terminate()
+            process.wait()
+        print(f"{server:<6} {f'{done}/{args.connections}':>11} "
+              f"{len(latencies) / elapsed:>7.0f} "
+              f"{percentile(latencies, 0.5) * 1e3:>8.1f} "
+              f"{percentile(latencies, 0.99) * 1e3:>8.1f} "
+              f"{threads:>8} {rss:>7.1f}")
+
+
+if __name__ == "__main__":
+    main()
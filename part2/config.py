@@ -4,13 +4,46 @@ import os
 class Config:
     SECRET_KEY = os.getenv('SECRET_KEY', 'default_secret_key')
     DEBUG = False
+    # "memory" or "sqlite"; DATABASE is the SQLite file for the latter.
+    REPOSITORY = os.getenv('HBNB_REPOSITORY', 'memory')
+    DATABASE = os.getenv('HBNB_DATABASE', 'hbnb.db')
+    # Directory of the write-ahead log of the memory backend, if any.
+    JOURNAL = os.getenv('HBNB_JOURNAL')
+    JOURNAL_FSYNC = os.getenv('HBNB_JOURNAL_FSYNC', 'always')
+    SNAPSHOT_INTERVAL = float(os.getenv('HBNB_SNAPSHOT_INTERVAL', '300'))
+    # serve.py: address, worker processes and request threads per worker.
+    # More than one worker makes the API read-only.
+    HOST = os.getenv('HBNB_HOST', '127.0.0.1')
+    PORT = int(os.getenv('HBNB_PORT', '8000'))
+    WORKERS = int(os.getenv('HBNB_WORKERS', '1'))
+    THREADS = int(os.getenv('HBNB_THREADS', '8'))
+    # Request, facade and repository metrics served at /metrics.
+    METRICS = os.getenv('HBNB_METRICS', '1') != '0'
+    # JSON-lines file receiving the spans of sampled requests, if any.
+    TRACE_FILE = os.getenv('HBNB_TRACE_FILE')
+    TRACE_SAMPLE_RATE = float(os.getenv('HBNB_TRACE_SAMPLE_RATE', '0.01'))
+    # Whether an X-HBnB-Trace: 1 header forces a trace. Any client can
+    # send it, so only enable it where clients are trusted.
+    TRACE_HEADER = os.getenv('HBNB_TRACE_HEADER', '0') == '1'
+    # Requests slower than this are profiled (0 disables it); profiles
+    # are also written to PROFILE_DIR if set.
+    SLOW_REQUEST_MS = float(os.getenv('HBNB_SLOW_REQUEST_MS', '0'))
+    PROFILE_INTERVAL_MS = float(os.getenv('HBNB_PROFILE_INTERVAL_MS', '5'))
+    PROFILE_DIR = os.getenv('HBNB_PROFILE_DIR')
+    # Bearer token of the /admin/ endpoints, which only exist if it is set.
+    ADMIN_TOKEN = os.getenv('HBNB_ADMIN_TOKEN')
 
 
 class DevelopmentConfig(Config):
     DEBUG = True
 
 
+class ProductionConfig(Config):
+    HOST = os.getenv('HBNB_HOST', '0.0.0.0')
+
+
 config = {
     'development': DevelopmentConfig,
+    'production': ProductionConfig,
     'default': DevelopmentConfig
 }
@@ -0,0 +1,11 @@
+from app import create_app
+from app.server import serve
+from app.services import get_facade, settings
+
+facade = get_facade()
+
+app = create_app()
+
+if __name__ == '__main__':
+    serve(app, facade, settings.HOST, settings.PORT, settings.WORKERS,
+          settings.THREADS)
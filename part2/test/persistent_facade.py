@@ -0,0 +1,39 @@
+import tempfile
+
+
+class PersistentFacadeMixin:
+    """A facade kept in a temporary directory, reopened to test recovery.
+
+    Mixed into a TestCase; subclasses define open(**options), returning a
+    facade stored under self.tmp.name, and close(), releasing it.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.facade = self.open()
+
+    def tearDown(self):
+        self.close()
+        self.tmp.cleanup()
+
+    def reopen(self, **options):
+        self.close()
+        self.facade = self.open(**options)
+        return self.facade
+
+    def seed(self):
+        owner = self.facade.create_user({
+            "first_name": "Jane", "last_name": "Doe",
+            "email": "jane@example.com",
+        })
+        wifi = self.facade.create_amenity({"name": "Wifi"})
+        place = self.facade.create_place({
+            "title": "Loft", "price": 80.0, "latitude": 48.85,
+            "longitude": 2.35, "owner_id": owner.id,
+            "amenities": [wifi.id],
+        })
+        review = self.facade.create_review({
+            "text": "Great", "rating": 4, "place_id": place.id,
+            "user_id": owner.id,
+        })
+        return owner, wifi, place, review
@@ -1,5 +1,11 @@
+import json
+import tracemalloc
 import unittest
 from app import create_app
+from app.models.amenity import Amenity
+from app.services import get_facade
+
+facade = get_facade()
 
 
 class TestAmenityEndpoints(unittest.TestCase):
@@ -22,10 +28,83 @@ class TestAmenityEndpoints(unittest.TestCase):
         self.assertEqual(r.status_code, 200)
         self.assertIsInstance(r.get_json(), list)
 
+    def test_get_amenities_paginated(self):
+        created = []
+        for i in range(3):
+            r = self.client.post('/api/v1/amenities/',
+                                 json={"name": f"Paged {i}"})
+            created.append(r.get_json()["id"])
+
+        seen = []
+        r = self.client.get('/api/v1/amenities/?limit=2')
+        while True:
+            self.assertEqual(r.status_code, 200)
+            self.assertLessEqual(len(r.get_json()), 2)
+            seen.extend(a["id"] for a in r.get_json())
+            cursor = r.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+            r = self.client.get(f'/api/v1/amenities/?limit=2&cursor={cursor}')
+
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertEqual(seen[-3:], created)
+
+    def test_get_amenities_invalid_limit(self):
+        r = self.client.get('/api/v1/amenities/?limit=1000')
+        self.assertEqual(r.status_code, 400)
+
+    def test_delete_amenity(self):
+        r = self.client.post('/api/v1/amenities/', json={"name": "Sauna"})
+        amenity_id = r.get_json()["id"]
+        r = self.client.delete(f'/api/v1/amenities/{amenity_id}')
+        self.assertEqual(r.status_code, 200)
+        r = self.client.get(f'/api/v1/amenities/{amenity_id}')
+        self.assertEqual(r.status_code, 404)
+        r = self.client.delete(f'/api/v1/amenities/{amenity_id}')
+        self.assertEqual(r.status_code, 404)
+
     def test_get_amenity_not_found(self):
         r = self.client.get('/api/v1/amenities/does-not-exist')
         self.assertEqual(r.status_code, 404)
 
 
+class TestAmenityStreaming(unittest.TestCase):
+    COUNT = 20000
+
+    def setUp(self):
+        self.app = create_app()
+        self.app.testing = True
+        self.client = self.app.test_client()
+        self.seeded = [Amenity(f"Bulk {i}") for i in range(self.COUNT)]
+        for amenity in self.seeded:
+            facade.amenity_repo.add(amenity)
+
+    def tearDown(self):
+        for amenity in self.seeded:
+            facade.amenity_repo.delete(amenity.id)
+
+    def test_stream_returns_full_array(self):
+        r = self.client.get('/api/v1/amenities/?stream=true')
+        self.assertEqual(r.status_code, 200)
+        ids = {a["id"] for a in json.loads(r.get_data(as_text=True))}
+        self.assertTrue({a.id for a in self.seeded} <= ids)
+
+    def _peak(self, url):
+        tracemalloc.start()
+        try:
+            r = self.client.get(url, buffered=False)
+            for _ in r.response:
+                pass
+            r.close()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def test_stream_peak_memory_stays_low(self):
+        buffered = self._peak('/api/v1/amenities/')
+        streamed = self._peak('/api/v1/amenities/?stream=true')
+        self.assertLess(streamed * 10, buffered)
+
+
 if __name__ == "__main__":
     unittest.main()
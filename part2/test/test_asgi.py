@@ -0,0 +1,106 @@
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from app.asgi import WSGIExecutor, create_asgi_app
+from app.services import get_facade
+from app.services.facade import HBnBFacade
+
+
+def call(app, method, path, body=None):
+    """Run one request through the ASGI app, return (status, json)."""
+    async def run():
+        messages = [{
+            "type": "http.request", "more_body": False,
+            "body": b"" if body is None else json.dumps(body).encode(),
+        }]
+        sent = []
+
+        async def receive():
+            return messages.pop(0) if messages else {"type": "http.disconnect"}
+
+        async def send(message):
+            sent.append(message)
+
+        await app({
+            "type": "http", "method": method, "path": path,
+            "query_string": b"", "http_version": "1.1", "scheme": "http",
+            "root_path": "", "server": ("test", 80),
+            "client": ("127.0.0.1", 1234),
+            "headers": [(b"content-type", b"application/json")],
+        }, receive, send)
+        return sent
+
+    sent = asyncio.run(run())
+    data = b"".join(m.get("body", b"") for m in sent[1:])
+    return sent[0]["status"], json.loads(data) if data else None
+
+
+class TestASGIApp(unittest.TestCase):
+    def setUp(self):
+        self.app = create_asgi_app()
+
+    def test_same_routes_and_validation(self):
+        status, user = call(self.app, "POST", "/api/v1/users/", {
+            "first_name": "Jane", "last_name": "Doe",
+            "email": "jane.asgi@example.com",
+        })
+        self.assertEqual(status, 201)
+        status, found = call(self.app, "GET", "/api/v1/users/" + user["id"])
+        self.assertEqual((status, found["email"]),
+                         (200, "jane.asgi@example.com"))
+        status, error = call(self.app, "POST", "/api/v1/users/", {
+            "first_name": "Jane", "last_name": "Doe", "email": "invalid",
+        })
+        self.assertEqual((status, error),
+                         (400, {"error": "email format is invalid"}))
+        status, _ = call(self.app, "GET", "/api/v1/users/missing")
+        self.assertEqual(status, 404)
+
+
+class TestWSGIExecutor(unittest.TestCase):
+    def test_calls_run_in_executor(self):
+        for backend in ("memory", "sqlite"):
+            with tempfile.TemporaryDirectory() as tmp:
+                facade = HBnBFacade(backend, os.path.join(tmp, "test.db"))
+                executor = WSGIExecutor(max_workers=2)
+
+                async def run():
+                    user = await executor.run(facade.create_user, {
+                        "first_name": "Jane", "last_name": "Doe",
+                        "email": "jane@example.com",
+                    })
+                    thread = await executor.run(
+                        lambda: threading.current_thread().name
+                    )
+                    found = await executor.run(facade.get_user, user.id)
+                    return user, found, thread
+
+                user, found, thread = asyncio.run(run())
+                self.assertIs(found, user)
+                self.assertTrue(thread.startswith("wsgi"))
+                executor.close()
+                if backend == "sqlite":
+                    facade.pool.close()
+
+    def test_requests_leave_the_event_loop(self):
+        app = create_asgi_app(max_workers=1)
+        threads = []
+
+        def get_all_users():
+            threads.append(threading.current_thread().name)
+            return []
+        with mock.patch.object(get_facade(), "get_all_users",
+                               get_all_users):
+            status, users = call(app, "GET", "/api/v1/users/")
+        self.assertEqual((status, users), (200, []))
+        self.assertEqual(len(threads), 1)
+        self.assertTrue(threads[0].startswith("wsgi"))
+        app.executor.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,206 @@
+import random
+import sys
+import tempfile
+import threading
+import unittest
+from app.persistence.journal import Journal
+from app.persistence.locks import RWLock
+from app.services.facade import HBnBFacade
+
+
+class TestRWLock(unittest.TestCase):
+    def test_readers_share_writers_exclude(self):
+        lock = RWLock()
+        inside = []
+
+        def run(mode, name):
+            with getattr(lock, mode)():
+                inside.append(name)
+
+        with lock.read():
+            reader = threading.Thread(target=run, args=("read", "r"))
+            reader.start()
+            reader.join(1)
+            self.assertEqual(inside, ["r"])
+            writer = threading.Thread(target=run, args=("write", "w"))
+            writer.start()
+            writer.join(0.1)
+            self.assertEqual(inside, ["r"])
+        writer.join(1)
+        self.assertEqual(inside, ["r", "w"])
+
+    def test_reentrant(self):
+        lock = RWLock()
+        with lock.write(), lock.write(), lock.read():
+            pass
+        with lock.read(), lock.read():
+            with self.assertRaises(RuntimeError):
+                lock.acquire_write()
+        # Fully released: another thread can write.
+        done = threading.Event()
+        threading.Thread(target=lambda: (
+            lock.acquire_write(), done.set(), lock.release_write()
+        )).start()
+        self.assertTrue(done.wait(1))
+
+
+class TestConcurrentFacade(unittest.TestCase):
+    THREADS = 8
+    OPERATIONS = 600
+
+    def seed(self, facade):
+        owner = facade.create_user({
+            "first_name": "Jane", "last_name": "Doe",
+            "email": "jane@example.com",
+        })
+        places = [facade.create_place({
+            "title": f"Place {i}", "price": 50.0 + i, "latitude": 48.0,
+            "longitude": 2.0 + i / 10, "owner_id": owner.id,
+        }) for i in range(4)]
+        return owner, places
+
+    def hammer(self, facade, owner, places):
+        """Create, rate, delete and read reviews from many threads."""
+        reviews = []
+        errors = []
+        start = threading.Barrier(self.THREADS)
+
+        def work(seed):
+            rng = random.Random(seed)
+            start.wait()
+            try:
+                for _ in range(self.OPERATIONS):
+                    action = rng.random()
+                    if action < 0.4 or not reviews:
+                        reviews.append(facade.create_review({
+                            "text": "Hi", "rating": rng.randint(1, 5),
+                            "place_id": rng.choice(places).id,
+                            "user_id": owner.id,
+                        }).id)
+                    elif action < 0.6:
+                        facade.update_review(rng.choice(reviews),
+                                             {"rating": rng.randint(1, 5)})
+                    elif action < 0.75:
+                        # Several threads may delete the same review.
+                        facade.delete_review(rng.choice(reviews))
+                    elif action < 0.85:
+                        facade.get_reviews_page_by_place(
+                            rng.choice(places).id, 20
+                        )
+                    else:
+                        facade.get_top_rated_places(3)
+                        facade.get_all_reviews()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=work, args=(i,))
+                   for i in range(self.THREADS)]
+        # Switch threads as often as possible to widen race windows.
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join(60)
+                self.assertFalse(thread.is_alive(), "deadlock")
+        finally:
+            sys.setswitchinterval(interval)
+        self.assertEqual(errors, [])
+
+    def assertAggregates(self, facade, places):
+        for place in places:
+            place = facade.get_place(place.id)
+            ratings = [r.rating for r in facade.get_reviews_by_place(place.id)]
+            self.assertEqual(place.review_count, len(ratings))
+            self.assertEqual(place.rating_sum, sum(ratings))
+            self.assertEqual(list(place.rating_histogram),
+                             [ratings.count(i) for i in range(1, 6)])
+
+    def test_rating_aggregates_stay_consistent(self):
+        facade = HBnBFacade()
+        owner, places = self.seed(facade)
+        self.hammer(facade, owner, places)
+        self.assertAggregates(facade, places)
+        with facade.place_repo.lock.read():
+            top = facade.place_repo.index("rating").last(len(places))
+        self.assertEqual(
+            top, [p.id for p in sorted(places, key=lambda p: (
+                p.average_rating or 0.0, p.review_count, p.id
+            ), reverse=True)]
+        )
+
+    def test_journaled_writes_recover_consistent(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            facade = HBnBFacade(journal=Journal(tmp, fsync="never"))
+            owner, places = self.seed(facade)
+            self.hammer(facade, owner, places)
+            facade.journal.close()
+            recovered = HBnBFacade(journal=Journal(tmp))
+            self.assertAggregates(recovered, places)
+            recovered.journal.close()
+
+    def test_lazy_snapshot_reads_race_deletes(self):
+        # Reading a place from the snapshot builds it, resolving its
+        # amenities, while delete_amenity() locks amenities then places
+        # and create_review() places then reviews.
+        with tempfile.TemporaryDirectory() as tmp:
+            facade = HBnBFacade(journal=Journal(tmp, fsync="never"))
+            owner, _ = self.seed(facade)
+            amenities = [facade.create_amenity({"name": f"Amenity {i}"})
+                         for i in range(20)]
+            for i in range(200):
+                facade.create_place({
+                    "title": f"Loft {i}", "price": 10.0, "latitude": 1.0,
+                    "longitude": 1.0, "owner_id": owner.id,
+                    "amenities": [a.id for a in amenities[i % 20:][:3]],
+                })
+            place_ids = [p.id for p in facade.get_all_places()]
+            facade.journal.snapshot()
+            facade.journal.close()
+            recovered = HBnBFacade(journal=Journal(tmp, fsync="never"))
+            errors = []
+
+            def read():
+                try:
+                    cursor = 0
+                    while cursor is not None:
+                        _, cursor = recovered.get_places_page(10, cursor)
+                except Exception as e:
+                    errors.append(e)
+
+            def delete():
+                try:
+                    for amenity in amenities:
+                        recovered.delete_amenity(amenity.id)
+                except Exception as e:
+                    errors.append(e)
+
+            def review():
+                try:
+                    for place_id in reversed(place_ids):
+                        recovered.create_review({
+                            "text": "Hi", "rating": 4, "place_id": place_id,
+                            "user_id": owner.id,
+                        })
+                except Exception as e:
+                    errors.append(e)
+
+            threads = [threading.Thread(target=work, daemon=True)
+                       for work in (read, delete, review)]
+            interval = sys.getswitchinterval()
+            sys.setswitchinterval(1e-6)
+            try:
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join(60)
+                    self.assertFalse(thread.is_alive(), "deadlock")
+            finally:
+                sys.setswitchinterval(interval)
+            self.assertEqual(errors, [])
+            recovered.journal.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import json
+import os
+import threading
+import unittest
+from app.persistence.journal import Journal
+from app.services.facade import HBnBFacade
+from persistent_facade import PersistentFacadeMixin
+
+
+class TestJournal(PersistentFacadeMixin, unittest.TestCase):
+    def open(self, **options):
+        return HBnBFacade(journal=Journal(self.tmp.name, **options))
+
+    def close(self):
+        self.facade.journal.close()
+
+    def assert_recovered(self, facade, owner, place, review):
+        self.assertEqual(facade.get_user(owner.id).to_dict(),
+                         owner.to_dict())
+        loaded = facade.get_place(place.id)
+        self.assertEqual(loaded.to_dict(), place.to_dict())
+        self.assertIs(loaded.owner, facade.get_user(owner.id))
+        self.assertEqual(facade.get_review(review.id).to_dict(),
+                         review.to_dict())
+        self.assertEqual(facade.get_user_by_email("jane@example.com").id,
+                         owner.id)
+        places, _ = facade.get_places_by_price(50, 100)
+        self.assertEqual([p.id for p in places], [place.id])
+
+    def test_replay_log(self):
+        owner, wifi, place, review = self.seed()
+        self.facade.update_place(place.id, {"price": 90.0})
+        self.facade.update_review(review.id, {"rating": 2})
+        facade = self.reopen()
+        self.assert_recovered(facade, owner, place, review)
+        self.assertEqual(facade.get_place(place.id).average_rating, 2.0)
+
+    def test_replay_delete(self):
+        _, wifi, place, review = self.seed()
+        self.facade.delete_review(review.id)
+        self.facade.delete_amenity(wifi.id)
+        facade = self.reopen()
+        self.assertIsNone(facade.get_review(review.id))
+        self.assertIsNone(facade.get_amenity(wifi.id))
+        loaded = facade.get_place(place.id)
+        self.assertEqual(loaded.review_count, 0)
+        self.assertEqual(loaded.amenities, [])
+
+    def test_snapshot_and_tail(self):
+        owner, _, place, review = self.seed()
+        self.facade.journal.snapshot()
+        self.facade.update_user(owner.id, {"last_name": "Smith"})
+        names = sorted(os.listdir(self.tmp.name))
+        self.assertEqual(names, ["snapshot.snap", "wal.00000002.log"])
+        facade = self.reopen()
+        self.assert_recovered(facade, owner, place, review)
+        self.assertEqual(facade.get_user(owner.id).last_name, "Smith")
+
+    def test_snapshot_is_served_lazily(self):
+        owner, _, place, review = self.seed()
+        self.facade.journal.snapshot()
+        facade = self.reopen()
+        self.assertIsNotNone(facade.journal.mapped)
+        self.assert_recovered(facade, owner, place, review)
+        self.assertEqual(
+            [r.id for r in facade.get_reviews_by_place(place.id)],
+            [review.id]
+        )
+
+    def test_torn_write_ignored(self):
+        owner, _, place, review = self.seed()
+        self.facade.journal.close()
+        segment = os.path.join(self.tmp.name, "wal.00000001.log")
+        with open(segment, "a", encoding="utf-8") as f:
+            f.write('{"op":"del","c":"users","id":')
+        self.facade = self.open()
+        self.assert_recovered(self.facade, owner, place, review)
+
+    def test_unresolved_records_logged(self):
+        owner, _, place, review = self.seed()
+        self.facade.journal.close()
+        record = dict(place.to_record(), owner_id="ghost")
+        entries = [
+            {"op": "put", "c": "places", "r": dict(record, id="lost")},
+            {"op": "put", "c": "places", "r": dict(record, id="gone")},
+            {"op": "del", "c": "places", "id": "gone"},
+        ]
+        segment = os.path.join(self.tmp.name, "wal.00000001.log")
+        with open(segment, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(entry) + "\n" for entry in entries)
+        with self.assertLogs("app.persistence.journal", "ERROR") as logs:
+            self.facade = self.open()
+        journal = self.facade.journal
+        self.assertEqual(journal.skipped, 2)
+        self.assertEqual(list(journal.unresolved), [("places", "lost")])
+        self.assertIn("dropped 1 record(s)", logs.output[0])
+        self.assertIn("places lost: KeyError('ghost')", logs.output[0])
+        self.assert_recovered(self.facade, owner, place, review)
+
+    def test_group_commit_from_threads(self):
+        def signup(worker):
+            for i in range(50):
+                self.facade.create_user({
+                    "first_name": "W", "last_name": "T",
+                    "email": f"w{worker}-{i}@example.com",
+                })
+
+        threads = [threading.Thread(target=signup, args=(w,))
+                   for w in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        facade = self.reopen(fsync="never")
+        self.assertEqual(len(facade.get_all_users()), 200)
+
+    def test_batch_is_logged(self):
+        results = self.facade.create_amenities(
+            [{"name": f"A{i}"} for i in range(10)]
+        )
+        facade = self.reopen()
+        self.assertEqual(
+            [a.id for a in facade.get_all_amenities()],
+            [a.id for a, _ in results]
+        )
+
+    def test_unknown_fsync_policy(self):
+        with self.assertRaises(ValueError):
+            Journal(self.tmp.name, fsync="sometimes")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+import unittest
+from app import create_app
+from app.metrics import Registry
+from app.services.facade import HBnBFacade
+
+
+def value(text, series):
+    """Value of the sample named series in a /metrics text, or 0."""
+    for line in text.splitlines():
+        if line.startswith(series + " "):
+            return float(line.rsplit(" ", 1)[1])
+    return 0
+
+
+class TestRegistry(unittest.TestCase):
+    def test_histogram_render(self):
+        registry = Registry()
+        histogram = registry.histogram("latency", "Latency.", ("route",),
+                                       buckets=(0.1, 1.0))
+        for seconds in (0.05, 0.1, 0.5, 3.0):
+            histogram.observe(('/a"b',), seconds)
+        lines = histogram.render()
+        self.assertEqual(lines[:2], ["# HELP latency Latency.",
+                                     "# TYPE latency histogram"])
+        self.assertEqual(lines[2:], [
+            'latency_bucket{route="/a\\"b",le="0.1"} 2',
+            'latency_bucket{route="/a\\"b",le="1.0"} 3',
+            'latency_bucket{route="/a\\"b",le="+Inf"} 4',
+            'latency_sum{route="/a\\"b"} 3.65',
+            'latency_count{route="/a\\"b"} 4',
+        ])
+
+    def test_facade_and_repository_calls(self):
+        registry = Registry()
+        facade = HBnBFacade(metrics=registry)
+        user = facade.create_user({"first_name": "Jane", "last_name": "Doe",
+                                   "email": "jane@example.com"})
+        facade.get_user(user.id)
+        with self.assertRaises(ValueError):
+            facade.create_user({"first_name": "Jane", "last_name": "Doe",
+                                "email": "jane@example.com"})
+        text = registry.render()
+        self.assertEqual(value(text, 'hbnb_facade_call_duration_seconds_'
+                               'count{method="create_user"}'), 2)
+        self.assertEqual(value(text, 'hbnb_facade_errors_total{method='
+                               '"create_user",exception="ValueError"}'), 1)
+        self.assertEqual(value(text, 'hbnb_repository_operation_duration_'
+                               'seconds_count{collection="users",'
+                               'operation="get"}'), 1)
+
+
+class TestMetricsEndpoint(unittest.TestCase):
+    def test_requests_timed_per_route_and_status(self):
+        client = create_app().test_client()
+        created = ('hbnb_http_request_duration_seconds_count{method="POST",'
+                   'route="/api/v1/users/",status="201"}')
+        missing = ('hbnb_http_request_duration_seconds_count{method="GET",'
+                   'route="/api/v1/users/<string:user_id>",status="404"}')
+        before = client.get('/metrics').get_data(as_text=True)
+        client.post('/api/v1/users/', json={
+            "first_name": "Jane", "last_name": "Doe",
+            "email": "metrics@example.com",
+        })
+        client.get('/api/v1/users/unknown')
+        r = client.get('/metrics')
+        self.assertEqual(r.status_code, 200)
+        self.assertTrue(r.content_type.startswith('text/plain'))
+        text = r.get_data(as_text=True)
+        self.assertEqual(value(text, created), value(before, created) + 1)
+        self.assertEqual(value(text, missing), value(before, missing) + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
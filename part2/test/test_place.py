@@ -24,6 +24,20 @@ class TestPlaceEndpoints(unittest.TestCase):
         self.assertEqual(r_am.status_code, 201, msg=r_am.get_json())
         self.amenity_id = r_am.get_json()["id"]
 
+    def _create_place(self, title, price=10.0, latitude=1.0, longitude=1.0,
+                      amenities=()):
+        r = self.client.post('/api/v1/places/', json={
+            "title": title,
+            "description": "",
+            "price": price,
+            "latitude": latitude,
+            "longitude": longitude,
+            "owner_id": self.user_id,
+            "amenities": list(amenities)
+        })
+        self.assertEqual(r.status_code, 201, msg=r.get_json())
+        return r.get_json()["id"]
+
     def test_create_place_ok(self):
         r = self.client.post('/api/v1/places/', json={
             "title": "Nice House",
@@ -98,11 +112,235 @@ class TestPlaceEndpoints(unittest.TestCase):
         self.assertEqual(r.status_code, 200, msg=r.get_json())
         self.assertEqual(r.get_json()["title"], "After")
 
+    def test_get_place_reflects_update(self):
+        place_id = self._create_place("Cached", price=42.0)
+        first = self.client.get(f'/api/v1/places/{place_id}').get_json()
+        self.assertEqual(first["title"], "Cached")
+
+        self.client.put(f'/api/v1/places/{place_id}',
+                        json={"title": "Refreshed"})
+        second = self.client.get(f'/api/v1/places/{place_id}').get_json()
+        self.assertEqual(second["title"], "Refreshed")
+        self.assertEqual(first["title"], "Cached")
+
+    def test_conditional_get_place(self):
+        place_id = self._create_place("Tagged", price=42.0)
+        url = f'/api/v1/places/{place_id}'
+        first = self.client.get(url)
+        etag = first.headers["ETag"]
+
+        r = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(r.status_code, 304)
+        self.assertEqual(r.headers["ETag"], etag)
+
+        self.client.put(url, json={"price": 43.0})
+        r = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(r.status_code, 200)
+        self.assertNotEqual(r.headers["ETag"], etag)
+
+    def test_conditional_get_places_list(self):
+        first = self.client.get('/api/v1/places/?limit=5')
+        etag = first.headers["ETag"]
+        r = self.client.get('/api/v1/places/?limit=5',
+                            headers={"If-None-Match": etag})
+        self.assertEqual(r.status_code, 304)
+
+        r = self.client.get('/api/v1/places/?limit=6',
+                            headers={"If-None-Match": etag})
+        self.assertEqual(r.status_code, 200)
+
+        self._create_place("New one", price=42.0)
+        r = self.client.get('/api/v1/places/?limit=5',
+                            headers={"If-None-Match": etag})
+        self.assertEqual(r.status_code, 200)
+
     def test_update_place_not_found(self):
         r = self.client.put('/api/v1/places/does-not-exist',
                             json={"title": "X"})
         self.assertEqual(r.status_code, 404, msg=r.get_json())
 
+    def test_non_finite_coordinates_rejected(self):
+        count = len(self.client.get('/api/v1/places/').get_json())
+        # Flask parses NaN and Infinity, which json= would not send as is.
+        body = ('{"title": "Nowhere", "price": 10.0, "latitude": %s, '
+                '"longitude": 1.0, "owner_id": "%s", "amenities": []}')
+        for value in ("NaN", "Infinity"):
+            r = self.client.post('/api/v1/places/',
+                                 data=body % (value, self.user_id),
+                                 content_type='application/json')
+            self.assertEqual(r.status_code, 400, msg=value)
+            self.assertEqual(r.get_json(), {
+                "error": "latitude must be between -90.0 and 90.0"
+            })
+        self.assertEqual(len(self.client.get('/api/v1/places/').get_json()),
+                         count)
+
+        place_id = self._create_place("Somewhere", latitude=10.0)
+        url = f'/api/v1/places/{place_id}'
+        r = self.client.put(url, data='{"longitude": NaN}',
+                            content_type='application/json')
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(self.client.get(url).get_json()["longitude"], 1.0)
+        r = self.client.get('/api/v1/places/search?near=10,1&k=1')
+        self.assertEqual([p["id"] for p in r.get_json()], [place_id])
+
+    def test_update_place_read_only_fields(self):
+        place_id = self._create_place("Kept", price=42.0)
+        url = f'/api/v1/places/{place_id}'
+        for key in ["review_count", "rating_sum", "rating_histogram",
+                    "average_rating", "version", "_ratings"]:
+            r = self.client.put(url, json={"title": "Changed", key: 3})
+            self.assertEqual(r.status_code, 400, msg=key)
+            self.assertEqual(r.get_json(),
+                             {"error": f"{key} cannot be updated"})
+        place = self.client.get(url).get_json()
+        self.assertEqual((place["title"], place["review_count"]), ("Kept", 0))
+
+    def test_search_bbox_and_radius(self):
+        inside = self._create_place("Inside", latitude=-45.01,
+                                    longitude=170.01)
+        outside = self._create_place("Outside", latitude=-46.5,
+                                     longitude=170.01)
+
+        r = self.client.get(
+            '/api/v1/places/search?bbox=-45.5,169.5,-44.5,170.5'
+        )
+        self.assertEqual(r.status_code, 200, msg=r.get_json())
+        ids = [p["id"] for p in r.get_json()]
+        self.assertIn(inside, ids)
+        self.assertNotIn(outside, ids)
+
+        r = self.client.get(
+            '/api/v1/places/search?near=-45,170&radius_km=50'
+        )
+        self.assertEqual(r.status_code, 200, msg=r.get_json())
+        found = {p["id"]: p["distance_km"] for p in r.get_json()}
+        self.assertIn(inside, found)
+        self.assertNotIn(outside, found)
+        self.assertLess(found[inside], 2.0)
+
+    def test_search_k_nearest_follows_updates(self):
+        near = self._create_place("Near", latitude=62.001, longitude=-150.0)
+        far = self._create_place("Far", latitude=62.5, longitude=-150.0)
+
+        r = self.client.get('/api/v1/places/search?near=62,-150&k=1')
+        self.assertEqual([p["id"] for p in r.get_json()], [near])
+
+        self.client.put(f'/api/v1/places/{far}',
+                        json={"latitude": 62.0, "longitude": -150.0})
+        r = self.client.get('/api/v1/places/search?near=62,-150&k=2')
+        self.assertEqual([p["id"] for p in r.get_json()], [far, near])
+
+    def test_search_bbox_crossing_antimeridian(self):
+        place_id = self._create_place("Dateline", latitude=-17.0,
+                                      longitude=-179.9)
+        r = self.client.get('/api/v1/places/search?bbox=-18,179,-16,-179')
+        self.assertIn(place_id, [p["id"] for p in r.get_json()])
+
+    def test_search_invalid_params(self):
+        for query in ("", "bbox=1,2,3", "near=1,2", "near=95,0&k=1",
+                      "near=1,2&k=0", "near=1,2&radius_km=-1",
+                      "bbox=10,0,5,1"):
+            r = self.client.get(f'/api/v1/places/search?{query}')
+            self.assertEqual(r.status_code, 400, msg=query)
+
+    def test_search_rejects_non_finite_numbers(self):
+        for query, error in [
+            ("near=0,0&radius_km=inf", "radius_km must be 1 comma "
+             "separated numbers"),
+            ("near=0,0&radius_km=nan", "radius_km must be 1 comma "
+             "separated numbers"),
+            ("near=nan,0&k=1", "near must be 2 comma separated numbers"),
+            ("bbox=nan,0,1,1", "bbox must be 4 comma separated numbers"),
+            ("bbox=0,0,1,inf", "bbox must be 4 comma separated numbers"),
+        ]:
+            r = self.client.get(f'/api/v1/places/search?{query}')
+            self.assertEqual(r.status_code, 400, msg=query)
+            self.assertEqual(r.get_json(), {"error": error}, msg=query)
+
+    def test_price_range_paginates_in_price_order(self):
+        ids = {price: self._create_place(f"P{price}", price=price)
+               for price in (7775.0, 7771.0, 7773.0, 7772.0)}
+        self._create_place("Too expensive", price=7790.0)
+
+        seen = []
+        url = '/api/v1/places/?min_price=7770&max_price=7780&limit=3'
+        r = self.client.get(url)
+        while True:
+            self.assertEqual(r.status_code, 200, msg=r.get_json())
+            seen.extend(p["id"] for p in r.get_json())
+            cursor = r.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+            r = self.client.get(f'{url}&cursor={cursor}')
+        self.assertEqual(seen, [ids[p] for p in sorted(ids)])
+
+        self.client.put(f'/api/v1/places/{ids[7775.0]}',
+                        json={"price": 7770.5})
+        r = self.client.get('/api/v1/places/?min_price=7770&max_price=7780')
+        self.assertEqual(r.get_json()[0]["id"], ids[7775.0])
+
+    def test_price_filter_invalid_params(self):
+        for query in ("min_price=abc", "sort=title", "min_price=5&max_price=1",
+                      "sort=price&cursor=nope"):
+            r = self.client.get(f'/api/v1/places/?{query}')
+            self.assertEqual(r.status_code, 400, msg=query)
+
+    def test_price_filter_rejects_non_finite_numbers(self):
+        for query, error in [
+            ("min_price=nan", "min_price must be a number"),
+            ("max_price=inf", "max_price must be a number"),
+            ("min_price=-Infinity", "min_price must be a number"),
+            ("sort=price&cursor=nan:x", "Invalid cursor"),
+        ]:
+            r = self.client.get(f'/api/v1/places/?{query}')
+            self.assertEqual(r.status_code, 400, msg=query)
+            self.assertEqual(r.get_json(), {"error": error}, msg=query)
+
+    def test_filter_by_amenities(self):
+        pool, parking = [
+            self.client.post('/api/v1/amenities/',
+                             json={"name": name}).get_json()["id"]
+            for name in ("Pool", "Parking")
+        ]
+        both = self._create_place("Both", price=80.0,
+                                  amenities=[pool, parking])
+        pool_only = self._create_place("Pool only", price=60.0,
+                                       amenities=[pool])
+        cheap = self._create_place("Cheap", price=20.0,
+                                   amenities=[parking, pool])
+
+        r = self.client.get(f'/api/v1/places/?amenities={pool},{parking}')
+        self.assertEqual(r.status_code, 200, msg=r.get_json())
+        self.assertEqual([p["id"] for p in r.get_json()], [both, cheap])
+
+        r = self.client.get(
+            f'/api/v1/places/?amenities={pool},{parking}&sort=price&limit=1'
+        )
+        self.assertEqual([p["id"] for p in r.get_json()], [cheap])
+        cursor = r.headers["X-Next-Cursor"]
+        r = self.client.get(f'/api/v1/places/?amenities={pool},{parking}'
+                            f'&sort=price&limit=1&cursor={cursor}')
+        self.assertEqual([p["id"] for p in r.get_json()], [both])
+        self.assertNotIn("X-Next-Cursor", r.headers)
+
+        self.client.put(f'/api/v1/places/{pool_only}',
+                        json={"amenities": [parking, pool]})
+        self.client.put(f'/api/v1/places/{both}', json={"amenities": [pool]})
+        r = self.client.get(f'/api/v1/places/?amenities={parking},{pool}')
+        self.assertEqual([p["id"] for p in r.get_json()], [pool_only, cheap])
+
+        self.client.delete(f'/api/v1/amenities/{parking}')
+        r = self.client.get(f'/api/v1/places/?amenities={pool}')
+        self.assertEqual([p["id"] for p in r.get_json()],
+                         [both, pool_only, cheap])
+        place = self.client.get(f'/api/v1/places/{cheap}').get_json()
+        self.assertEqual(place["amenities"], [pool])
+
+    def test_filter_by_amenities_invalid(self):
+        r = self.client.get('/api/v1/places/?amenities=a,,b')
+        self.assertEqual(r.status_code, 400)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,117 @@
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from collections import Counter
+from app import create_app
+from app.profiling import (
+    Sampler, collapse, facade_method, folded, handler, profile_process
+)
+from app.services import settings
+
+
+def spin(seconds):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        pass
+
+
+class TestStacks(unittest.TestCase):
+    def test_collapse_outermost_first(self):
+        def inner():
+            return collapse(sys._getframe())
+        stack = inner().split(";")
+        self.assertEqual(stack[-1], "test_profiling:inner")
+        self.assertEqual(stack[-2],
+                         "test_profiling:test_collapse_outermost_first")
+
+    def test_folded_and_request_frames(self):
+        stacks = Counter({
+            "flask.app:wsgi_app;app.api.v1.conditional:wrapper;"
+            "app.api.v1.places:get;app.services.facade:get_all_places;"
+            "app.services.facade:_get_places": 3,
+            "flask.app:wsgi_app;app.api.v1.conditional:wrapper;"
+            "app.api.v1.places:get;app.models.base:to_dict": 5,
+        })
+        self.assertEqual(folded(stacks).splitlines()[0],
+                         "flask.app:wsgi_app;app.api.v1.conditional:wrapper;"
+                         "app.api.v1.places:get;app.models.base:to_dict 5")
+        self.assertEqual(handler(stacks), "app.api.v1.places:get")
+        self.assertEqual(facade_method(stacks),
+                         "app.services.facade:get_all_places")
+        self.assertIsNone(facade_method(Counter()))
+
+
+class TestSampler(unittest.TestCase):
+    def test_samples_watched_thread(self):
+        sampler = Sampler(interval=0.001)
+        stacks = sampler.watch(threading.get_ident())
+        spin(0.2)
+        self.assertIs(sampler.unwatch(threading.get_ident()), stacks)
+        self.assertGreater(sum(stacks.values()), 0)
+        self.assertTrue(all("test_profiling:spin" in s for s in stacks))
+
+    def test_profile_process(self):
+        worker = threading.Thread(target=spin, args=(0.3,), name="spinner")
+        worker.start()
+        stacks = profile_process(0.1, interval=0.001)
+        worker.join()
+        self.assertTrue(any(s.startswith("spinner;") and
+                            s.endswith("test_profiling:spin")
+                            for s in stacks))
+
+
+class TestSlowRequests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.saved = (settings.SLOW_REQUEST_MS, settings.PROFILE_DIR,
+                      settings.ADMIN_TOKEN)
+        # Every request counts as slow.
+        settings.SLOW_REQUEST_MS = 1e-6
+        settings.PROFILE_DIR = self.tmp.name
+        settings.ADMIN_TOKEN = "secret"
+        self.client = create_app().test_client()
+        self.admin = {"Authorization": "Bearer secret"}
+
+    def tearDown(self):
+        (settings.SLOW_REQUEST_MS, settings.PROFILE_DIR,
+         settings.ADMIN_TOKEN) = self.saved
+        self.tmp.cleanup()
+
+    def test_slow_request_recorded(self):
+        r = self.client.post('/api/v1/amenities/', json={"name": "Spa"})
+        self.assertEqual(r.status_code, 201)
+        r = self.client.get('/admin/slow-requests', headers=self.admin)
+        profile = r.get_json()[-1]
+        self.assertEqual(profile["method"], "POST")
+        self.assertEqual(profile["path"], "/api/v1/amenities/")
+        self.assertEqual(profile["route"], "/api/v1/amenities/")
+        self.assertNotIn("stacks", profile)
+        r = self.client.get('/admin/slow-requests/' + profile["id"],
+                            headers=self.admin)
+        self.assertEqual(r.status_code, 200)
+        self.assertTrue(r.content_type.startswith("text/plain"))
+        files = sorted(os.listdir(self.tmp.name))
+        self.assertIn(profile["id"] + ".folded", files)
+        self.assertIn(profile["id"] + ".json", files)
+
+    def test_admin_requires_token(self):
+        self.assertEqual(self.client.get('/admin/slow-requests').status_code,
+                         403)
+        r = self.client.get('/admin/profile?seconds=0.05', headers={
+            "Authorization": "Bearer wrong"
+        })
+        self.assertEqual(r.status_code, 403)
+
+    def test_profile_endpoint(self):
+        r = self.client.get('/admin/profile?seconds=0.05',
+                            headers=self.admin)
+        self.assertEqual(r.status_code, 200)
+        r = self.client.get('/admin/profile?seconds=600', headers=self.admin)
+        self.assertEqual(r.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,176 @@
+import unittest
+from app.models.user import User
+from app.persistence.indexes import HashIndex, OrderedKeys, SortedIndex
+from app.persistence.repository import InMemoryRepository
+
+
+class FailingIndex(HashIndex):
+    """Hash index refusing the value "Bad", as a broken index would."""
+
+    def _insert(self, value, obj_id):
+        if value == "Bad":
+            raise RuntimeError("index failure")
+        HashIndex._insert(self, value, obj_id)
+
+
+class TestInMemoryRepositoryIndexes(unittest.TestCase):
+    def setUp(self):
+        self.repo = InMemoryRepository(indexes=[
+            HashIndex("email", unique=True),
+            HashIndex("last_name"),
+        ])
+        self.jane = User("Jane", "Doe", "jane@example.com")
+        self.john = User("John", "Doe", "john@example.com")
+        self.repo.add(self.jane)
+        self.repo.add(self.john)
+
+    def test_get_by_attribute_uses_index(self):
+        found = self.repo.get_by_attribute("email", "john@example.com")
+        self.assertIs(found, self.john)
+        self.assertIsNone(
+            self.repo.get_by_attribute("email", "nobody@example.com")
+        )
+
+    def test_non_unique_index(self):
+        ids = self.repo.index("last_name").find("Doe")
+        self.assertEqual(ids, [self.jane.id, self.john.id])
+
+    def test_add_duplicate_rejected(self):
+        with self.assertRaises(ValueError):
+            self.repo.add(User("Other", "Person", "jane@example.com"))
+        self.assertEqual(len(self.repo.get_all()), 2)
+
+    def test_failed_index_insert_leaves_nothing_behind(self):
+        repo = InMemoryRepository(indexes=[
+            HashIndex("email", unique=True),
+            FailingIndex("first_name"),
+        ])
+        bad = User("Bad", "Doe", "bad@example.com")
+        with self.assertRaises(RuntimeError):
+            repo.add(bad)
+        self.assertIsNone(repo.get(bad.id))
+        self.assertEqual(repo.get_all(), [])
+        self.assertIsNone(repo.get_by_attribute("email", "bad@example.com"))
+        repo.add(User("Good", "Doe", "bad@example.com"))
+
+    def test_update_keeps_index_in_sync(self):
+        self.repo.update(self.jane.id, {"email": "jane@new.com",
+                                        "last_name": "Smith"})
+        self.assertIsNone(
+            self.repo.get_by_attribute("email", "jane@example.com")
+        )
+        self.assertIs(self.repo.get_by_attribute("email", "jane@new.com"),
+                      self.jane)
+        self.assertEqual(self.repo.index("last_name").find("Doe"),
+                         [self.john.id])
+
+    def test_update_conflict_is_rolled_back(self):
+        with self.assertRaises(ValueError):
+            self.repo.update(self.jane.id, {"first_name": "Janet",
+                                            "email": "john@example.com"})
+        self.assertEqual(self.jane.email, "jane@example.com")
+        self.assertEqual(self.jane.first_name, "Jane")
+        self.assertIs(self.repo.get_by_attribute("email", "john@example.com"),
+                      self.john)
+
+    def test_update_rollback_refreshes_cached_dict(self):
+        class SerializingIndex(HashIndex):
+            def check(self, obj):
+                obj.to_dict()
+
+        repo = InMemoryRepository(indexes=[
+            SerializingIndex("first_name"),
+            HashIndex("email", unique=True),
+        ])
+        repo.add(self.jane)
+        repo.add(self.john)
+        with self.assertRaises(ValueError):
+            repo.update(self.jane.id, {"first_name": "Janet",
+                                       "email": "john@example.com"})
+        self.assertEqual(self.jane.to_dict()["first_name"], "Jane")
+
+    def test_failed_index_refresh_is_rolled_back(self):
+        repo = InMemoryRepository(indexes=[
+            HashIndex("email", unique=True),
+            FailingIndex("first_name"),
+        ])
+        jane = User("Jane", "Doe", "jane@example.com")
+        repo.add(jane)
+        with self.assertRaises(RuntimeError):
+            repo.update(jane.id, {"first_name": "Bad",
+                                  "email": "bad@example.com"})
+        self.assertEqual(jane.first_name, "Jane")
+        self.assertIs(repo.get_by_attribute("email", "jane@example.com"), jane)
+        self.assertIsNone(repo.get_by_attribute("email", "bad@example.com"))
+        self.assertEqual(repo.index("first_name").find("Jane"), [jane.id])
+
+    def test_page(self):
+        page, cursor = self.repo.page(1)
+        self.assertEqual(page, [self.jane])
+        self.repo.delete(self.jane.id)
+        page, cursor = self.repo.page(1, cursor)
+        self.assertEqual(page, [self.john])
+        self.assertIsNone(cursor)
+
+    def test_delete_frees_unique_value(self):
+        self.repo.delete(self.jane.id)
+        self.assertIsNone(
+            self.repo.get_by_attribute("email", "jane@example.com")
+        )
+        self.repo.add(User("Jane", "Again", "jane@example.com"))
+
+
+class TestSortedIndex(unittest.TestCase):
+    def setUp(self):
+        self.repo = InMemoryRepository(indexes=[SortedIndex("last_name")])
+        self.users = [User("U", name, f"{name}@example.com")
+                      for name in ("Dupont", "Bernard", "Martin", "Durand")]
+        for user in self.users:
+            self.repo.add(user)
+
+    def names(self, ids):
+        return [self.repo.get(i).last_name for i in ids]
+
+    def test_range_and_cursor(self):
+        index = self.repo.index("last_name")
+        ids, cursor = index.range("C", "E", limit=1)
+        self.assertEqual(self.names(ids), ["Dupont"])
+        ids, cursor = index.range("C", "E", after=cursor)
+        self.assertEqual(self.names(ids), ["Durand"])
+        self.assertIsNone(cursor)
+
+    def test_update_moves_entry(self):
+        self.repo.update(self.users[2].id, {"last_name": "Aubert"})
+        ids, _ = self.repo.index("last_name").range()
+        self.assertEqual(self.names(ids),
+                         ["Aubert", "Bernard", "Dupont", "Durand"])
+
+
+class TestOrderedKeys(unittest.TestCase):
+    def test_page_walks_insertion_order(self):
+        keys = OrderedKeys()
+        for key in "abcde":
+            keys.add(key)
+        page, cursor = keys.page(0, 2)
+        self.assertEqual(page, ["a", "b"])
+        page, cursor = keys.page(cursor, 2)
+        self.assertEqual(page, ["c", "d"])
+        page, cursor = keys.page(cursor, 2)
+        self.assertEqual(page, ["e"])
+        self.assertIsNone(cursor)
+
+    def test_cursor_stable_across_changes(self):
+        keys = OrderedKeys()
+        for i in range(200):
+            keys.add(i)
+        _, cursor = keys.page(0, 10)
+        for i in range(150):
+            keys.discard(i)
+        keys.add("new")
+        page, _ = keys.page(cursor)
+        self.assertEqual(page, list(range(150, 200)) + ["new"])
+        self.assertEqual(len(keys), 51)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -99,6 +99,134 @@ class TestReviewEndpoints(unittest.TestCase):
         )
         self.assertEqual(r.status_code, 404, msg=r.get_json())
 
+    def _create_review(self, text, rating=4):
+        r = self.client.post('/api/v1/reviews/', json={
+            "text": text,
+            "rating": rating,
+            "user_id": self.user_id,
+            "place_id": self.place_id
+        })
+        self.assertEqual(r.status_code, 201, msg=r.get_json())
+        return r.get_json()["id"]
+
+    def test_place_reviews_paginated(self):
+        ids = [self._create_review(f"Review {i}") for i in range(5)]
+
+        seen = []
+        url = f'/api/v1/places/{self.place_id}/reviews?limit=2'
+        r = self.client.get(url)
+        while True:
+            self.assertEqual(r.status_code, 200, msg=r.get_json())
+            self.assertLessEqual(len(r.get_json()), 2)
+            seen.extend(item["id"] for item in r.get_json())
+            cursor = r.headers.get("X-Next-Cursor")
+            if cursor is None:
+                break
+            r = self.client.get(f'{url}&cursor={cursor}')
+        self.assertEqual(seen, ids)
+
+    def test_place_reviews_cursor_survives_delete(self):
+        ids = [self._create_review(f"Review {i}") for i in range(4)]
+        url = f'/api/v1/places/{self.place_id}/reviews?limit=2'
+        first = self.client.get(url)
+        cursor = first.headers["X-Next-Cursor"]
+
+        self.client.delete(f'/api/v1/reviews/{ids[1]}')
+        self.client.delete(f'/api/v1/reviews/{ids[2]}')
+        r = self.client.get(f'{url}&cursor={cursor}')
+        self.assertEqual([item["id"] for item in r.get_json()], [ids[3]])
+
+    def test_place_reviews_invalid_params(self):
+        base = f'/api/v1/places/{self.place_id}/reviews'
+        self.assertEqual(self.client.get(f'{base}?limit=0').status_code, 400)
+        self.assertEqual(
+            self.client.get(f'{base}?cursor=abc').status_code, 400
+        )
+        r = self.client.get('/api/v1/places/does-not-exist/reviews')
+        self.assertEqual(r.status_code, 404)
+
+    def test_delete_review_updates_place_count(self):
+        review_id = self._create_review("Soon gone")
+        place = self.client.get(f'/api/v1/places/{self.place_id}')
+        self.assertEqual(place.get_json()["review_count"], 1)
+
+        r = self.client.delete(f'/api/v1/reviews/{review_id}')
+        self.assertEqual(r.status_code, 200, msg=r.get_json())
+        place = self.client.get(f'/api/v1/places/{self.place_id}')
+        self.assertEqual(place.get_json()["review_count"], 0)
+
+    def _place(self):
+        return self.client.get(f'/api/v1/places/{self.place_id}').get_json()
+
+    def test_rating_aggregates(self):
+        first = self._create_review("Great", 5)
+        second = self._create_review("Average", 3)
+        place = self._place()
+        self.assertEqual(place["review_count"], 2)
+        self.assertEqual(place["rating_sum"], 8)
+        self.assertEqual(place["average_rating"], 4.0)
+        self.assertEqual(place["rating_histogram"], [0, 0, 1, 0, 1])
+
+        self.client.put(f'/api/v1/reviews/{second}', json={"rating": 1})
+        place = self._place()
+        self.assertEqual(place["rating_histogram"], [1, 0, 0, 0, 1])
+        self.assertEqual(place["average_rating"], 3.0)
+
+        self.client.delete(f'/api/v1/reviews/{first}')
+        place = self._place()
+        self.assertEqual(place["review_count"], 1)
+        self.assertEqual(place["rating_histogram"], [1, 0, 0, 0, 0])
+        self.assertEqual(place["average_rating"], 1.0)
+
+    def test_delete_review_invalidates_place_etag(self):
+        review_id = self._create_review("Tagged", 2)
+        url = f'/api/v1/places/{self.place_id}'
+        etag = self.client.get(url).headers["ETag"]
+        reviews_url = f'{url}/reviews'
+        reviews_etag = self.client.get(reviews_url).headers["ETag"]
+
+        self.client.delete(f'/api/v1/reviews/{review_id}')
+        r = self.client.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.get_json()["review_count"], 0)
+        r = self.client.get(reviews_url,
+                            headers={"If-None-Match": reviews_etag})
+        self.assertEqual(r.status_code, 200)
+        self.assertEqual(r.get_json(), [])
+
+    def test_batch_create_reviews(self):
+        r = self.client.post('/api/v1/reviews/batch', json=[
+            {"text": "One", "rating": 4, "user_id": self.user_id,
+             "place_id": self.place_id},
+            {"text": "Two", "rating": 2, "user_id": self.user_id,
+             "place_id": self.place_id},
+            {"text": "Lost", "rating": 2, "user_id": self.user_id,
+             "place_id": "does-not-exist"},
+        ])
+        self.assertEqual(r.status_code, 207, msg=r.get_json())
+        self.assertEqual([item["status"] for item in r.get_json()],
+                         [201, 201, 400])
+        self.assertEqual(r.get_json()[2]["error"], "Place not found")
+        place = self._place()
+        self.assertEqual(place["review_count"], 2)
+        self.assertEqual(place["rating_sum"], 6)
+
+    def test_top_rated(self):
+        for i in range(6):
+            self._create_review(f"Perfect {i}", 5)
+        r = self.client.get('/api/v1/places/top?k=1')
+        self.assertEqual(r.status_code, 200, msg=r.get_json())
+        self.assertEqual([p["id"] for p in r.get_json()], [self.place_id])
+
+        r = self.client.get('/api/v1/places/top?k=100')
+        averages = [p["average_rating"] for p in r.get_json()]
+        self.assertEqual(averages, sorted(averages, reverse=True))
+        self.assertNotIn(None, averages)
+
+        self.assertEqual(
+            self.client.get('/api/v1/places/top?k=0').status_code, 400
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,128 @@
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+import unittest
+import urllib.error
+import urllib.request
+from app import create_app
+from app.server import PoolWSGIServer, restart_delay
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def request(url, data=None):
+    body = None if data is None else json.dumps(data).encode()
+    req = urllib.request.Request(url, body, {
+        "Content-Type": "application/json"
+    })
+    try:
+        with urllib.request.urlopen(req, timeout=5) as r:
+            return r.status, json.loads(r.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+class TestReadOnly(unittest.TestCase):
+    def test_writes_rejected(self):
+        app = create_app()
+        app.config["READ_ONLY"] = True
+        client = app.test_client()
+        self.assertEqual(client.get('/api/v1/users/').status_code, 200)
+        r = client.post('/api/v1/users/', json={
+            "first_name": "Jane", "last_name": "Doe",
+            "email": "read.only@example.com",
+        })
+        self.assertEqual(r.status_code, 503)
+        self.assertEqual(r.get_json(), {"error": "This server is read-only"})
+
+
+class TestPoolWSGIServer(unittest.TestCase):
+    def test_serves_from_pool(self):
+        server = PoolWSGIServer("127.0.0.1", 0, create_app(), threads=2)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.start()
+        try:
+            url = "http://127.0.0.1:{}/api/v1/users/".format(server.port)
+            results = []
+            clients = [threading.Thread(
+                target=lambda: results.append(request(url)[0])
+            ) for _ in range(6)]
+            for client in clients:
+                client.start()
+            for client in clients:
+                client.join()
+            self.assertEqual(results, [200] * 6)
+        finally:
+            server.shutdown()
+            thread.join()
+            server.server_close()
+            server.pool.shutdown()
+
+
+class TestPrefork(unittest.TestCase):
+    def test_restarts_back_off(self):
+        delays = []
+        delay = 0.0
+        for _ in range(12):
+            delay = restart_delay(delay, uptime=0.01)
+            delays.append(delay)
+        self.assertEqual(delays[:3], [0.1, 0.2, 0.4])
+        self.assertEqual(delays[-1], 30.0)
+        self.assertEqual(restart_delay(30.0, uptime=60), 0.0)
+
+    def test_workers_share_listener(self):
+        port = free_port()
+        env = dict(os.environ, HBNB_CONFIG="production", HBNB_HOST="127.0.0.1",
+                   HBNB_PORT=str(port), HBNB_WORKERS="2")
+        env.pop("HBNB_JOURNAL", None)
+        process = subprocess.Popen([sys.executable, "serve.py"], cwd=ROOT,
+                                   env=env)
+        try:
+            url = "http://127.0.0.1:{}/api/v1/users/".format(port)
+            status = None
+            for _ in range(100):
+                try:
+                    status, _ = request(url)
+                    break
+                except OSError:
+                    time.sleep(0.05)
+            self.assertEqual(status, 200)
+            status, body = request(url, {
+                "first_name": "Jane", "last_name": "Doe",
+                "email": "jane@example.com",
+            })
+            self.assertEqual(status, 503)
+        finally:
+            process.send_signal(signal.SIGTERM)
+            self.assertEqual(process.wait(10), 0)
+
+    def test_crashed_worker_exits_non_zero(self):
+        # No request thread can be started: every worker fails at once.
+        env = dict(os.environ, HBNB_CONFIG="production", HBNB_HOST="127.0.0.1",
+                   HBNB_PORT=str(free_port()), HBNB_WORKERS="2",
+                   HBNB_THREADS="0")
+        env.pop("HBNB_JOURNAL", None)
+        process = subprocess.Popen([sys.executable, "serve.py"], cwd=ROOT,
+                                   env=env, stderr=subprocess.PIPE, text=True)
+        time.sleep(1)
+        process.send_signal(signal.SIGTERM)
+        _, errors = process.communicate(timeout=10)
+        self.assertEqual(process.returncode, 0)
+        self.assertIn("crashed", errors)
+        self.assertIn("ValueError", errors)
+        self.assertIn("exited with status 1", errors)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+import os
+import tempfile
+import unittest
+from app.models.user import User
+from app.persistence.indexes import HashIndex, SortedIndex
+from app.persistence.repository import InMemoryRepository
+from app.persistence.snapshot import MappedSnapshot, write_snapshot
+
+
+class TestSnapshotFormat(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "test.snap")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        records = [
+            {"id": "b", "price": 1.5, "count": 3, "ok": True,
+             "name": "Café", "tags": [1, 2]},
+            {"id": "a", "price": 2, "count": -1, "ok": False,
+             "name": "", "tags": []},
+        ]
+        with open(self.path, "wb") as f:
+            write_snapshot(f, {"things": records, "empty": []}, segment=7)
+        snapshot = MappedSnapshot(self.path)
+        things = snapshot.collections["things"]
+        self.assertEqual(snapshot.meta, {"segment": 7})
+        self.assertEqual(len(things), 2)
+        self.assertEqual(things.record(0), records[0])
+        self.assertEqual(things.record(1), dict(records[1], price=2.0))
+        self.assertEqual(things.row_of("a"), 1)
+        self.assertEqual(things.row_of("b"), 0)
+        self.assertIsNone(things.row_of("c"))
+        self.assertIsNone(things.row_of(None))
+        self.assertEqual(len(snapshot.collections["empty"]), 0)
+        snapshot.close()
+
+    def test_rejects_other_files(self):
+        with open(self.path, "wb") as f:
+            f.write(b"\0" * 64)
+        with self.assertRaises(ValueError):
+            MappedSnapshot(self.path)
+
+
+class TestLazyRepository(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp.name, "users.snap")
+        source = InMemoryRepository()
+        self.users = [User("User", f"N{i}", f"u{i}@example.com")
+                      for i in range(5)]
+        source.add_many(self.users)
+        with open(path, "wb") as f:
+            write_snapshot(f, {"users": source.iter_records()})
+        self.snapshot = MappedSnapshot(path)
+        self.built = []
+        self.repo = self.open()
+
+    def tearDown(self):
+        self.snapshot.close()
+        self.tmp.cleanup()
+
+    def build(self, record):
+        self.built.append(record["id"])
+        return User.from_record(record, None)
+
+    def open(self):
+        repo = InMemoryRepository(indexes=[
+            HashIndex("email", unique=True), SortedIndex("last_name"),
+        ])
+        repo.load_snapshot(self.snapshot.collections["users"], self.build)
+        return repo
+
+    def test_get_materializes_on_demand(self):
+        user = self.repo.get(self.users[3].id)
+        self.assertEqual(user.to_dict(), self.users[3].to_dict())
+        self.assertIs(self.repo.get(user.id), user)
+        self.assertEqual(self.built, [user.id])
+        self.assertIsNone(self.repo.get("missing"))
+
+    def test_page_spans_snapshot_and_new_objects(self):
+        extra = User("New", "User", "new@example.com")
+        self.repo.add(extra)
+        self.repo.delete(self.users[1].id)
+        page, cursor = self.repo.page(3)
+        self.assertEqual([u.id for u in page],
+                         [self.users[0].id, self.users[2].id,
+                          self.users[3].id])
+        page, cursor = self.repo.page(3, cursor)
+        self.assertEqual([u.id for u in page], [self.users[4].id, extra.id])
+        self.assertIsNone(cursor)
+
+    def test_indexes_built_on_first_use(self):
+        found = self.repo.get_by_attribute("email", "u2@example.com")
+        self.assertEqual(found.id, self.users[2].id)
+        # Only the matching user was built, the index used the records.
+        self.assertEqual(self.built, [found.id])
+        with self.assertRaises(ValueError):
+            self.repo.add(User("Dup", "User", "u2@example.com"))
+
+    def test_deferred_writes_are_indexed(self):
+        with self.repo.deferred_indexes():
+            self.repo.update(self.users[0].id, {"last_name": "Zed"})
+            self.repo.add(User("New", "Aaa", "new@example.com"))
+        ids, _ = self.repo.index("last_name").range()
+        names = [self.repo.get(i).last_name for i in ids]
+        self.assertEqual(names, ["Aaa", "N1", "N2", "N3", "N4", "Zed"])
+
+    def test_iter_records(self):
+        self.repo.update(self.users[0].id, {"last_name": "Zed"})
+        records = list(self.repo.iter_records())
+        self.assertEqual(records[0]["last_name"], "Zed")
+        self.assertEqual([r["id"] for r in records],
+                         [u.id for u in self.users])
+        self.assertEqual(self.built, [self.users[0].id])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,148 @@
+import gc
+import os
+import threading
+import unittest
+from app.persistence.indexes import HashIndex
+from app.services.facade import HBnBFacade
+from persistent_facade import PersistentFacadeMixin
+
+
+class SerializingIndex(HashIndex):
+    """Index calling to_dict mid-update, like a concurrent reader."""
+
+    def check(self, obj):
+        obj.to_dict()
+
+
+class TestSQLiteBackend(PersistentFacadeMixin, unittest.TestCase):
+    def open(self):
+        return HBnBFacade("sqlite", os.path.join(self.tmp.name, "hbnb.db"))
+
+    def close(self):
+        self.facade.pool.close()
+
+    def test_unknown_backend(self):
+        with self.assertRaises(ValueError):
+            HBnBFacade("postgres")
+
+    def test_data_survives_reopen(self):
+        owner, wifi, place, review = self.seed()
+        facade = self.reopen()
+
+        user = facade.get_user_by_email("jane@example.com")
+        self.assertEqual(user.to_dict(), owner.to_dict())
+        loaded = facade.get_place(place.id)
+        self.assertEqual(loaded.to_dict(), place.to_dict())
+        self.assertIs(loaded.owner, user)
+        self.assertEqual(loaded.average_rating, 4.0)
+        self.assertEqual(facade.get_review(review.id).to_dict(),
+                         review.to_dict())
+        self.assertEqual(
+            [r.id for r in facade.get_reviews_by_place(place.id)],
+            [review.id]
+        )
+
+    def test_memory_indexes_rebuilt_on_open(self):
+        _, wifi, place, _ = self.seed()
+        facade = self.reopen()
+
+        places, _ = facade.get_places_by_price(50, 100)
+        self.assertEqual([p.id for p in places], [place.id])
+        places, _ = facade.get_places_with_amenities([wifi.id])
+        self.assertEqual([p.id for p in places], [place.id])
+        self.assertEqual([p.id for p in facade.get_top_rated_places(1)],
+                         [place.id])
+        found = facade.search_places_near(48.85, 2.35, radius_km=1)
+        self.assertEqual([p.id for p, _ in found], [place.id])
+
+    def test_identity_map(self):
+        owner, _, place, _ = self.seed()
+        self.assertIs(self.facade.get_user(owner.id), owner)
+        self.assertIs(self.facade.get_place(place.id).owner, owner)
+
+    def test_recently_used_objects_stay_loaded(self):
+        repo = self.facade.amenity_repo
+        repo._cache_size = 2
+        ids = [self.facade.create_amenity({"name": f"A{i}"}).id
+               for i in range(3)]
+        # Only the weak map references the first one now.
+        self.assertEqual(list(repo._recent), ids[1:])
+        amenity = self.facade.get_amenity(ids[2])
+        amenity.to_dict()
+        del amenity
+        gc.collect()
+        # The same instance, to_dict() cache included, serves the next read.
+        self.assertIsNotNone(self.facade.get_amenity(ids[2])._cached)
+        self.assertNotIn(ids[0], repo._identity)
+        self.assertEqual(self.facade.get_amenity(ids[0]).name, "A0")
+        self.assertEqual(list(repo._recent), [ids[2], ids[0]])
+
+    def test_unique_email(self):
+        self.seed()
+        with self.assertRaisesRegex(ValueError, "Email already registered"):
+            self.facade.create_user({
+                "first_name": "Jo", "last_name": "Doe",
+                "email": "jane@example.com",
+            })
+
+    def test_update_conflict_is_rolled_back(self):
+        owner, _, _, _ = self.seed()
+        other = self.facade.create_user({
+            "first_name": "John", "last_name": "Doe",
+            "email": "john@example.com",
+        })
+        self.assertEqual(other.to_dict()["first_name"], "John")
+        with self.assertRaises(ValueError):
+            self.facade.update_user(other.id, {"first_name": "Johnny",
+                                               "email": "jane@example.com"})
+        self.assertEqual(other.first_name, "John")
+        # Straight to the repository, past the facade's own email check,
+        # with an index serializing the half-updated user as a reader would.
+        self.facade.user_repo.add_index(SerializingIndex("last_name"))
+        with self.assertRaises(ValueError):
+            self.facade.user_repo.update(other.id, {
+                "first_name": "Johnny", "email": "jane@example.com",
+            })
+        self.assertEqual(self.facade.get_user(other.id).to_dict()["first_name"],
+                         "John")
+        facade = self.reopen()
+        self.assertEqual(facade.get_user(other.id).email, "john@example.com")
+
+    def test_batch_reports_conflicts(self):
+        results = self.facade.create_users([
+            {"first_name": "A", "last_name": "B", "email": "a@example.com"},
+            {"first_name": "C", "last_name": "D", "email": "a@example.com"},
+            {"first_name": "", "last_name": "D", "email": "c@example.com"},
+        ])
+        self.assertIsNotNone(results[0][0])
+        self.assertEqual(results[1], (None, "Email already registered"))
+        self.assertEqual(results[2], (None, "first_name is required"))
+        self.assertEqual(len(self.reopen().get_all_users()), 1)
+
+    def test_page_and_delete(self):
+        ids = [self.facade.create_amenity({"name": f"A{i}"}).id
+               for i in range(5)]
+        page, cursor = self.facade.get_amenities_page(2)
+        self.assertEqual([a.id for a in page], ids[:2])
+        self.facade.delete_amenity(ids[2])
+        page, cursor = self.facade.get_amenities_page(2, cursor)
+        self.assertEqual([a.id for a in page], ids[3:])
+        self.assertIsNone(cursor)
+
+    def test_connection_per_thread(self):
+        self.seed()
+        counts = []
+
+        def read():
+            counts.append(len(self.facade.get_all_users()))
+
+        threads = [threading.Thread(target=read) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(counts, [1, 1, 1, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import gzip
+import json
+import os
+import subprocess
+import sys
+import unittest
+from app import create_app
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestLazyImports(unittest.TestCase):
+    def test_models_and_services_without_flask(self):
+        # A fresh interpreter: this one has already loaded Flask.
+        out = subprocess.run([sys.executable, "-c", (
+            "import sys, app.services.facade\n"
+            "print('flask' in sys.modules, app.services._facade)\n"
+            "from app.services import facade, get_facade\n"
+            "print(facade.__name__, type(get_facade()).__name__)\n"
+        )], cwd=ROOT, check=True, capture_output=True, text=True).stdout
+        self.assertEqual(out.split(), ["False", "None", "app.services.facade",
+                                       "HBnBFacade"])
+
+
+class TestDocs(unittest.TestCase):
+    def setUp(self):
+        self.app = create_app()
+        self.client = self.app.test_client()
+
+    def test_docs_are_not_routes_of_the_app(self):
+        rules = {rule.rule for rule in self.app.url_map.iter_rules()}
+        self.assertNotIn('/swagger.json', rules)
+        self.assertNotIn('/api/v1/', rules)
+        self.assertIn('/api/v1/users/', rules)
+
+    def test_docs_served_on_demand(self):
+        r = self.client.get('/swagger.json')
+        self.assertEqual(r.status_code, 200)
+        self.assertIn('/api/v1/users/', r.get_json()['paths'])
+        r = self.client.get('/api/v1/')
+        self.assertEqual(r.status_code, 200)
+        self.assertIn(b'swagger', r.data)
+        r = self.client.get('/swaggerui/swagger-ui.css')
+        self.assertEqual(r.status_code, 200)
+
+    def test_spec_compressed_with_etag(self):
+        plain = self.client.get('/swagger.json')
+        r = self.client.get('/swagger.json',
+                            headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(r.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(json.loads(gzip.decompress(r.data)),
+                         plain.get_json())
+        self.assertNotEqual(r.headers['ETag'], plain.headers['ETag'])
+        r = self.client.get('/swagger.json', headers={
+            'Accept-Encoding': 'gzip', 'If-None-Match': r.headers['ETag']
+        })
+        self.assertEqual(r.status_code, 304)
+        self.assertEqual(r.data, b'')
+        # Every app, and so every worker, serves the same ETag.
+        other = create_app().test_client().get('/swagger.json')
+        self.assertEqual(other.headers['ETag'], plain.headers['ETag'])
+
+
+if __name__ == "__main__":
+    unittest.main()
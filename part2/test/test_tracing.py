@@ -0,0 +1,128 @@
+import json
+import os
+import tempfile
+import unittest
+from app import create_app
+from app.services import get_facade, settings
+from app.services.facade import HBnBFacade
+from app.tracing import JsonLinesExporter, Tracer, span
+
+facade = get_facade()
+
+
+class MemoryExporter:
+    def __init__(self):
+        self.traces = []
+
+    def export(self, spans):
+        self.traces.append({s.name: s for s in spans})
+
+
+class TestSpans(unittest.TestCase):
+    def test_no_span_outside_a_trace(self):
+        with span("orphan") as s:
+            self.assertIsNone(s)
+
+    def test_sampling(self):
+        exporter = MemoryExporter()
+        with Tracer(exporter, sample_rate=0.0).trace("skipped"):
+            pass
+        with Tracer(exporter, sample_rate=0.0).trace("forced", force=True):
+            pass
+        self.assertEqual([list(t) for t in exporter.traces], [["forced"]])
+
+    def test_facade_spans_nest(self):
+        exporter = MemoryExporter()
+        tracer = Tracer(exporter, sample_rate=1.0)
+        hbnb = HBnBFacade(tracer=tracer)
+        owner = hbnb.create_user({"first_name": "Jane", "last_name": "Doe",
+                                  "email": "jane@example.com"})
+        with tracer.trace("request"):
+            hbnb.create_place({"title": "Loft", "price": 80.0,
+                               "latitude": 48.8, "longitude": 2.3,
+                               "owner_id": owner.id, "amenities": []})
+        spans = exporter.traces[-1]
+        root = spans["request"]
+        call = spans["facade.create_place"]
+        resolve = spans["resolve_references"]
+        self.assertEqual(call.parent_id, root.span_id)
+        self.assertEqual(resolve.parent_id, call.span_id)
+        self.assertEqual(spans["repository.get_many"].parent_id,
+                         resolve.span_id)
+        self.assertEqual(spans["repository.add"].attrs,
+                         {"collection": "places"})
+        self.assertEqual({s.trace_id for s in spans.values()},
+                         {root.trace_id})
+
+
+class TestTracedRequests(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "traces.jsonl")
+        self.exporter = JsonLinesExporter(self.path)
+        self.tracer = Tracer(self.exporter, sample_rate=0.0)
+        self.previous = facade.tracer
+        self.instrument(self.tracer)
+        self.saved = settings.TRACE_HEADER
+        settings.TRACE_HEADER = True
+        self.client = create_app().test_client()
+
+    def tearDown(self):
+        settings.TRACE_HEADER = self.saved
+        self.instrument(self.previous)
+        self.exporter.close()
+        self.tmp.cleanup()
+
+    def instrument(self, tracer):
+        facade.tracer = tracer
+        facade._instrument()
+        for collection, repo in facade._repos.items():
+            facade._instrument_repository(repo, collection)
+
+    def events(self):
+        with open(self.path) as f:
+            return [json.loads(line) for line in f]
+
+    def test_header_forces_a_trace(self):
+        payload = {"first_name": "Jane", "last_name": "Doe",
+                   "email": "traced@example.com"}
+        self.client.post('/api/v1/users/', json=payload)
+        self.assertEqual(self.events(), [])
+
+        r = self.client.post('/api/v1/users/', json=dict(
+            payload, email="traced2@example.com"
+        ), headers={"X-HBnB-Trace": "1"})
+        self.assertEqual(r.status_code, 201)
+        events = {e["name"]: e for e in self.events()}
+        root = events["POST /api/v1/users/"]
+        self.assertEqual(root["args"]["status"], 201)
+        for name in ("validate", "facade.create_user", "repository.add",
+                     "encode_json"):
+            self.assertEqual(events[name]["ph"], "X")
+            self.assertEqual(events[name]["args"]["trace_id"],
+                             root["args"]["trace_id"])
+        self.assertEqual(events["repository.add"]["args"]["parent_id"],
+                         events["facade.create_user"]["args"]["span_id"])
+
+    def test_header_ignored_unless_enabled(self):
+        settings.TRACE_HEADER = False
+        client = create_app().test_client()
+        r = client.post('/api/v1/amenities/', json={"name": "Hammam"},
+                        headers={"X-HBnB-Trace": "1"})
+        self.assertEqual(r.status_code, 201)
+        self.assertEqual(self.events(), [])
+
+    def test_to_dict_cache_miss(self):
+        r = self.client.post('/api/v1/amenities/', json={"name": "Sauna"},
+                             headers={"X-HBnB-Trace": "1"})
+        amenity_id = r.get_json()["id"]
+        self.client.get('/api/v1/amenities/' + amenity_id,
+                        headers={"X-HBnB-Trace": "1"})
+        names = [e["name"] for e in self.events()]
+        # The second request is served from the to_dict() cache.
+        self.assertEqual(names.count("to_dict"), 1)
+        self.assertIn("GET /api/v1/amenities/<amenity_id>", names)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -39,6 +39,54 @@ class TestUserEndpoints(unittest.TestCase):
         r2 = self.client.post('/api/v1/users/', json=payload)
         self.assertEqual(r2.status_code, 400)
 
+    def test_update_user_duplicate_email(self):
+        self.client.post('/api/v1/users/', json={
+            "first_name": "Taken",
+            "last_name": "Email",
+            "email": "taken@example.com"
+        })
+        create = self.client.post('/api/v1/users/', json={
+            "first_name": "Free",
+            "last_name": "Email",
+            "email": "free@example.com"
+        })
+        user_id = create.get_json()["id"]
+
+        r = self.client.put(
+            f'/api/v1/users/{user_id}',
+            json={"email": "taken@example.com"}
+        )
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(r.get_json()["error"], "Email already registered")
+
+    def test_batch_create_users(self):
+        r = self.client.post('/api/v1/users/batch', json=[
+            {"first_name": "B1", "last_name": "L", "email": "b1@batch.com"},
+            {"first_name": "B2", "last_name": "L"},
+            {"first_name": "B3", "last_name": "L", "email": "b1@batch.com"},
+            {"first_name": "B4", "last_name": "L", "email": "bad"},
+        ])
+        self.assertEqual(r.status_code, 207)
+        results = r.get_json()
+        self.assertEqual([item["status"] for item in results],
+                         [201, 400, 400, 400])
+        self.assertEqual(results[0]["data"]["email"], "b1@batch.com")
+        self.assertEqual(results[1]["errors"],
+                         {"email": "'email' is a required property"})
+        self.assertEqual(results[2]["error"], "Email already registered")
+        self.assertEqual(results[3]["error"], "email format is invalid")
+
+        r = self.client.post('/api/v1/users/batch', json=[
+            {"first_name": "C", "last_name": "L", "email": "c@batch.com"}
+        ])
+        self.assertEqual(r.status_code, 201)
+
+    def test_batch_rejects_non_array(self):
+        r = self.client.post('/api/v1/users/batch', json={"a": 1})
+        self.assertEqual(r.status_code, 400)
+        r = self.client.post('/api/v1/users/batch', json=[])
+        self.assertEqual(r.status_code, 400)
+
     def test_get_users_list(self):
         r = self.client.get('/api/v1/users/')
         self.assertEqual(r.status_code, 200)
@@ -0,0 +1,80 @@
+import unittest
+from werkzeug.exceptions import HTTPException
+from app import create_app
+from app.api.v1.amenities import amenity_model
+from app.api.v1.places import api as places_ns
+from app.api.v1.places import place_model, place_update_model
+from app.api.v1.reviews import review_model, review_update_model
+from app.api.v1.users import user_model
+from flask_restx import Model, fields
+from app.api.v1.batch import batch_validator
+from app.api.v1.validation import compile_payload_validator
+
+PAYLOADS = [
+    None, [], "x", {}, {"title": 1}, {"price": True}, {"price": "3"},
+    {"rating": 5.0}, {"rating": 5.5}, {"rating": True},
+    {"amenities": "a"}, {"amenities": [1, "a", None]},
+    {"title": None, "price": None}, {"name": 3, "extra": 1},
+    {"email": ["x"], "first_name": {}},
+    {"title": "Loft", "price": 80, "latitude": 1, "longitude": 2.5,
+     "owner_id": "u", "amenities": []},
+]
+MODELS = [place_model, place_update_model, review_model,
+          review_update_model, user_model, amenity_model]
+
+
+class TestPayloadValidator(unittest.TestCase):
+    def test_same_errors_as_flask_restx(self):
+        app = create_app()
+        with app.test_request_context():
+            restx = places_ns.apis[-1]
+            for model in MODELS:
+                validate = compile_payload_validator(model)
+                for payload in PAYLOADS:
+                    try:
+                        model.validate(payload, restx.refresolver,
+                                       restx.format_checker)
+                        expected = {}
+                    except HTTPException as e:
+                        expected = e.data["errors"]
+                    errors = validate(payload)
+                    # Same keys in the same order: the response bodies
+                    # are byte for byte the same.
+                    self.assertEqual(list(errors.items()),
+                                     list(expected.items()),
+                                     (model.name, payload))
+
+    def test_batch_errors(self):
+        validate = batch_validator(place_model)
+        self.assertEqual(validate({
+            "title": "Loft", "price": 80, "latitude": 1, "longitude": 2,
+            "owner_id": "u", "amenities": ["a", 1]
+        }), {"amenities.1": "1 is not of type 'string'"})
+        self.assertEqual(batch_validator(review_model)({
+            "text": "Nice", "rating": 5.0, "user_id": "u", "place_id": "p"
+        }), {})
+        # A model left to jsonschema reports errors the same way.
+        model = Model('Bounded', {'n': fields.Integer(required=True, min=1)})
+        self.assertIsNone(compile_payload_validator(model))
+        validate = batch_validator(model)
+        self.assertEqual(validate({}), {"n": "'n' is a required property"})
+        self.assertEqual(validate({"n": 0}),
+                         {"n": "0 is less than the minimum of 1"})
+
+    def test_request_rejected(self):
+        client = create_app().test_client()
+        r = client.post('/api/v1/reviews/', json={"rating": "5"})
+        self.assertEqual(r.status_code, 400)
+        self.assertEqual(r.get_json(), {
+            "errors": {
+                "place_id": "'place_id' is a required property",
+                "text": "'text' is a required property",
+                "user_id": "'user_id' is a required property",
+                "rating": "'5' is not of type 'integer'",
+            },
+            "message": "Input payload validation failed",
+        })
+
+
+if __name__ == "__main__":
+    unittest.main()